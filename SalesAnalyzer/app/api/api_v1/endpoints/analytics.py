@@ -1,30 +1,31 @@
 """
 数据分析API端点
 """
+from datetime import date
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.sales import SalesRecord
+from app.api.api_v1.endpoints.sales import LIST_COLUMNS, LIST_FIELDS
+from app.core.database import get_db, in_db_pool
+from app.services.aggregation import InvalidAggregationError, split_list
+from app.services.analytics_backend import aggregate_sales, daily_sales, top_sales
+from app.services.column_store import column_store
+from app.services.dashboard import dashboard_summary
+from app.services.pagination import keyset_page
+from app.services.response_cache import cached_call, cached_response, data_version, response_cache
+from app.utils.serialization import rows_to_dicts
 
 router = APIRouter()
 
 @router.get("/top-products")
-async def get_top_products(
+@in_db_pool
+@cached_response
+def get_top_products(
     limit: int = Query(10, description="返回产品数量"),
     db: Session = Depends(get_db)
 ):
     """获取热销产品排行"""
-    from sqlalchemy import func
-    
-    top_products = db.query(
-        SalesRecord.product_name,
-        func.sum(SalesRecord.sales_amount).label('total_sales'),
-        func.sum(SalesRecord.quantity).label('total_quantity'),
-        func.count(SalesRecord.id).label('order_count')
-    ).group_by(SalesRecord.product_name)\
-     .order_by(func.sum(SalesRecord.sales_amount).desc())\
-     .limit(limit).all()
+    top_products = top_sales(db, 'product_name', ['total_sales', 'total_quantity', 'order_count'], limit)
     
     return [
         {
@@ -37,20 +38,14 @@ async def get_top_products(
     ]
 
 @router.get("/top-regions")
-async def get_top_regions(
+@in_db_pool
+@cached_response
+def get_top_regions(
     limit: int = Query(10, description="返回区域数量"),
     db: Session = Depends(get_db)
 ):
     """获取热销区域排行"""
-    from sqlalchemy import func
-    
-    top_regions = db.query(
-        SalesRecord.region,
-        func.sum(SalesRecord.sales_amount).label('total_sales'),
-        func.count(SalesRecord.id).label('order_count')
-    ).group_by(SalesRecord.region)\
-     .order_by(func.sum(SalesRecord.sales_amount).desc())\
-     .limit(limit).all()
+    top_regions = top_sales(db, 'region', ['total_sales', 'order_count'], limit)
     
     return [
         {
@@ -62,34 +57,76 @@ async def get_top_regions(
     ]
 
 @router.get("/sales-trend")
-async def get_sales_trend(
+@in_db_pool
+@cached_response
+def get_sales_trend(
     start_date: Optional[str] = Query(None, description="开始日期 (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="结束日期 (YYYY-MM-DD)"),
     db: Session = Depends(get_db)
 ):
     """获取销售趋势数据"""
-    from sqlalchemy import func
-    from datetime import datetime
-    
-    query = db.query(
-        func.date(SalesRecord.sales_date).label('date'),
-        func.sum(SalesRecord.sales_amount).label('daily_sales'),
-        func.count(SalesRecord.id).label('daily_orders')
-    ).group_by(func.date(SalesRecord.sales_date))
-    
-    if start_date:
-        query = query.filter(SalesRecord.sales_date >= start_date)
-    
-    if end_date:
-        query = query.filter(SalesRecord.sales_date <= end_date)
-    
-    trend_data = query.order_by(func.date(SalesRecord.sales_date)).all()
+    trend_data = daily_sales(db, start_date, end_date)
     
     return [
         {
             "date": str(t.date),
-            "daily_sales": float(t.daily_sales),
-            "daily_orders": int(t.daily_orders)
+            "daily_sales": float(t.total_sales),
+            "daily_orders": int(t.order_count)
         }
         for t in trend_data
-    ] 
\ No newline at end of file
+    ]
+
+@router.get("/aggregate")
+@in_db_pool
+@cached_response
+def get_aggregate(
+    group_by: str = Query("", description="分组维度，逗号分隔：region, category, product_name, sales_person, "
+                                          "payment_method, day, week, month, year"),
+    measures: str = Query("sum(sales_amount),count", description="指标，逗号分隔：count 或 sum/avg/min/max(字段)，"
+                                                                 "字段为 sales_amount, quantity, unit_price"),
+    start_date: Optional[str] = Query(None, description="开始日期 (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="结束日期 (YYYY-MM-DD，不含当天)"),
+    region: Optional[str] = Query(None, description="销售区域"),
+    category: Optional[str] = Query(None, description="产品类别"),
+    product_name: Optional[str] = Query(None, description="产品名称"),
+    sales_person: Optional[str] = Query(None, description="销售人员"),
+    payment_method: Optional[str] = Query(None, description="支付方式"),
+    sort: Optional[str] = Query(None, description="排序字段，逗号分隔，前缀 - 表示降序，如 -sum_sales_amount"),
+    limit: int = Query(1000, ge=1, le=100000, description="每个分组集合返回的行数"),
+    subtotals: str = Query("none", pattern="^(none|rollup|cube)$", description="小计：none、rollup 或 cube"),
+    db: Session = Depends(get_db)
+):
+    """多维聚合查询：任意维度组合的分组指标，可附带 ROLLUP / CUBE 式小计（见 app/services/aggregation.py）"""
+    try:
+        return aggregate_sales(
+            db, split_list(group_by), split_list(measures), start_date, end_date, split_list(sort), limit, subtotals,
+            region=region, category=category, product_name=product_name, sales_person=sales_person,
+            payment_method=payment_method
+        )
+    except InvalidAggregationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/dashboard")
+@in_db_pool
+def get_dashboard(
+    days: int = Query(30, ge=1, description="销售趋势的天数"),
+    recent: int = Query(10, ge=0, le=100, description="最近销售记录条数"),
+    db: Session = Depends(get_db)
+):
+    """仪表盘数据：KPI 合计、每日趋势、类别统计和最近销售记录，一次请求返回
+
+    前三部分由一次按 (日期, 类别) 分组的查询得到（见 app/services/dashboard.py），整个响应按数据版本和当天日期缓存。
+    """
+    today = date.today()
+
+    def compute():
+        rows, _ = keyset_page(db.query(*LIST_COLUMNS), "sales_date", "desc", "", recent) if recent else ([], None)
+        return {**dashboard_summary(db, days, today), "recent_sales": rows_to_dicts(LIST_FIELDS, rows)}
+
+    return cached_call(db, f"{__name__}.get_dashboard", {"days": days, "recent": recent, "today": today}, compute)
+
+@router.get("/cache-stats")
+@in_db_pool
+def get_cache_stats(db: Session = Depends(get_db)):
+    """响应缓存命中统计、当前数据版本和列式存储状态"""
+    return {**response_cache.stats(), "data_version": data_version(db), "column_store": column_store.stats()}
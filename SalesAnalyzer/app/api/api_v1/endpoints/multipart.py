@@ -0,0 +1,102 @@
+"""
+分片（断点续传）上传API端点
+
+用于超过 MAX_FILE_SIZE 的大文件：创建会话后按编号 PUT 各分片（可乱序、并发），
+连接中断时查询会话只重传缺失的分片，全部上传后调用 complete 拼接并开始后台导入。
+"""
+from typing import Optional
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.services.data_processor import DataProcessor
+from app.services.archive_import import check_decompression_support, UnsupportedCompressionError
+from app.services.import_jobs import ImportQueueFullError, DuplicateImportError
+from app.services.multipart_upload import (
+    create_upload, get_upload, write_part, complete_upload, delete_upload,
+    MultipartUploadError, UploadTooLargeError, UploadNotFoundError
+)
+from app.schemas.sales import (
+    DataImportResponse, MultipartUploadCreate, MultipartUploadStatus,
+    MultipartPartResponse, MultipartUploadComplete
+)
+
+router = APIRouter()
+
+@router.post("", response_model=MultipartUploadStatus, status_code=201)
+async def create_multipart_upload(request: MultipartUploadCreate):
+    """创建分片上传会话"""
+    try:
+        check_decompression_support(request.filename)
+        return await run_in_threadpool(create_upload, request.filename, request.total_size)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except (MultipartUploadError, UnsupportedCompressionError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{upload_id}", response_model=MultipartUploadStatus)
+async def get_multipart_upload(upload_id: str):
+    """查询会话已收到的分片"""
+    try:
+        return await run_in_threadpool(get_upload, upload_id)
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.put("/{upload_id}/parts/{part_number}", response_model=MultipartPartResponse)
+async def upload_multipart_part(
+    upload_id: str,
+    part_number: int,
+    request: Request,
+    x_content_sha256: Optional[str] = Header(None, description="分片内容的 SHA-256，提供时校验")
+):
+    """以原始请求体上传一个分片，重复上传同一编号时覆盖"""
+    try:
+        return await write_part(upload_id, part_number, request.stream(), x_content_sha256)
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except MultipartUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/{upload_id}/complete", response_model=DataImportResponse)
+async def complete_multipart_upload(
+    upload_id: str,
+    response: Response,
+    request: MultipartUploadComplete = Body(MultipartUploadComplete()),
+    db: Session = Depends(get_db)
+):
+    """按编号拼接分片并提交后台导入任务，返回任务ID
+
+    提交失败（如队列已满）时分片保留，可稍后重试。
+    """
+    try:
+        filename = (await run_in_threadpool(get_upload, upload_id))["filename"]
+        import_log = await run_in_threadpool(
+            complete_upload, db, upload_id, request.parts, request.force, request.upsert
+        )
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except MultipartUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DuplicateImportError as e:
+        return DataProcessor(db).duplicate_response(filename, e.duplicate)
+    except ImportQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    response.status_code = 202
+    return DataImportResponse(
+        success=True,
+        filename=import_log.filename,
+        records_imported=0,
+        job_id=import_log.id,
+        message=f"已提交后台导入任务 {import_log.id}"
+    )
+
+@router.delete("/{upload_id}", status_code=204)
+async def abort_multipart_upload(upload_id: str):
+    """放弃上传会话并删除已收到的分片"""
+    try:
+        await run_in_threadpool(delete_upload, upload_id)
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -3,35 +3,107 @@
 """
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, in_db_pool
 from app.models.sales import SalesRecord
+from app.services.analytics_backend import sales_totals
+from app.services.response_cache import cached_response
+from app.services.dimensions import dimension_filter
+from app.services.pagination import InvalidCursorError, keyset_page, record_count
+from app.services.export import (
+    UnsupportedExportFormatError, check_export_format, export_filename, export_media_type, export_statement,
+    iter_export
+)
 from app.schemas.sales import SalesRecord as SalesRecordSchema, SalesQuery
+from app.utils.serialization import NDJSON_MEDIA_TYPE, FastJSONResponse, ndjson_chunks, rows_to_dicts
 
 router = APIRouter()
 
+# 列表接口只查询响应模型中的列，顺序与模型字段一致
+LIST_FIELDS = list(SalesRecordSchema.model_fields)
+LIST_COLUMNS = [getattr(SalesRecord, name) for name in LIST_FIELDS]
+
 @router.get("/", response_model=List[SalesRecordSchema])
-async def get_sales_records(
-    skip: int = Query(0, description="跳过记录数"),
+@in_db_pool
+def get_sales_records(
+    skip: int = Query(0, description="跳过记录数（偏移分页）"),
     limit: int = Query(100, description="返回记录数"),
     region: Optional[str] = Query(None, description="销售区域"),
     category: Optional[str] = Query(None, description="产品类别"),
+    cursor: Optional[str] = Query(
+        None, description="游标分页：传空字符串取第一页，之后传响应头 X-Next-Cursor 的值；不传时按 skip 偏移分页"
+    ),
+    sort: str = Query("id", description="游标分页的排序字段：id 或 sales_date（按日）"),
+    order: str = Query("asc", description="游标分页的排序方向：asc 或 desc"),
+    format: str = Query("json", pattern="^(json|ndjson)$",
+                        description="json 返回数组；ndjson 每行一条记录，偏移分页时边读取边发送"),
     db: Session = Depends(get_db)
 ):
-    """获取销售记录列表"""
-    query = db.query(SalesRecord)
+    """获取销售记录列表
+
+    响应头 X-Total-Count 为符合条件的记录总数；游标分页还有下一页时返回 X-Next-Cursor。
+    按列投影查询并直接序列化结果行，不逐行构造ORM对象和经过响应模型校验，输出与 SalesRecordSchema 一致。
+    """
+    query = db.query(*LIST_COLUMNS)
     
     if region:
-        query = query.filter(SalesRecord.region == region)
+        query = query.filter(dimension_filter(db, 'region', region))
     
     if category:
-        query = query.filter(SalesRecord.category == category)
+        query = query.filter(dimension_filter(db, 'category', category))
+    
+    headers = {"X-Total-Count": str(record_count(db, region=region, category=category))}
+    if cursor is None:
+        query = query.offset(skip).limit(limit)
+        if format == "ndjson":
+            return StreamingResponse(
+                ndjson_chunks(LIST_FIELDS, query.yield_per(settings.EXPORT_BATCH_SIZE)),
+                media_type=NDJSON_MEDIA_TYPE, headers=headers
+            )
+        rows = query.all()
+    else:
+        try:
+            rows, next_cursor = keyset_page(query, sort, order, cursor, limit)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
     
-    records = query.offset(skip).limit(limit).all()
-    return records
+    if format == "ndjson":
+        return StreamingResponse(ndjson_chunks(LIST_FIELDS, rows), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+    return FastJSONResponse(rows_to_dicts(LIST_FIELDS, rows), headers=headers)
+
+@router.get("/export")
+@in_db_pool
+def export_sales_records(
+    start_date: Optional[str] = Query(None, description="开始日期"),
+    end_date: Optional[str] = Query(None, description="结束日期"),
+    region: Optional[str] = Query(None, description="销售区域"),
+    category: Optional[str] = Query(None, description="产品类别"),
+    product_name: Optional[str] = Query(None, description="产品名称"),
+    format: str = Query("csv", description="导出格式：csv、arrow（Arrow IPC 流）或 parquet"),
+    gzip: bool = Query(False, description="以 gzip 压缩的 .csv.gz 文件导出（仅 csv）"),
+    db: Session = Depends(get_db)
+):
+    """按过滤条件流式导出全部销售记录"""
+    try:
+        check_export_format(format)
+    except UnsupportedExportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    statement = export_statement(
+        db, start_date, end_date, format, region=region, category=category, product_name=product_name
+    )
+    return StreamingResponse(
+        iter_export(db, statement, format, compress=gzip),
+        media_type=export_media_type(format, gzip),
+        headers={"Content-Disposition": f"attachment; filename={export_filename(format, gzip)}"}
+    )
 
 @router.get("/{record_id}", response_model=SalesRecordSchema)
-async def get_sales_record(record_id: int, db: Session = Depends(get_db)):
+@in_db_pool
+def get_sales_record(record_id: int, db: Session = Depends(get_db)):
     """根据ID获取销售记录"""
     record = db.query(SalesRecord).filter(SalesRecord.id == record_id).first()
     if not record:
@@ -39,14 +111,15 @@ async def get_sales_record(record_id: int, db: Session = Depends(get_db)):
     return record
 
 @router.get("/statistics/summary")
-async def get_sales_summary(db: Session = Depends(get_db)):
+@in_db_pool
+@cached_response
+def get_sales_summary(db: Session = Depends(get_db)):
     """获取销售数据摘要"""
-    from sqlalchemy import func
-    
     # 基础统计
-    total_sales = db.query(func.sum(SalesRecord.sales_amount)).scalar() or 0
-    total_orders = db.query(func.count(SalesRecord.id)).scalar() or 0
-    total_quantity = db.query(func.sum(SalesRecord.quantity)).scalar() or 0
+    totals = sales_totals(db)
+    total_sales = totals.total_sales or 0
+    total_orders = totals.order_count or 0
+    total_quantity = totals.total_quantity or 0
     
     # 平均订单价值
     avg_order_value = total_sales / total_orders if total_orders > 0 else 0
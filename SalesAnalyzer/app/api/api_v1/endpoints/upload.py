@@ -2,53 +2,186 @@
 文件上传API端点
 """
 import os
+import uuid
 import shutil
+import asyncio
 from typing import List
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, in_db_pool, run_in_db_pool
 from app.core.config import settings
 from app.services.data_processor import DataProcessor
-from app.schemas.sales import DataImportResponse
+from app.services.archive_import import check_decompression_support, UnsupportedCompressionError
+from app.services.import_jobs import submit_import_job, get_job_status, ImportQueueFullError, DuplicateImportError
+from app.schemas.sales import DataImportResponse, ImportJobStatus
+from app.utils.streams import SpooledPipe
+from app.utils.helpers import validate_file_extension
 
 router = APIRouter()
 
 @router.post("/csv", response_model=DataImportResponse)
 async def upload_csv_file(
+    response: Response,
     file: UploadFile = File(...),
+    streaming: bool = Query(False, description="分块流式导入，适用于大文件"),
+    background: bool = Query(False, description="后台导入，立即返回任务ID"),
+    parallel: bool = Query(False, description="多进程并行解析清洗"),
+    force: bool = Query(False, description="内容与已导入文件相同时仍强制重新导入"),
+    upsert: bool = Query(False, description="按订单号增量合并：已有订单更新，新订单插入"),
     db: Session = Depends(get_db)
 ):
-    """上传CSV文件并处理"""
+    """上传CSV、Excel或压缩文件并处理（内容与已成功导入的文件相同时直接返回 duplicate_of）
+
+    Excel工作簿（.xlsx/.xls）总是逐行分块导入；.csv.gz/.csv.zst 边解压边分块导入；
+    .zip 中的每个CSV单独导入。streaming/parallel 只对未压缩的CSV生效。
+    """
     # 验证文件类型
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="只支持CSV文件")
+    if not validate_file_extension(file.filename, settings.ALLOWED_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="只支持CSV、Excel或压缩文件（.csv.gz/.csv.zst/.zip）")
+    try:
+        check_decompression_support(file.filename)
+    except UnsupportedCompressionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # 验证文件大小
     if file.size and file.size > settings.MAX_FILE_SIZE:
         raise HTTPException(status_code=400, detail="文件大小超过限制")
     
-    # 保存文件
-    file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
+    # 同步导入直接读取已接收的上传文件（Starlette 超过1MB才溢出到临时文件），不再复制到上传目录
+    if not (background or parallel):
+        processor = DataProcessor(db)
+        if streaming and file.filename.lower().endswith(".csv"):
+            return await run_in_threadpool(
+                processor.process_csv_stream, file.file, file.filename, file.size, force=force, upsert=upsert
+            )
+        return await run_in_threadpool(
+            processor.process_file, file.file, file.filename, force=force, upsert=upsert
+        )
+    
+    # 后台/并行导入需要在请求之外按路径读取文件（加唯一前缀，避免同名并发上传互相覆盖）
+    file_path = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4().hex}_{os.path.basename(file.filename)}")
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await run_in_threadpool(_save_upload, file, file_path)
     except Exception as e:
+        if os.path.exists(file_path):
+            os.remove(file_path)
         raise HTTPException(status_code=500, detail=f"文件保存失败: {str(e)}")
     
-    # 处理文件
+    # 后台导入：文件交由任务处理，立即返回任务ID
+    if background:
+        try:
+            import_log = await run_in_db_pool(submit_import_job, db, file_path, file.filename, parallel, force, upsert)
+        except DuplicateImportError as e:
+            os.remove(file_path)
+            return DataProcessor(db).duplicate_response(file.filename, e.duplicate)
+        except ImportQueueFullError as e:
+            os.remove(file_path)
+            raise HTTPException(status_code=503, detail=str(e))
+        except Exception as e:
+            # 任务未能提交时文件无人接管，需在此清理
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise HTTPException(status_code=500, detail=f"提交导入任务失败: {str(e)}")
+        
+        response.status_code = 202
+        return DataImportResponse(
+            success=True,
+            filename=file.filename,
+            records_imported=0,
+            job_id=import_log.id,
+            message=f"已提交后台导入任务 {import_log.id}"
+        )
+    
+    # 并行导入（在线程池中执行，避免阻塞事件循环）
+    processor = DataProcessor(db)
+    try:
+        result = await run_in_threadpool(
+            processor.process_file, file_path, file.filename, parallel=True, force=force, upsert=upsert
+        )
+    finally:
+        # 清理临时文件
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+    
+    return result
+
+@router.post("/stream", response_model=DataImportResponse)
+async def upload_csv_stream(
+    request: Request,
+    filename: str = Query(..., description="文件名"),
+    upsert: bool = Query(False, description="按订单号增量合并：已有订单更新，新订单插入"),
+    db: Session = Depends(get_db)
+):
+    """以原始请求体上传CSV，边接收边解析入库
+
+    请求体写入 SpooledPipe，由线程池中的流式导入同时读取，数据在上传过程中即逐块提交；
+    未解析的积压数据超过 settings.UPLOAD_SPOOL_THRESHOLD 时才溢出到临时文件。
+    上传中断时按流式导入规则保留已提交分块。
+    """
+    if not filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="只支持CSV文件")
+    
+    content_length = request.headers.get("content-length")
+    file_size = int(content_length) if content_length else None
+    if file_size and file_size > settings.MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail="文件大小超过限制")
+    
+    pipe = SpooledPipe(settings.UPLOAD_SPOOL_THRESHOLD)
     processor = DataProcessor(db)
-    result = processor.process_csv_file(file_path, file.filename)
+    import_task = asyncio.ensure_future(
+        run_in_threadpool(processor.process_csv_stream, pipe, filename, file_size, upsert=upsert)
+    )
+    received = 0
+    too_large = False
+    try:
+        async for chunk in request.stream():
+            if import_task.done():
+                # 导入已提前结束（失败），不再接收剩余数据
+                break
+            received += len(chunk)
+            if received > settings.MAX_FILE_SIZE:
+                # 未声明或谎报长度时按实际接收字节数限制，避免临时文件无限增长
+                too_large = True
+                pipe.close_writer(error=ValueError("文件大小超过限制"))
+                break
+            pipe.write(chunk)
+        else:
+            pipe.close_writer()
+    except Exception as e:
+        pipe.close_writer(error=e)
+    finally:
+        # 提前结束导入时同样需要关闭写入端，避免导入线程阻塞
+        pipe.close_writer()
     
-    # 清理临时文件
     try:
-        os.remove(file_path)
-    except:
-        pass
+        result = await import_task
+    finally:
+        pipe.close()
     
+    if too_large:
+        raise HTTPException(status_code=413, detail=f"文件大小超过限制，{result.message}")
     return result
 
+@router.get("/jobs/{job_id}", response_model=ImportJobStatus)
+@in_db_pool
+def get_import_job(job_id: int, db: Session = Depends(get_db)):
+    """获取后台导入任务状态"""
+    status = get_job_status(db, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="导入任务不存在")
+    return status
+
+def _save_upload(file: UploadFile, file_path: str) -> None:
+    """将上传文件写入磁盘"""
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
 @router.get("/history")
-async def get_upload_history(db: Session = Depends(get_db)):
+@in_db_pool
+def get_upload_history(db: Session = Depends(get_db)):
     """获取上传历史"""
     from app.models.sales import DataImportLog
     
@@ -60,8 +193,11 @@ async def get_upload_history(db: Session = Depends(get_db)):
             "filename": log.filename,
             "file_size": log.file_size,
             "records_imported": log.records_imported,
+            "records_skipped": log.records_skipped,
+            "chunks_processed": log.chunks_processed,
             "import_status": log.import_status,
             "imported_at": log.imported_at,
+            "finished_at": log.finished_at,
             "error_message": log.error_message
         }
         for log in logs
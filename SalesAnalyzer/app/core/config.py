@@ -17,11 +17,45 @@ class Settings:
     # 文件上传配置
     UPLOAD_DIR: str = "data/uploads"
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
-    ALLOWED_EXTENSIONS: list = [".csv", ".xlsx", ".xls"]
+    UPLOAD_SPOOL_THRESHOLD: int = 8 * 1024 * 1024  # 流式上传未解析数据超过该值时才溢出到临时文件
+    ALLOWED_EXTENSIONS: list = [".csv", ".xlsx", ".xls", ".csv.gz", ".csv.zst", ".zip"]
+    MULTIPART_MAX_FILE_SIZE: int = 10 * 1024 * 1024 * 1024  # 分片上传的文件大小上限 10GB
+    MULTIPART_PART_SIZE: int = 64 * 1024 * 1024  # 单个分片大小上限
+    MULTIPART_MAX_PARTS: int = 10000
+    MULTIPART_UPLOAD_TTL: int = 24 * 60 * 60  # 未完成的分片上传会话保留时间(秒)
     
     # 数据处理配置
     BATCH_SIZE: int = 1000
     CHUNK_SIZE: int = 10000
+    IMPORT_WORKERS: int = 2  # 后台导入线程数
+    # 接口同步查询的数据库线程池大小；加上导入线程和流式导出，不应超过连接池上限（SQLite 默认 5 + 溢出 10）
+    DB_POOL_THREADS: int = 8
+    IMPORT_QUEUE_SIZE: int = 8  # 排队等待的导入任务上限
+    IMPORT_PROCESS_WORKERS: int = os.cpu_count() or 1  # 并行解析进程数
+    PARALLEL_SHARD_SIZE: int = 16 * 1024 * 1024  # 并行解析分片大小(字节)
+    ARCHIVE_IMPORT_WORKERS: int = 2  # zip压缩包内CSV并发导入数
+    # 星型模型：产品/类别/区域/销售人员/支付方式写入整数维度键，分析查询按键分组；
+    # 切换后重启（或运行 init_db.py）会重建索引并补齐已有记录的维度键
+    STAR_SCHEMA: bool = False
+    # 分析接口的过滤条件可在 (日期, 区域, 类别, 产品) 粒度上表达时读取汇总表 sales_daily_rollup；
+    # 关闭后回到扫描 sales_records，汇总表仍随导入维护
+    SALES_ROLLUP: bool = True
+    # 内存列式存储（app/services/column_store.py）：启动时加载分析列，热销排行、合计和趋势在内存中计算，
+    # 尚未加载或数据已变化时回到数据库查询；容量超过 COLUMN_STORE_MAX_MB 时停用
+    COLUMN_STORE: bool = False
+    COLUMN_STORE_MAX_MB: int = 1024
+    # 分析查询后端（app/services/analytics_backend.py）：sql 为 SQLAlchemy 查询；duckdb 为 DuckDB 查询 OLAP_SNAPSHOT_DIR 下
+    # sales_records 的 Parquet 快照（需安装 duckdb，快照随导入刷新，尚未就绪时使用 sql）
+    ANALYTICS_BACKEND: str = "sql"
+    OLAP_SNAPSHOT_DIR: str = "data/olap"
+    OLAP_PART_ROWS: int = 200000  # Parquet 快照每个文件的最大行数（也是从数据库读取的批大小）
+    OLAP_MAX_PARTS: int = 16  # 快照文件数超过该值时合并为一个文件
+    RESPONSE_CACHE_SIZE: int = 256  # 分析/统计接口响应缓存的条目上限（LRU），0 表示不缓存
+    EXPORT_BATCH_SIZE: int = 10000  # 流式导出每次从数据库游标读取的行数
+    EXPORT_ARROW_BATCH_SIZE: int = 16384  # Arrow/Parquet 导出每个记录批（行组）的行数
+    EXPORT_GZIP_LEVEL: int = 3  # gzip 导出的压缩级别(1-9)，更高级别压缩率提升有限而耗时明显增加
+    BULK_LOAD_CHUNK_SIZE: int = 200000  # 大批量导入模式每个事务的行数
+    BULK_LOAD_CACHE_SIZE: int = 256 * 1024 * 1024  # 大批量导入连接的页缓存上限(字节)，用于重建索引时排序
     
     # 安全配置
     SECRET_KEY: str = "your-secret-key-here"
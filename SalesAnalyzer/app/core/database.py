@@ -1,7 +1,12 @@
 """
 数据库连接和会话管理
 """
-from sqlalchemy import create_engine
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -24,4 +29,68 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# 数据库线程池：接口中的同步查询在这里执行，不阻塞事件循环。线程数有上限，
+# 并发请求超出时在此排队，而不是同时向连接池借用连接、等待超时。
+# 导入等长时间运行的任务仍使用通用线程池（run_in_threadpool），不占用查询线程
+db_executor = ThreadPoolExecutor(max_workers=settings.DB_POOL_THREADS, thread_name_prefix="db")
+
+async def run_in_db_pool(func: Callable, *args, **kwargs):
+    """在数据库线程池中执行同步函数"""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        db_executor, functools.partial(context.run, func, *args, **kwargs)
+    )
+
+def in_db_pool(endpoint: Callable) -> Callable:
+    """将使用同步会话的接口函数包装为在数据库线程池中执行的异步函数"""
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        return await run_in_db_pool(endpoint, *args, **kwargs)
+    return wrapper
+
+def index_names(conn, table_name: str) -> set:
+    """表上已有的索引名（SQLAlchemy 的 SQLite 反射会跳过表达式索引，SQLite 下直接查 sqlite_master）"""
+    if conn.dialect.name == "sqlite":
+        return set(conn.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"), {"table": table_name}
+        ).scalars())
+    return {index["name"] for index in inspect(conn).get_indexes(table_name)}
+
+def upgrade_database(bind=None, metadata=None) -> list:
+    """创建缺失的表，并为已有表补齐模型中新增的列和索引
+
+    create_all 不会修改已存在的表，旧版本创建的数据库缺少新增列时导入会失败。
+    这里只做向后兼容的增量变更（ADD COLUMN / CREATE INDEX），返回执行的变更说明；
+    模型不再声明的 ix_{表名}_ 前缀索引（旧版本的单列索引、切换星型模型前的组合索引）会被删除。
+    metadata 须包含该表的全部索引，部分模型（如只映射部分列的简化模型）不要用于升级。
+    """
+    bind = bind or engine
+    metadata = metadata or Base.metadata
+    metadata.create_all(bind=bind)
+
+    changes = []
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=bind.dialect)}"
+                default = column.default.arg if column.default is not None and column.default.is_scalar else None
+                if default is not None:
+                    ddl += f" DEFAULT {default!r}" if isinstance(default, str) else f" DEFAULT {default}"
+                conn.execute(text(ddl))
+                changes.append(ddl)
+            declared = {index.name for index in table.indexes}
+            existing_indexes = index_names(conn, table.name)
+            for name in sorted(existing_indexes - declared):
+                if name.startswith(f"ix_{table.name}_"):
+                    conn.execute(text(f"DROP INDEX {name}"))
+                    changes.append(f"DROP INDEX {name}")
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=conn)
+    return changes
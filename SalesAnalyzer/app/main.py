@@ -1,17 +1,43 @@
 """
 销售数据分析系统主应用入口
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.database import SessionLocal, engine, upgrade_database
 from app.api.api_v1.api import api_router
+from app.services.column_store import column_store
+from app.services.duckdb_backend import parquet_snapshot
+from app.services.import_jobs import fail_orphaned_jobs
+from app.services.multipart_upload import cleanup_expired_uploads
+from app.services.dimensions import backfill_dimension_keys
+from app.services.rollup import backfill_sales_rollup
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时升级数据库结构、补齐汇总表，清理上次进程遗留的后台导入任务和过期的分片上传，在后台加载列式存储和 Parquet 快照"""
+    upgrade_database()
+    if settings.STAR_SCHEMA:
+        backfill_dimension_keys(engine)
+    backfill_sales_rollup(engine)
+    db = SessionLocal()
+    try:
+        fail_orphaned_jobs(db)
+    finally:
+        db.close()
+    cleanup_expired_uploads()
+    column_store.schedule_refresh(engine)
+    parquet_snapshot.schedule_refresh(engine)
+    yield
 
 # 创建FastAPI应用实例
 app = FastAPI(
     title="销售数据分析系统",
     description="基于FastAPI的销售数据分析系统，提供数据处理、统计分析和RESTful API服务",
     version="1.0.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # 配置CORS中间件
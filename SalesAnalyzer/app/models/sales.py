@@ -1,32 +1,118 @@
 """
 销售数据模型定义
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
+from app.core.config import settings
 from app.core.database import Base
 
 class SalesRecord(Base):
     """销售记录模型"""
     __tablename__ = "sales_records"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     order_id = Column(String(100), index=True, comment="订单ID")
-    product_name = Column(String(200), index=True, comment="产品名称")
-    category = Column(String(100), index=True, comment="产品类别")
-    customer_name = Column(String(100), index=True, comment="客户名称")
-    region = Column(String(100), index=True, comment="销售区域")
+    product_name = Column(String(200), comment="产品名称")
+    category = Column(String(100), comment="产品类别")
+    customer_name = Column(String(100), comment="客户名称")
+    region = Column(String(100), comment="销售区域")
     sales_amount = Column(Float, comment="销售金额")
     quantity = Column(Integer, comment="销售数量")
     unit_price = Column(Float, comment="单价")
-    sales_date = Column(DateTime, index=True, comment="销售日期")
-    sales_person = Column(String(100), index=True, comment="销售人员")
+    sales_date = Column(DateTime, comment="销售日期")
+    sales_person = Column(String(100), comment="销售人员")
     payment_method = Column(String(50), comment="支付方式")
+    product_id = Column(Integer, ForeignKey("dim_products.id"), nullable=True, comment="产品维度键")
+    category_id = Column(Integer, ForeignKey("dim_categories.id"), nullable=True, comment="类别维度键")
+    region_id = Column(Integer, ForeignKey("dim_regions.id"), nullable=True, comment="区域维度键")
+    sales_person_id = Column(Integer, ForeignKey("dim_sales_persons.id"), nullable=True, comment="销售人员维度键")
+    payment_method_id = Column(Integer, ForeignKey("dim_payment_methods.id"), nullable=True, comment="支付方式维度键")
     created_at = Column(DateTime, default=func.now(), comment="创建时间")
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
     
     def __repr__(self):
         return f"<SalesRecord(id={self.id}, order_id='{self.order_id}', product='{self.product_name}')>"
 
+def _covering_index(name: str, *keys, include=()) -> Index:
+    # 分组/过滤列之后紧跟自增的 id：新记录总是追加到各分组的末尾，写入不会随机分裂索引页；
+    # 其余列放在最后，只用于覆盖查询
+    return Index(
+        f"ix_sales_records_{name}_cover",
+        *keys, SalesRecord.id, *include, SalesRecord.sales_amount, SalesRecord.quantity
+    )
+
+# 按分析和列表查询的访问路径设计的组合覆盖索引（用 app/utils/query_advisor.py 检查执行计划）：
+# 热销排行、分类统计、销售趋势和按区域/类别过滤的汇总只读索引、不回表。
+# 星型模型下分组和过滤改用维度键列。
+if settings.STAR_SCHEMA:
+    _product, _category, _region = SalesRecord.product_id, SalesRecord.category_id, SalesRecord.region_id
+else:
+    _product, _category, _region = SalesRecord.product_name, SalesRecord.category, SalesRecord.region
+_covering_index(_product.name, _product)
+_covering_index(_region.name, _region, _category)
+_covering_index(_category.name, _category)
+# 销售趋势按 date(sales_date) 有序读取，不需要临时B树；日期过滤同时加上等价的
+# date(sales_date) 范围条件（见 sales_date_range）即可定位索引区间
+_covering_index("sales_day", func.date(SalesRecord.sales_date), include=[SalesRecord.sales_date])
+
+class SalesDailyRollup(Base):
+    """按 (日期, 区域, 类别, 产品) 粒度预汇总的销售数据，随导入批次在同一事务中维护（见 app/services/rollup.py）"""
+    __tablename__ = "sales_daily_rollup"
+    # 主键按日期排序，销售趋势和日期范围汇总直接读主键区间；排行按维度分组时扫描整个汇总表。
+    # 不建二级索引：每个导入批次都会更新大量汇总行，指标列上的覆盖索引会使写入开销翻倍
+    __table_args__ = {"sqlite_with_rowid": False}
+    
+    day = Column(String(10), primary_key=True, comment="销售日期 YYYY-MM-DD")
+    region = Column(String(100), primary_key=True, comment="销售区域")
+    category = Column(String(100), primary_key=True, comment="产品类别")
+    product_name = Column(String(200), primary_key=True, comment="产品名称")
+    total_sales = Column(Float, nullable=False, default=0, comment="销售金额合计")
+    total_quantity = Column(Integer, nullable=False, default=0, comment="销售数量合计")
+    order_count = Column(Integer, nullable=False, default=0, comment="记录数")
+
+
+class DataVersion(Base):
+    """数据版本号（单行），每次提交销售数据时在同一事务中加一，用于响应缓存失效（见 app/services/response_cache.py）"""
+    __tablename__ = "data_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0, comment="数据版本号")
+
+class DimProduct(Base):
+    """产品维度"""
+    __tablename__ = "dim_products"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(200), unique=True, nullable=False, comment="产品名称")
+
+class DimCategory(Base):
+    """产品类别维度"""
+    __tablename__ = "dim_categories"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False, comment="产品类别")
+
+class DimRegion(Base):
+    """销售区域维度"""
+    __tablename__ = "dim_regions"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False, comment="销售区域")
+
+class DimSalesPerson(Base):
+    """销售人员维度"""
+    __tablename__ = "dim_sales_persons"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), unique=True, nullable=False, comment="销售人员")
+
+class DimPaymentMethod(Base):
+    """支付方式维度"""
+    __tablename__ = "dim_payment_methods"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50), unique=True, nullable=False, comment="支付方式")
+
 class DataImportLog(Base):
     """数据导入日志模型"""
     __tablename__ = "data_import_logs"
@@ -35,9 +121,17 @@ class DataImportLog(Base):
     filename = Column(String(255), comment="文件名")
     file_size = Column(Integer, comment="文件大小(字节)")
     records_imported = Column(Integer, comment="导入记录数")
+    records_skipped = Column(Integer, default=0, comment="跳过的无效记录数")
+    records_updated = Column(Integer, default=0, comment="增量合并更新的记录数")
+    records_unchanged = Column(Integer, default=0, comment="增量合并未变化的记录数")
+    chunks_processed = Column(Integer, default=0, comment="已提交分块数")
+    bytes_processed = Column(Integer, default=0, comment="已读取字节数")
+    content_hash = Column(String(64), index=True, nullable=True, comment="文件内容SHA-256")
     import_status = Column(String(50), comment="导入状态")
     error_message = Column(Text, nullable=True, comment="错误信息")
     imported_at = Column(DateTime, default=func.now(), comment="导入时间")
+    started_at = Column(DateTime, nullable=True, comment="开始处理时间")
+    finished_at = Column(DateTime, nullable=True, comment="结束处理时间")
     
     def __repr__(self):
         return f"<DataImportLog(id={self.id}, filename='{self.filename}', status='{self.import_status}')>" 
\ No newline at end of file
@@ -2,7 +2,7 @@
 销售数据Pydantic模式定义
 """
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import BaseModel, Field
 
 class SalesRecordBase(BaseModel):
@@ -72,5 +72,60 @@ class DataImportResponse(BaseModel):
     success: bool = Field(..., description="导入是否成功")
     filename: str = Field(..., description="文件名")
     records_imported: int = Field(..., description="导入记录数")
+    records_skipped: Optional[int] = Field(None, description="跳过的无效记录数")
+    records_inserted: Optional[int] = Field(None, description="新增记录数")
+    records_updated: Optional[int] = Field(None, description="按订单号更新的记录数（增量合并）")
+    records_unchanged: Optional[int] = Field(None, description="订单已存在且内容未变化的记录数（增量合并）")
+    chunks_processed: Optional[int] = Field(None, description="已提交分块数（流式导入）")
+    job_id: Optional[int] = Field(None, description="导入任务ID（对应导入日志ID）")
+    duplicate_of: Optional[int] = Field(None, description="内容相同的已成功导入任务ID（重复上传时跳过导入）")
+    member_results: Optional[List["DataImportResponse"]] = Field(None, description="压缩包中各CSV文件的导入结果")
     message: str = Field(..., description="响应消息")
-    errors: Optional[List[str]] = Field(None, description="错误信息列表") 
\ No newline at end of file
+    errors: Optional[List[str]] = Field(None, description="错误信息列表")
+
+class MultipartUploadCreate(BaseModel):
+    """创建分片上传会话请求模式"""
+    filename: str = Field(..., description="文件名")
+    total_size: Optional[int] = Field(None, ge=0, description="文件总大小(字节)，提供时完成前校验")
+
+class MultipartUploadStatus(BaseModel):
+    """分片上传会话模式"""
+    upload_id: str = Field(..., description="上传会话ID")
+    filename: str = Field(..., description="文件名")
+    total_size: Optional[int] = Field(None, description="声明的文件总大小(字节)")
+    part_size_limit: int = Field(..., description="单个分片大小上限(字节)")
+    max_parts: int = Field(..., description="分片数量上限")
+    parts: Dict[int, int] = Field(default_factory=dict, description="已收到的分片（编号 -> 字节数）")
+    received_bytes: int = Field(0, description="已收到字节数")
+
+class MultipartPartResponse(BaseModel):
+    """分片上传响应模式"""
+    part_number: int = Field(..., description="分片编号（从1开始）")
+    size: int = Field(..., description="分片字节数")
+    sha256: str = Field(..., description="分片 SHA-256")
+
+class MultipartUploadComplete(BaseModel):
+    """完成分片上传请求模式"""
+    parts: Optional[List[int]] = Field(None, description="分片编号列表，省略时使用已收到的全部分片")
+    force: bool = Field(False, description="内容与已导入文件相同时仍强制重新导入")
+    upsert: bool = Field(False, description="按订单号增量合并")
+
+class ImportJobStatus(BaseModel):
+    """后台导入任务状态模式"""
+    job_id: int = Field(..., description="任务ID")
+    filename: str = Field(..., description="文件名")
+    status: str = Field(..., description="任务状态（queued / processing / success / partial / failed）")
+    file_size: Optional[int] = Field(None, description="文件大小(字节)")
+    bytes_processed: int = Field(0, description="已读取字节数")
+    rows_processed: int = Field(0, description="已处理行数（导入 + 未变化 + 跳过）")
+    records_imported: int = Field(0, description="已导入记录数")
+    records_skipped: int = Field(0, description="跳过的无效记录数")
+    records_updated: int = Field(0, description="增量合并更新的记录数")
+    records_unchanged: int = Field(0, description="增量合并未变化的记录数")
+    chunks_processed: int = Field(0, description="已提交分块数")
+    progress: Optional[float] = Field(None, description="进度百分比（按字节估算）")
+    elapsed_seconds: Optional[float] = Field(None, description="已耗时(秒)")
+    rows_per_second: Optional[float] = Field(None, description="处理吞吐（行/秒）")
+    started_at: Optional[datetime] = Field(None, description="开始处理时间")
+    finished_at: Optional[datetime] = Field(None, description="结束处理时间")
+    error_message: Optional[str] = Field(None, description="错误信息")
@@ -0,0 +1,186 @@
+"""
+多维聚合查询（透视 / 数据立方体）
+
+按任意维度组合分组（区域、类别、产品、销售人员、支付方式，以及日/周/月/年时间粒度），计算
+sum/count/avg/min/max 指标，支持维度过滤、日期范围、排序和条数限制，可附带 ROLLUP / CUBE 式小计。
+整个请求编译为一条 SQL 语句：SQLite 不支持 GROUPING SETS，每个分组集合各是一个 SELECT，以 UNION ALL 合并；
+grouping 列为位掩码，与标准 SQL 的 GROUPING(维度1, 维度2, ...) 相同：某一位为 1 表示对应维度已被汇总，第一个维度为最高位。
+分组维度、过滤条件和指标都能在 (日期, 区域, 类别, 产品) 粒度上表达时读取汇总表 sales_daily_rollup，否则读取明细表；
+汇总表中表示空值的空字符串还原为 NULL，两种来源的结果一致。
+"""
+import re
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Float, cast, func, literal, null, select, union_all
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.sales import SalesRecord, SalesDailyRollup
+from app.services.data_processor import sales_filters
+from app.services.rollup import GRAIN, rollup_conditions
+
+DIMENSIONS = ["region", "category", "product_name", "sales_person", "payment_method"]
+# 时间粒度 -> 由 'YYYY-MM-DD' 日期表达式计算分组键
+TIME_BUCKETS = {
+    "day": lambda day: day,
+    "week": lambda day: func.strftime("%Y-W%W", day),
+    "month": lambda day: func.substr(day, 1, 7),
+    "year": lambda day: func.substr(day, 1, 4),
+}
+FIELDS = ["sales_amount", "quantity", "unit_price"]
+AGGREGATES = ["sum", "count", "avg", "min", "max"]
+SUBTOTALS = ["none", "rollup", "cube"]
+# 明细字段 -> 汇总表中的合计列（汇总表只能回答这些字段的 sum/avg 和记录数）
+ROLLUP_FIELDS = {"sales_amount": "total_sales", "quantity": "total_quantity"}
+
+_MEASURE = re.compile(r"^(\w+)(?:\((\w*|\*)\))?$")
+
+class InvalidAggregationError(ValueError):
+    """分组维度、指标、排序或小计方式无效"""
+
+def split_list(value: Optional[str]) -> List[str]:
+    """解析逗号分隔的参数"""
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+def parse_measure(measure: str) -> Tuple[str, Optional[str], str]:
+    """解析 sum(sales_amount)、count 形式的指标，返回 (聚合函数, 字段, 结果列名)"""
+    match = _MEASURE.match(measure.replace(" ", ""))
+    aggregate, field = (match.group(1).lower(), match.group(2) or None) if match else (None, None)
+    if field == "*":
+        field = None
+    if aggregate not in AGGREGATES:
+        raise InvalidAggregationError(f"不支持的指标: {measure}（聚合函数可选 {', '.join(AGGREGATES)}）")
+    if field is None and aggregate != "count":
+        raise InvalidAggregationError(f"指标 {measure} 需要指定字段，如 {aggregate}(sales_amount)")
+    if field is not None and field not in FIELDS:
+        raise InvalidAggregationError(f"不支持的指标字段: {field}（可选 {', '.join(FIELDS)}）")
+    return aggregate, field, aggregate if field is None else f"{aggregate}_{field}"
+
+def _rollup_measure(aggregate: str, field: Optional[str]):
+    """汇总表上的指标表达式，无法由汇总表回答时返回 None"""
+    count = func.sum(SalesDailyRollup.order_count)
+    if aggregate == "count" and field is None:
+        return count
+    if field not in ROLLUP_FIELDS or aggregate not in ("sum", "avg"):
+        return None
+    total = func.sum(getattr(SalesDailyRollup, ROLLUP_FIELDS[field]))
+    return total if aggregate == "sum" else cast(total, Float) / func.nullif(count, 0)
+
+def _detail_measure(aggregate: str, field: Optional[str]):
+    if field is None:
+        return func.count(SalesRecord.id)
+    return getattr(func, aggregate)(getattr(SalesRecord, field))
+
+def _sources(db: Session, group_by: List[str], measures: List[Tuple[str, Optional[str], str]],
+             start_date, end_date, filters: Dict[str, str]):
+    """返回 (来源名, 维度表达式, 指标表达式, 过滤条件)，能由汇总表回答时读取汇总表"""
+    if settings.SALES_ROLLUP and all(name in GRAIN or name in TIME_BUCKETS for name in group_by):
+        conditions = rollup_conditions(start_date, end_date, **filters)
+        rollup_measures = [_rollup_measure(aggregate, field) for aggregate, field, _ in measures]
+        if conditions is not None and all(expression is not None for expression in rollup_measures):
+            day = func.nullif(SalesDailyRollup.day, "")
+            dimensions = [
+                TIME_BUCKETS[name](day) if name in TIME_BUCKETS else func.nullif(getattr(SalesDailyRollup, name), "")
+                for name in group_by
+            ]
+            return "rollup", dimensions, rollup_measures, conditions
+    day = func.date(SalesRecord.sales_date)
+    dimensions = [
+        TIME_BUCKETS[name](day) if name in TIME_BUCKETS else getattr(SalesRecord, name) for name in group_by
+    ]
+    measure_expressions = [_detail_measure(aggregate, field) for aggregate, field, _ in measures]
+    return "detail", dimensions, measure_expressions, sales_filters(db, start_date, end_date, **filters)
+
+def _grouping_sets(count: int, subtotals: str) -> List[Tuple[int, ...]]:
+    """各分组集合保留的维度下标，按从细到粗排列"""
+    if subtotals == "rollup":
+        return [tuple(range(size)) for size in range(count, -1, -1)]
+    if subtotals == "cube":
+        return [kept for size in range(count, -1, -1) for kept in combinations(range(count), size)]
+    return [tuple(range(count))]
+
+def check_request(
+    group_by: List[str], measures: List[str], sort: Optional[List[str]], subtotals: str, filters: Dict[str, str]
+) -> Tuple[List[Tuple[str, Optional[str], str]], List[Tuple[str, bool]], Dict[str, str]]:
+    """校验聚合请求，返回 (解析后的指标, 排序 [(字段, 是否降序)], 非空的过滤条件)，无效时抛出 InvalidAggregationError"""
+    for name in group_by:
+        if name not in DIMENSIONS and name not in TIME_BUCKETS:
+            raise InvalidAggregationError(
+                f"不支持的分组维度: {name}（可选 {', '.join(DIMENSIONS + list(TIME_BUCKETS))}）"
+            )
+    if len(set(group_by)) != len(group_by):
+        raise InvalidAggregationError("分组维度不能重复")
+    if subtotals not in SUBTOTALS:
+        raise InvalidAggregationError(f"不支持的小计方式: {subtotals}（可选 {', '.join(SUBTOTALS)}）")
+    parsed = [parse_measure(measure) for measure in measures]
+    if not parsed:
+        raise InvalidAggregationError("至少需要一个指标")
+    labels = [label for _, _, label in parsed]
+    if len(set(labels)) != len(labels):
+        raise InvalidAggregationError("指标不能重复")
+    order = []
+    for key in sort or []:
+        name = key.lstrip("-")
+        if name not in group_by and name not in labels:
+            raise InvalidAggregationError(f"排序字段 {name} 不在分组维度或指标中")
+        order.append((name, key.startswith("-")))
+    for name in filters:
+        if name not in DIMENSIONS:
+            raise InvalidAggregationError(f"不支持的过滤维度: {name}")
+    return parsed, order, {name: value for name, value in filters.items() if value}
+
+def aggregate_sales(
+    db: Session,
+    group_by: List[str],
+    measures: List[str],
+    start_date=None,
+    end_date=None,
+    sort: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    subtotals: str = "none",
+    **filters
+) -> dict:
+    """按 group_by 分组计算 measures，返回 {source, dimensions, measures, rows}
+
+    filters 为维度名称上的等值过滤；sort 为维度名或指标结果列名，前缀 - 表示降序，默认按维度升序；
+    limit 限制每个分组集合的行数。subtotals 为 rollup 时按维度从右到左逐级小计，cube 时计算所有维度组合的小计，
+    两者都会在结果中加入 grouping 列，行按 grouping 从细到粗排列。
+    """
+    parsed, order, filters = check_request(group_by, measures, sort, subtotals, filters)
+    labels = [label for _, _, label in parsed]
+    source, dimensions, measure_expressions, conditions = _sources(
+        db, group_by, parsed, start_date, end_date, filters
+    )
+    grouping_sets = _grouping_sets(len(group_by), subtotals)
+    names = (["grouping"] if subtotals != "none" else []) + group_by + labels
+    statements = []
+    for kept in grouping_sets:
+        expressions = dict(zip(labels, measure_expressions))
+        expressions.update((group_by[index], dimensions[index]) for index in kept)
+        mask = sum(1 << (len(group_by) - 1 - index) for index in range(len(group_by)) if index not in kept)
+        columns = [literal(mask).label("grouping")] if subtotals != "none" else []
+        columns += [(dimensions[index] if index in kept else null()).label(name) for index, name in enumerate(group_by)]
+        columns += [expression.label(label) for label, expression in zip(labels, measure_expressions)]
+        ordering = [
+            expressions[name].desc() if descending else expressions[name].asc()
+            for name, descending in order if name in expressions
+        ] + [dimensions[index] for index in kept]
+        statement = select(*columns).where(*conditions).group_by(*[dimensions[index] for index in kept])
+        statements.append(statement.order_by(*ordering).limit(limit))
+
+    if len(statements) == 1:
+        statement = statements[0]
+    else:
+        # 各分组集合先各自排序、限制条数（SQLite 的 UNION ALL 分支不能直接带 ORDER BY / LIMIT，包一层子查询）
+        combined = union_all(*[select(*part.subquery().c) for part in statements]).subquery()
+        statement = select(*combined.c).order_by(
+            combined.c.grouping,
+            *[combined.c[name].desc() if descending else combined.c[name].asc() for name, descending in order],
+            *[combined.c[name] for name in group_by]
+        )
+    rows = db.execute(statement)
+    return {
+        "source": source,
+        "dimensions": group_by,
+        "measures": labels,
+        "rows": [dict(zip(names, row)) for row in rows],
+    }
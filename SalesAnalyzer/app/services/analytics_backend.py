@@ -0,0 +1,89 @@
+"""
+分析查询后端
+
+热销排行、合计、按日趋势和多维聚合由可替换的后端执行，由 settings.ANALYTICS_BACKEND 选择：
+- sql: SQLAlchemy 查询（汇总表或明细表，启用时先使用内存列式存储），见 data_processor 和 aggregation；
+- duckdb: 嵌入式列式引擎 DuckDB 查询 sales_records 的 Parquet 快照，见 duckdb_backend。
+
+两种后端返回相同格式的结果（结果行可按列名属性访问，聚合结果的 source 标明来源）。
+记录列表、分页和导出等按行读取的接口始终使用 SQLAlchemy。接口调用本模块的同名函数，由其按配置分派。
+"""
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.services import aggregation, data_processor
+
+ANALYTICS_BACKENDS = ["sql", "duckdb"]
+
+class AnalyticsBackend:
+    """分析查询后端接口，参数和结果格式与 data_processor / aggregation 中的同名函数相同"""
+
+    name = ""
+
+    def top_sales(self, db: Session, column: str, measures: List[str], limit: Optional[int], **filters):
+        raise NotImplementedError
+
+    def sales_totals(self, db: Session, **filters):
+        raise NotImplementedError
+
+    def daily_sales(self, db: Session, start_date=None, end_date=None):
+        raise NotImplementedError
+
+    def aggregate_sales(self, db: Session, group_by: List[str], measures: List[str], start_date=None, end_date=None,
+                        sort: Optional[List[str]] = None, limit: Optional[int] = None, subtotals: str = "none",
+                        **filters) -> dict:
+        raise NotImplementedError
+
+class SqlBackend(AnalyticsBackend):
+    """SQLAlchemy 查询"""
+
+    name = "sql"
+
+    def top_sales(self, db: Session, column: str, measures: List[str], limit: Optional[int], **filters):
+        return data_processor.top_sales(db, column, measures, limit, **filters)
+
+    def sales_totals(self, db: Session, **filters):
+        return data_processor.sales_totals(db, **filters)
+
+    def daily_sales(self, db: Session, start_date=None, end_date=None):
+        return data_processor.daily_sales(db, start_date, end_date)
+
+    def aggregate_sales(self, db: Session, group_by: List[str], measures: List[str], start_date=None, end_date=None,
+                        sort: Optional[List[str]] = None, limit: Optional[int] = None, subtotals: str = "none",
+                        **filters) -> dict:
+        return aggregation.aggregate_sales(
+            db, group_by, measures, start_date, end_date, sort, limit, subtotals, **filters
+        )
+
+sql_backend = SqlBackend()
+
+def get_backend() -> AnalyticsBackend:
+    """settings.ANALYTICS_BACKEND 对应的后端"""
+    if settings.ANALYTICS_BACKEND == "duckdb":
+        from app.services.duckdb_backend import duckdb_backend
+        return duckdb_backend
+    if settings.ANALYTICS_BACKEND != "sql":
+        raise ValueError(
+            f"不支持的分析后端: {settings.ANALYTICS_BACKEND}（可选 {', '.join(ANALYTICS_BACKENDS)}）"
+        )
+    return sql_backend
+
+def top_sales(db: Session, column: str, measures: List[str], limit: Optional[int], **filters):
+    """按维度汇总排行，见 data_processor.top_sales"""
+    return get_backend().top_sales(db, column, measures, limit, **filters)
+
+def sales_totals(db: Session, **filters):
+    """销售金额、数量和记录数合计，见 data_processor.sales_totals"""
+    return get_backend().sales_totals(db, **filters)
+
+def daily_sales(db: Session, start_date=None, end_date=None):
+    """按日汇总的销售金额和记录数，见 data_processor.daily_sales"""
+    return get_backend().daily_sales(db, start_date, end_date)
+
+def aggregate_sales(db: Session, group_by: List[str], measures: List[str], start_date=None, end_date=None,
+                    sort: Optional[List[str]] = None, limit: Optional[int] = None, subtotals: str = "none",
+                    **filters) -> dict:
+    """多维聚合查询，见 aggregation.aggregate_sales"""
+    return get_backend().aggregate_sales(
+        db, group_by, measures, start_date, end_date, sort, limit, subtotals, **filters
+    )
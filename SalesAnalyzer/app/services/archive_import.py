@@ -0,0 +1,75 @@
+"""
+压缩文件导入辅助
+
+.csv.gz / .csv.zst 在读取时流式解压，直接交给CSV分块导入，不在磁盘上展开；
+.zip 压缩包中的每个CSV成员单独流式解压导入。zstandard 为可选依赖。
+"""
+import io
+import gzip
+import zipfile
+from typing import BinaryIO, List
+
+COMPRESSED_CSV_EXTENSIONS = (".csv.gz", ".csv.zst")
+ARCHIVE_EXTENSIONS = (".zip",)
+
+class UnsupportedCompressionError(ValueError):
+    """压缩格式无法处理（如未安装对应的解压库）"""
+    pass
+
+def is_compressed_csv(filename: str) -> bool:
+    """是否为单个压缩的CSV文件"""
+    return filename.lower().endswith(COMPRESSED_CSV_EXTENSIONS)
+
+def is_zip_archive(filename: str) -> bool:
+    """是否为zip压缩包"""
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def check_decompression_support(filename: str) -> None:
+    """检查解压所需的库是否可用，不可用时抛出 UnsupportedCompressionError"""
+    if filename.lower().endswith(".zst"):
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            raise UnsupportedCompressionError("服务器未安装 zstandard，无法解压 .zst 文件")
+
+class DecompressedReader(io.RawIOBase):
+    """解压流包装：读取解压后的数据，tell() 返回已消耗的压缩字节数
+
+    进度按压缩文件大小计算，与上传文件大小一致。
+    """
+
+    def __init__(self, stream: BinaryIO, raw: BinaryIO):
+        super().__init__()
+        self._stream = stream
+        self._raw = raw
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        return self._stream.readinto(b)
+
+    def tell(self) -> int:
+        return self._raw.tell()
+
+    def close(self) -> None:
+        self._stream.close()
+        super().close()
+
+def open_decompressed(raw: BinaryIO, filename: str) -> DecompressedReader:
+    """按扩展名打开流式解压读取器"""
+    check_decompression_support(filename)
+    if filename.lower().endswith(".zst"):
+        import zstandard
+
+        return DecompressedReader(zstandard.ZstdDecompressor().stream_reader(raw), raw)
+    return DecompressedReader(gzip.GzipFile(fileobj=raw, mode="rb"), raw)
+
+def list_csv_members(archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    """压缩包中的CSV成员（忽略目录和 macOS 附带的元数据文件）"""
+    return [
+        info for info in archive.infolist()
+        if not info.is_dir()
+        and info.filename.lower().endswith(".csv")
+        and not info.filename.startswith("__MACOSX/")
+    ]
@@ -0,0 +1,82 @@
+"""
+大批量导入模式
+
+初始导入或回填大量数据时，每插入一行都要同时维护 sales_records 上的全部二级索引。
+bulk_load 在独立连接上暂时删除这些索引、放宽同步策略，数据按大分块写入后一次性重建索引并执行 ANALYZE。
+
+进程中途退出时的安全性：
+- 日志模式保持不变（不使用 journal_mode=OFF/MEMORY），每个分块仍是完整的事务，已提交的分块不会损坏；
+- synchronous=OFF 只在操作系统崩溃或断电时可能丢失最近提交的数据，进程被杀不受影响；
+- PRAGMA 只作用于该连接，连接关闭即失效；
+- 被删除的索引都由模型声明，下次启动（或运行 init_db.py）时 upgrade_database 会自动重建。
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List
+from sqlalchemy import Index, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import index_names
+from app.models.sales import SalesRecord
+
+logger = logging.getLogger(__name__)
+
+# 导入期间放宽的连接级PRAGMA，退出时恢复原值
+BULK_LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+}
+
+def suspendable_indexes(keep: Iterable[str] = ()) -> List[Index]:
+    """sales_records 上可暂时删除的二级索引：模型声明的非唯一索引，不含涉及 keep 中列的索引"""
+    keep = set(keep)
+    return [
+        index for index in sorted(SalesRecord.__table__.indexes, key=lambda index: index.name)
+        if not index.unique and not keep.intersection(column.name for column in index.columns)
+    ]
+
+def rebuild_indexes(connection: Connection, indexes: Iterable[Index]) -> None:
+    """重建索引并更新查询规划器统计信息"""
+    existing = index_names(connection, SalesRecord.__tablename__)
+    for index in indexes:
+        if index.name not in existing:
+            index.create(bind=connection)
+    connection.execute(text(f"ANALYZE {SalesRecord.__tablename__}"))
+
+@contextmanager
+def bulk_load(bind: Engine, keep: Iterable[str] = ()) -> Iterator[Session]:
+    """大批量导入上下文，返回绑定到独立连接的会话
+
+    进入时删除 suspendable_indexes(keep) 并设置 BULK_LOAD_PRAGMAS，退出时（包括导入失败）
+    重建索引、执行 ANALYZE 并恢复PRAGMA。keep 为导入过程中仍需按其查询的列，
+    如按 order_id 增量合并时保留 order_id 索引。
+    导入期间其他连接对 sales_records 的过滤查询会退化为全表扫描，适合初始导入和离线回填。
+    """
+    indexes = suspendable_indexes(keep)
+    # cache_size 为负数时单位是KiB
+    pragmas = dict(BULK_LOAD_PRAGMAS, cache_size=-(settings.BULK_LOAD_CACHE_SIZE // 1024))
+    with bind.connect() as connection:
+        original = {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in pragmas}
+        for name, value in pragmas.items():
+            connection.exec_driver_sql(f"PRAGMA {name} = {value}")
+        try:
+            for index in indexes:
+                connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+            connection.commit()
+            logger.info(f"大批量导入：已暂停 {len(indexes)} 个索引")
+
+            session = Session(bind=connection, autoflush=False)
+            try:
+                yield session
+            finally:
+                session.close()
+        finally:
+            connection.rollback()
+            started = time.perf_counter()
+            rebuild_indexes(connection, indexes)
+            connection.commit()
+            logger.info(f"大批量导入：已重建 {len(indexes)} 个索引，耗时 {time.perf_counter() - started:.1f} 秒")
+            for name, value in original.items():
+                connection.exec_driver_sql(f"PRAGMA {name} = {value}")
@@ -0,0 +1,366 @@
+"""
+内存列式分析存储
+
+settings.COLUMN_STORE 开启时，进程内以 NumPy 数组保存 sales_records 的分析列：区域/类别/产品为字典编码的 int32，
+销售日期为 int32 天数（1970-01-01 起），销售金额和数量为 float64，每行 32 字节。热销排行、合计和按日趋势
+（top_sales / sales_totals / daily_sales）由 bincount 分组、argpartition 取前 N 条，不访问数据库。
+
+启动时在后台线程全量加载，只新增记录的导入提交后追加新记录，其他数据变化触发全量重新加载（见 app/services/replica.py）。
+查询时先比较存储与数据库的数据版本，版本不同（尚未加载、正在追加或重新加载）时返回 None，调用方改为查询数据库，
+因此结果始终与当前已提交的数据一致。过滤条件只支持能在汇总粒度上表达的条件（见 rollup_conditions）。
+容量超过 settings.COLUMN_STORE_MAX_MB 时停用存储（释放数组），直到进程重启。
+"""
+import functools
+import logging
+import threading
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.sales import SalesRecord
+from app.services.replica import Replica, read_since
+from app.services.rollup import GRAIN, rollup_conditions
+
+logger = logging.getLogger(__name__)
+
+NULL_DAY = np.iinfo(np.int32).min
+# 指标名 -> 度量列（order_count 为记录数）
+MEASURE_FIELDS = {"total_sales": "sales_amount", "total_quantity": "quantity"}
+ROW_BYTES = 4 * len(GRAIN) + 4 + 8 * len(MEASURE_FIELDS)
+LOAD_BATCH_SIZE = 100000
+# 加载的列：结果列名 -> sales_records 上的表达式
+LOAD_COLUMNS = {
+    "day": func.date(SalesRecord.sales_date),
+    **{name: getattr(SalesRecord, name) for name in GRAIN + list(MEASURE_FIELDS.values())},
+}
+
+class MemoryBudgetExceeded(Exception):
+    """存储容量超过 settings.COLUMN_STORE_MAX_MB"""
+
+@functools.lru_cache(maxsize=None)
+def row_type(*fields: str):
+    """与查询结果行一样可按属性名访问的结果行类型"""
+    return namedtuple("Row", fields)
+
+def _measure_value(name: str, value: float):
+    return float(value) if name == "total_sales" else int(round(value))
+
+def _day_number(value: str) -> int:
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+class Snapshot:
+    """某一数据版本的只读视图，查询方法在过滤条件无法表达时返回 None"""
+
+    def __init__(self, bind, version: int, size: int, codes: Dict[str, np.ndarray], values: Dict[str, tuple],
+                 days: np.ndarray, measures: Dict[str, np.ndarray]):
+        self.bind = bind
+        self.version = version
+        self.size = size
+        self.codes = codes
+        self.values = values
+        self.lookup = {name: {value: code for code, value in enumerate(values[name])} for name in values}
+        self.days = days
+        self.measures = measures
+        # 不带过滤条件的分组结果按维度缓存，快照只读，重复查询不再扫描
+        self._grouped: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def _rows(self, start_date=None, end_date=None, **dimensions):
+        """满足过滤条件的行号数组（不过滤时为 True），无法表达时返回 None"""
+        if rollup_conditions(start_date, end_date, **dimensions) is None:
+            return None
+        mask = True
+        if start_date:
+            mask = self.days >= _day_number(start_date)
+        if end_date:
+            mask = mask & (self.days < _day_number(end_date)) & (self.days != NULL_DAY)
+        for name, value in dimensions.items():
+            if not value:
+                continue
+            code = self.lookup[name].get(value)
+            mask = mask & (self.codes[name] == code) if code is not None else np.zeros(self.size, dtype=bool)
+        return True if mask is True else np.flatnonzero(mask)
+
+    def _column(self, array: np.ndarray, rows) -> np.ndarray:
+        return array if rows is True else array.take(rows)
+
+    def _group(self, column: str, rows) -> Dict[str, np.ndarray]:
+        """按维度编码分组的各项指标合计"""
+        keys = self._column(self.codes[column], rows)
+        size = len(self.values[column])
+        sums = {"order_count": np.bincount(keys, minlength=size)}
+        for name, field in MEASURE_FIELDS.items():
+            sums[name] = np.bincount(keys, weights=self._column(self.measures[field], rows), minlength=size)
+        return sums
+
+    def top_sales(self, column: str, measures: List[str], limit: Optional[int], **filters):
+        if column not in self.codes:
+            return None
+        rows = self._rows(**filters)
+        if rows is None:
+            return None
+        values = self.values[column]
+        if rows is True:
+            sums = self._grouped.get(column)
+            if sums is None:
+                sums = self._grouped[column] = self._group(column, rows)
+        else:
+            sums = self._group(column, rows)
+        groups = np.flatnonzero(sums["order_count"])
+        ranking = sums[measures[0]][groups]
+        if limit is not None and limit < len(groups):
+            if limit <= 0:
+                return []
+            top = np.argpartition(-ranking, limit - 1)[:limit]
+            groups, ranking = groups[top], ranking[top]
+        groups = groups[np.argsort(-ranking, kind="stable")]
+        row = row_type(column, *measures)
+        return [
+            row(values[code], *[_measure_value(name, sums[name][code]) for name in measures]) for code in groups
+        ]
+
+    def sales_totals(self, **filters):
+        rows = self._rows(**filters)
+        if rows is None:
+            return None
+        count = self.size if rows is True else len(rows)
+        row = row_type("total_sales", "total_quantity", "order_count")
+        if not count:
+            return row(None, None, 0)
+        return row(
+            float(self._column(self.measures["sales_amount"], rows).sum()),
+            int(round(self._column(self.measures["quantity"], rows).sum())),
+            count
+        )
+
+    @functools.cached_property
+    def _daily(self) -> Tuple[int, np.ndarray, np.ndarray, int, float]:
+        """全部记录的按日直方图 (首日, 各日记录数, 各日金额, 无日期记录数, 无日期金额)，每个快照只计算一次"""
+        amounts = self.measures["sales_amount"]
+        dated = self.days != NULL_DAY
+        undated_count = self.size - int(np.count_nonzero(dated))
+        undated_total = float(amounts[~dated].sum()) if undated_count else 0.0
+        if undated_count:
+            days, amounts = self.days[dated], amounts[dated]
+        else:
+            days = self.days
+        if not days.size:
+            return 0, np.zeros(0, dtype=np.int64), np.zeros(0), undated_count, undated_total
+        first = int(days.min())
+        offsets = days - first
+        return first, np.bincount(offsets), np.bincount(offsets, weights=amounts), undated_count, undated_total
+
+    def daily_sales(self, start_date=None, end_date=None):
+        """按日趋势只有日期过滤，从快照的按日直方图中截取日期范围"""
+        if rollup_conditions(start_date, end_date) is None:
+            return None
+        first, counts, totals, undated_count, undated_total = self._daily
+        row = row_type("date", "total_sales", "order_count")
+        rows = []
+        if undated_count and not start_date and not end_date:
+            # 与 SQL 相同，没有销售日期的记录排在最前
+            rows.append(row(None, undated_total, undated_count))
+        low = max(_day_number(start_date) - first, 0) if start_date else 0
+        high = min(_day_number(end_date) - first, len(counts)) if end_date else len(counts)
+        for offset in np.flatnonzero(counts[low:max(high, low)]) + low:
+            day = str(np.datetime64(first + int(offset), "D"))
+            rows.append(row(day, float(totals[offset]), int(counts[offset])))
+        return rows
+
+class _Columns:
+    """可追加的列数组，容量按倍数增长；追加只写入已发布快照范围之外的位置，快照不受影响"""
+
+    def __init__(self, bind, max_bytes: int):
+        self.bind = bind
+        self.max_bytes = max_bytes
+        self.version = 0
+        self.max_id = 0
+        self.size = 0
+        self.capacity = 0
+        self.codes = {name: np.empty(0, dtype=np.int32) for name in GRAIN}
+        self.values = {name: [None] for name in GRAIN}
+        self.lookup = {name: {None: 0} for name in GRAIN}
+        self.days = np.empty(0, dtype=np.int32)
+        self.measures = {field: np.empty(0, dtype=np.float64) for field in MEASURE_FIELDS.values()}
+
+    def nbytes(self, capacity: Optional[int] = None) -> int:
+        """数组容量加字典的估算占用"""
+        entries = sum(len(values) for values in self.values.values())
+        return (self.capacity if capacity is None else capacity) * ROW_BYTES + entries * 100
+
+    def _reserve(self, rows: int) -> None:
+        needed = self.size + rows
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, self.capacity * 2, 1024)
+        if self.nbytes(capacity) > self.max_bytes:
+            capacity = needed
+        if self.nbytes(capacity) > self.max_bytes:
+            raise MemoryBudgetExceeded(
+                f"列式存储需要约 {self.nbytes(capacity) / 1024 / 1024:.0f}MB，超过上限 {settings.COLUMN_STORE_MAX_MB}MB"
+            )
+
+        def grow(array: np.ndarray) -> np.ndarray:
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            return grown
+
+        self.codes = {name: grow(array) for name, array in self.codes.items()}
+        self.days = grow(self.days)
+        self.measures = {name: grow(array) for name, array in self.measures.items()}
+        self.capacity = capacity
+
+    def _encode(self, name: str, column: pd.Series) -> np.ndarray:
+        """字典编码，空值编码为 0"""
+        codes, uniques = pd.factorize(column, use_na_sentinel=True)
+        lookup, values = self.lookup[name], self.values[name]
+        mapping = np.empty(len(uniques) + 1, dtype=np.int32)
+        for index, value in enumerate(uniques):
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(values)
+                values.append(value)
+            mapping[index] = code
+        mapping[-1] = 0
+        return mapping[codes]
+
+    def append(self, frame: pd.DataFrame) -> None:
+        """追加一批记录（id 列和 LOAD_COLUMNS 中的各列）"""
+        rows = len(frame)
+        if not rows:
+            return
+        self._reserve(rows)
+        end = self.size + rows
+        for name in GRAIN:
+            self.codes[name][self.size:end] = self._encode(name, frame[name])
+        days = pd.to_datetime(frame["day"], format="%Y-%m-%d", errors="coerce").to_numpy("datetime64[D]")
+        self.days[self.size:end] = np.where(np.isnat(days), NULL_DAY, days.astype(np.int64))
+        for field, array in self.measures.items():
+            array[self.size:end] = pd.to_numeric(frame[field]).fillna(0).to_numpy(np.float64)
+        self.size = end
+        self.max_id = max(self.max_id, int(frame["id"].max()))
+
+    def snapshot(self) -> Snapshot:
+        return Snapshot(
+            self.bind, self.version, self.size,
+            {name: array[:self.size] for name, array in self.codes.items()},
+            {name: tuple(values) for name, values in self.values.items()},
+            self.days[:self.size],
+            {name: array[:self.size] for name, array in self.measures.items()}
+        )
+
+class ColumnStore(Replica):
+    """进程内的列式存储：后台线程负责加载和追加，查询只读取已发布的快照"""
+
+    name = "column-store"
+
+    def __init__(self):
+        super().__init__()
+        self._snapshot: Optional[Snapshot] = None
+        self._columns: Optional[_Columns] = None
+        self._write_lock = threading.Lock()
+        self.over_budget: Optional[str] = None
+
+    def enabled(self) -> bool:
+        return settings.COLUMN_STORE and not self.over_budget
+
+    def load(self, bind) -> int:
+        """全量加载 bind 中的销售记录，返回行数；超过容量上限时停用存储并返回 0"""
+        with self._write_lock:
+            return self._load(bind)
+
+    def _load(self, bind) -> int:
+        columns = _Columns(bind, settings.COLUMN_STORE_MAX_MB * 1024 * 1024)
+        try:
+            for version, frame in read_since(bind, 0, LOAD_COLUMNS, LOAD_BATCH_SIZE):
+                columns.version = version
+                columns.append(frame)
+        except MemoryBudgetExceeded as e:
+            self._disable(e)
+            return 0
+        self._publish(columns)
+        logger.info(f"列式存储已加载 {columns.size} 条记录（数据版本 {columns.version}）")
+        return columns.size
+
+    def refresh(self, bind) -> int:
+        """自上次加载后只有登记过的新增分块时追加新记录，否则全量重新加载；返回存储行数"""
+        with self._write_lock:
+            columns = self._columns
+            if columns is None or columns.bind is not bind:
+                return self._load(bind)
+            batches = read_since(bind, columns.max_id, LOAD_COLUMNS, LOAD_BATCH_SIZE)
+            try:
+                version, frame = next(batches)
+                if version == columns.version:
+                    return columns.size
+                if not self.insert_only(columns.version, version):
+                    batches.close()
+                    return self._load(bind)
+                columns.version = version
+                columns.append(frame)
+                for _, frame in batches:
+                    columns.append(frame)
+            except MemoryBudgetExceeded as e:
+                self._disable(e)
+                return 0
+            self._publish(columns)
+            return columns.size
+
+    def _disable(self, error: MemoryBudgetExceeded) -> None:
+        logger.warning(f"停用列式存储: {str(error)}")
+        self.over_budget = str(error)
+        self._columns = self._snapshot = None
+
+    def _publish(self, columns: _Columns) -> None:
+        self._columns = columns
+        self._snapshot = columns.snapshot()
+        self.forget_appended(columns.version)
+
+    def snapshot(self, db: Session) -> Optional[Snapshot]:
+        """与数据库当前数据版本一致的快照；停用、尚未加载或已过期时返回 None，过期时安排后台刷新"""
+        if not self.enabled():
+            return None
+        snapshot = self._snapshot
+        if snapshot is not None and self.is_current(db, snapshot.bind, snapshot.version):
+            return snapshot
+        if snapshot is None:
+            self.schedule_refresh(db.get_bind())
+        return None
+
+    def top_sales(self, db: Session, column: str, measures: List[str], limit: Optional[int], **filters):
+        snapshot = self.snapshot(db)
+        return None if snapshot is None else snapshot.top_sales(column, measures, limit, **filters)
+
+    def sales_totals(self, db: Session, **filters):
+        snapshot = self.snapshot(db)
+        return None if snapshot is None else snapshot.sales_totals(**filters)
+
+    def daily_sales(self, db: Session, start_date=None, end_date=None):
+        snapshot = self.snapshot(db)
+        return None if snapshot is None else snapshot.daily_sales(start_date, end_date)
+
+    def clear(self) -> None:
+        """丢弃已加载的数据并恢复启用（用于测试和切换数据库）"""
+        self.reset()
+        with self._write_lock:
+            self._columns = self._snapshot = None
+            self.over_budget = None
+
+    def stats(self) -> dict:
+        columns = self._columns
+        if not settings.COLUMN_STORE:
+            state = "disabled"
+        elif self.over_budget:
+            state = "over_budget"
+        else:
+            state = "ready" if columns is not None else "cold"
+        return {
+            "state": state,
+            "rows": columns.size if columns is not None else 0,
+            "data_version": columns.version if columns is not None else None,
+            "memory_mb": round(columns.nbytes() / 1024 / 1024, 1) if columns is not None else 0,
+        }
+
+column_store = ColumnStore()
@@ -0,0 +1,45 @@
+"""
+仪表盘数据
+
+仪表盘原来分别请求 KPI 合计、销售趋势和类别统计，各自执行查询。这里只执行两次查询：
+- 按类别分组汇总（汇总表或 ix_sales_records_category_cover），KPI 合计由各类别相加得到，不再单独扫描一遍；
+- 最近 days 天的按日汇总（汇总表主键区间或 ix_sales_records_sales_day_cover 区间），只读取该日期范围。
+没有按 (日期, 类别) 排序的索引，合并为一次分组查询需要对全部明细排序，反而更慢。
+"""
+from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.services.analytics_backend import daily_sales, top_sales
+from app.services.rollup import MEASURES
+
+def dashboard_summary(db: Session, days: int = 30, today: Optional[date] = None) -> dict:
+    """KPI 合计（stats）、最近 days 天的每日趋势（trend）和类别统计（categories，按销售金额降序）
+
+    格式与 /sales/stats、/sales/trend、/sales/category-stats 相同；趋势按日粒度，包含开始当天和 today 当天。
+    """
+    today = today or date.today()
+    categories = top_sales(db, "category", MEASURES, None)
+    trend = daily_sales(db, (today - timedelta(days=days)).isoformat(), (today + timedelta(days=1)).isoformat())
+    totals = {name: sum(getattr(row, name) or 0 for row in categories) for name in MEASURES}
+    total_orders = totals["order_count"]
+    return {
+        "stats": {
+            "total_sales": float(totals["total_sales"]),
+            "total_orders": int(total_orders),
+            "total_quantity": int(totals["total_quantity"]),
+            "avg_order_value": float(totals["total_sales"] / total_orders if total_orders > 0 else 0)
+        },
+        "trend": [
+            {"date": str(row.date), "sales": float(row.total_sales), "orders": int(row.order_count)}
+            for row in trend
+        ],
+        "categories": [
+            {
+                "category": row.category,
+                "total_sales": float(row.total_sales),
+                "total_orders": int(row.order_count),
+                "total_quantity": int(row.total_quantity)
+            }
+            for row in categories
+        ]
+    }
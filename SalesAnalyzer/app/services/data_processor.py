@@ -1,27 +1,425 @@
 """
 数据处理服务
 """
+import os
+import itertools
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator, Callable, BinaryIO, Union
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models.sales import SalesRecord, DataImportLog
+from sqlalchemy import func, and_, not_, exists, select, literal_column, MetaData, Table, Column, Index
+from app.models.sales import SalesRecord, SalesDailyRollup, DataImportLog
 from app.schemas.sales import SalesRecordCreate, DataImportResponse
 from app.core.config import settings
+from app.services.column_store import column_store
+from app.services.dimensions import DIMENSION_KEY_COLUMNS, add_dimension_keys, dimension_filter, top_by_dimension
+from app.services.replica import note_append
+from app.services.response_cache import bump_data_version
+from app.services.rollup import (
+    MEASURE_EXPRESSIONS, merge_columns, merge_delta, remove_empty, rollup_conditions, rollup_delta
+)
+from app.utils.helpers import generate_file_hash
+from app.utils.streams import HashingReader
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 销售记录各列按目标类型分组，供向量化转换使用
+STRING_COLUMNS = [
+    'order_id', 'product_name', 'category', 'customer_name',
+    'region', 'sales_person', 'payment_method'
+]
+FLOAT_COLUMNS = ['sales_amount', 'unit_price']
+SALES_COLUMNS = STRING_COLUMNS + FLOAT_COLUMNS + ['quantity', 'sales_date']
+
+# 增量合并（upsert）用的临时暂存表，TEMPORARY 表只对当前数据库连接可见
+_staging_metadata = MetaData()
+SALES_STAGING = Table(
+    "sales_records_staging",
+    _staging_metadata,
+    *[Column(name, SalesRecord.__table__.c[name].type) for name in SALES_COLUMNS + DIMENSION_KEY_COLUMNS],
+    Index("ix_sales_records_staging_order_id", "order_id"),
+    prefixes=["TEMPORARY"]
+)
+
+def clean_sales_data(df: pd.DataFrame) -> pd.DataFrame:
+    """数据清洗"""
+    # 删除重复行
+    df = df.drop_duplicates()
+    
+    # 删除空值行
+    df = df.dropna()
+    
+    # 标准化列名
+    df.columns = df.columns.str.strip().str.lower()
+    
+    # 数据类型转换
+    if 'sales_amount' in df.columns:
+        df['sales_amount'] = pd.to_numeric(df['sales_amount'], errors='coerce')
+    
+    if 'quantity' in df.columns:
+        df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
+    
+    if 'unit_price' in df.columns:
+        df['unit_price'] = pd.to_numeric(df['unit_price'], errors='coerce')
+    
+    if 'sales_date' in df.columns:
+        df['sales_date'] = pd.to_datetime(df['sales_date'], errors='coerce')
+    
+    # 删除无效数据（无法解析的数值/日期以及无穷大）
+    numeric_columns = [c for c in FLOAT_COLUMNS + ['quantity'] if c in df.columns]
+    if numeric_columns:
+        df[numeric_columns] = df[numeric_columns].replace([np.inf, -np.inf], np.nan)
+    df = df.dropna()
+    
+    if 'quantity' in df.columns:
+        df['quantity'] = df['quantity'].astype(int)
+    
+    return df
+
+def to_sales_columns(df: pd.DataFrame) -> Dict[str, list]:
+    """将清洗后的DataFrame按列向量化转换为Python值列表
+
+    缺失的列按原有默认值补齐，不再逐行构造ORM对象。
+    """
+    rows = len(df)
+    columns = {}
+    
+    for column in STRING_COLUMNS:
+        columns[column] = df[column].astype(str).tolist() if column in df.columns else [''] * rows
+    
+    for column in FLOAT_COLUMNS:
+        columns[column] = df[column].astype(float).tolist() if column in df.columns else [0.0] * rows
+    
+    columns['quantity'] = df['quantity'].astype(int).tolist() if 'quantity' in df.columns else [0] * rows
+    
+    if 'sales_date' in df.columns:
+        columns['sales_date'] = df['sales_date'].astype(object).tolist()
+    else:
+        columns['sales_date'] = [datetime.now()] * rows
+    
+    return columns
+
+def sales_date_range(column, start_date=None, end_date=None) -> list:
+    """按销售日期过滤的条件列表
+
+    除 sales_date 比较外再加上与之等价的 date(sales_date) 范围条件：表达式索引
+    ix_sales_records_sales_day_cover 只匹配相同的表达式，这样日期过滤和按日分组可以共用一个索引区间。
+    """
+    conditions = []
+    if start_date:
+        conditions += [column >= start_date, func.date(column) >= func.date(start_date)]
+    if end_date:
+        conditions += [column <= end_date, func.date(column) <= func.date(end_date)]
+    return conditions
+
+def sales_filters(db: Session, start_date=None, end_date=None, **dimensions) -> list:
+    """明细表上的过滤条件：销售日期范围和维度名称（空值表示不过滤）"""
+    return sales_date_range(SalesRecord.sales_date, start_date, end_date) + [
+        dimension_filter(db, column, value) for column, value in dimensions.items() if value
+    ]
+
+def _rollup_filters(**filters) -> Optional[list]:
+    """启用汇总表且过滤条件可在汇总粒度上表达时返回汇总表条件，否则返回 None"""
+    return rollup_conditions(**filters) if settings.SALES_ROLLUP else None
+
+def top_sales(db: Session, column: str, measures: List[str], limit: Optional[int], **filters):
+    """按维度汇总排行，measures 为 MEASURE_EXPRESSIONS 中的指标名，按第一个指标降序取前 limit 条
+
+    filters 为 start_date/end_date 和区域/类别/产品名称，能在汇总粒度上表达时读取汇总表。
+    启用列式存储且数据已加载时在内存中计算（三个查询函数相同）。
+    """
+    rows = column_store.top_sales(db, column, measures, limit, **filters)
+    if rows is not None:
+        return rows
+    conditions = _rollup_filters(**filters)
+    if conditions is None:
+        return top_by_dimension(
+            db, column, {name: MEASURE_EXPRESSIONS[name][0] for name in measures}, limit,
+            sales_filters(db, **filters)
+        )
+    group = getattr(SalesDailyRollup, column)
+    return db.query(group, *[MEASURE_EXPRESSIONS[name][1].label(name) for name in measures])\
+        .filter(*conditions)\
+        .group_by(group)\
+        .order_by(MEASURE_EXPRESSIONS[measures[0]][1].desc())\
+        .limit(limit).all()
+
+def sales_totals(db: Session, **filters):
+    """销售金额、数量和记录数合计（total_sales, total_quantity, order_count），无数据时各项可能为 None"""
+    totals = column_store.sales_totals(db, **filters)
+    if totals is not None:
+        return totals
+    conditions = _rollup_filters(**filters)
+    if conditions is None:
+        return db.query(*[expressions[0].label(name) for name, expressions in MEASURE_EXPRESSIONS.items()])\
+            .filter(*sales_filters(db, **filters)).one()
+    return db.query(*[expressions[1].label(name) for name, expressions in MEASURE_EXPRESSIONS.items()])\
+        .filter(*conditions).one()
+
+def daily_sales(db: Session, start_date=None, end_date=None):
+    """按日汇总的销售金额和记录数（date, total_sales, order_count），按日期升序"""
+    rows = column_store.daily_sales(db, start_date, end_date)
+    if rows is not None:
+        return rows
+    conditions = _rollup_filters(start_date=start_date, end_date=end_date)
+    if conditions is None:
+        day = func.date(SalesRecord.sales_date)
+        return db.query(
+            day.label('date'),
+            MEASURE_EXPRESSIONS['total_sales'][0].label('total_sales'),
+            MEASURE_EXPRESSIONS['order_count'][0].label('order_count')
+        ).filter(*sales_date_range(SalesRecord.sales_date, start_date, end_date))\
+         .group_by(day).order_by(day).all()
+    return db.query(
+        SalesDailyRollup.day.label('date'),
+        MEASURE_EXPRESSIONS['total_sales'][1].label('total_sales'),
+        MEASURE_EXPRESSIONS['order_count'][1].label('order_count')
+    ).filter(*conditions).group_by(SalesDailyRollup.day).order_by(SalesDailyRollup.day).all()
+
 class DataProcessor:
     """数据处理服务类"""
     
     def __init__(self, db: Session):
         self.db = db
     
-    def process_csv_file(self, file_path: str, filename: str) -> DataImportResponse:
-        """处理CSV文件并导入数据库"""
+    def process_file(
+        self,
+        file_path: Union[str, BinaryIO],
+        filename: str,
+        streaming: bool = False,
+        import_log_id: Optional[int] = None,
+        parallel: bool = False,
+        force: bool = False,
+        content_hash: Optional[str] = None,
+        upsert: bool = False,
+        bulk_load: bool = False
+    ) -> DataImportResponse:
+        """按文件扩展名选择导入方式（Excel工作簿、压缩CSV、zip压缩包或CSV），参数含义同 process_csv_file"""
+        from app.services.excel_import import is_excel_file
+        from app.services.archive_import import is_compressed_csv, is_zip_archive
+
+        if is_zip_archive(filename):
+            return self.process_zip_file(
+                file_path, filename, import_log_id=import_log_id, force=force, upsert=upsert
+            )
+        if is_compressed_csv(filename):
+            return self.process_compressed_csv(
+                file_path, filename, import_log_id=import_log_id, force=force,
+                content_hash=content_hash, upsert=upsert
+            )
+        if is_excel_file(filename):
+            return self.process_excel_file(
+                file_path, filename, import_log_id=import_log_id, force=force,
+                content_hash=content_hash, upsert=upsert
+            )
+        return self.process_csv_file(
+            file_path, filename, streaming=streaming, import_log_id=import_log_id, parallel=parallel,
+            force=force, content_hash=content_hash, upsert=upsert, bulk_load=bulk_load
+        )
+    
+    def process_compressed_csv(
+        self,
+        file_path: Union[str, BinaryIO],
+        filename: str,
+        import_log_id: Optional[int] = None,
+        force: bool = False,
+        content_hash: Optional[str] = None,
+        upsert: bool = False
+    ) -> DataImportResponse:
+        """流式解压 .csv.gz / .csv.zst 并分块导入，解压数据不落盘
+
+        重复检查使用压缩文件本身的内容哈希；进度按已读取的压缩字节数计算。
+        """
+        from app.services.archive_import import open_decompressed
+
+        content_hash = content_hash or generate_file_hash(file_path, "sha256")
+        if not force:
+            duplicate = self.find_duplicate_import(content_hash)
+            if duplicate is not None:
+                return self.duplicate_response(filename, duplicate)
+
+        raw = open(file_path, "rb") if isinstance(file_path, str) else file_path
+        try:
+            file_size = raw.seek(0, os.SEEK_END)
+            raw.seek(0)
+            with open_decompressed(raw, filename) as stream:
+                return self.process_csv_stream(
+                    stream, filename, file_size, import_log_id=import_log_id,
+                    force=True, content_hash=content_hash, upsert=upsert
+                )
+        finally:
+            if raw is not file_path:
+                raw.close()
+
+    def process_zip_file(
+        self,
+        file_path: Union[str, BinaryIO],
+        filename: str,
+        import_log_id: Optional[int] = None,
+        force: bool = False,
+        upsert: bool = False,
+        workers: Optional[int] = None
+    ) -> DataImportResponse:
+        """并发导入zip压缩包中的每个CSV成员
+
+        每个成员流式解压、单独去重，并在独立的数据库会话中导入，各自生成一条导入日志。
+        import_log_id 指向代表整个压缩包的后台任务日志，结束时汇总各成员的结果。
+        """
+        import zipfile
+        from concurrent.futures import ThreadPoolExecutor
+        from sqlalchemy.orm import sessionmaker
+        from app.services.archive_import import list_csv_members
+
+        session_factory = sessionmaker(bind=self.db.get_bind(), autocommit=False, autoflush=False)
+
+        def import_member(archive: zipfile.ZipFile, member: zipfile.ZipInfo) -> DataImportResponse:
+            member_name = f"{filename}/{member.filename}"
+            db = session_factory()
+            try:
+                with archive.open(member) as stream:
+                    return DataProcessor(db).process_csv_stream(
+                        stream, member_name, member.file_size, force=force, upsert=upsert
+                    )
+            except Exception as e:
+                # 成员无法打开（如损坏、加密）时只影响该成员
+                logger.error(f"压缩包成员 {member_name} 导入失败: {str(e)}")
+                return DataImportResponse(
+                    success=False, filename=member_name, records_imported=0,
+                    message=f"导入失败: {str(e)}", errors=[str(e)]
+                )
+            finally:
+                db.close()
+
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                members = list_csv_members(archive)
+                if not members:
+                    raise ValueError("压缩包中没有CSV文件")
+                max_workers = min(len(members), workers or settings.ARCHIVE_IMPORT_WORKERS)
+                with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="zip-member") as executor:
+                    results = list(executor.map(lambda member: import_member(archive, member), members))
+        except Exception as e:
+            logger.error(f"处理压缩包 {filename} 时发生错误: {str(e)}")
+            results = None
+            error = str(e)
+
+        if results is None:
+            response = DataImportResponse(
+                success=False, filename=filename, records_imported=0,
+                message=f"导入失败: {error}", errors=[error]
+            )
+        else:
+            succeeded = [result for result in results if result.success]
+            response = DataImportResponse(
+                success=len(succeeded) == len(results),
+                filename=filename,
+                records_imported=sum(result.records_imported for result in results),
+                records_skipped=sum(result.records_skipped or 0 for result in results),
+                records_inserted=sum(result.records_inserted or 0 for result in results),
+                records_updated=sum(result.records_updated or 0 for result in results),
+                records_unchanged=sum(result.records_unchanged or 0 for result in results),
+                member_results=results,
+                message=f"压缩包共 {len(results)} 个CSV文件，成功 {len(succeeded)} 个，"
+                        f"共导入 {sum(result.records_imported for result in results)} 条销售记录",
+                errors=[f"{result.filename}: {result.message}" for result in results if not result.success] or None
+            )
+
+        if import_log_id is not None:
+            import_log = self.db.get(DataImportLog, import_log_id)
+            import_log.records_imported = response.records_imported
+            import_log.records_skipped = response.records_skipped or 0
+            import_log.records_updated = response.records_updated or 0
+            import_log.records_unchanged = response.records_unchanged or 0
+            if response.success:
+                import_log.import_status = "success"
+            else:
+                import_log.import_status = "partial" if response.records_imported else "failed"
+                import_log.error_message = "; ".join(response.errors or [])
+            import_log.bytes_processed = import_log.file_size
+            import_log.finished_at = datetime.now()
+            self.db.commit()
+            response.job_id = import_log_id
+        return response
+
+    def process_excel_file(
+        self,
+        file_path: Union[str, BinaryIO],
+        filename: str,
+        import_log_id: Optional[int] = None,
+        force: bool = False,
+        content_hash: Optional[str] = None,
+        upsert: bool = False
+    ) -> DataImportResponse:
+        """逐行流式读取Excel工作簿（.xlsx/.xls），按 settings.CHUNK_SIZE 分块清洗并逐块提交
+
+        提交语义与CSV流式导入相同；file_path 可以是路径或可定位的二进制文件对象。
+        """
+        from app.services.excel_import import iter_excel_chunks
+
+        content_hash = content_hash or generate_file_hash(file_path, "sha256")
+        if not force:
+            duplicate = self.find_duplicate_import(content_hash)
+            if duplicate is not None:
+                return self.duplicate_response(filename, duplicate)
+
+        if isinstance(file_path, str):
+            file_size = os.path.getsize(file_path)
+        else:
+            file_size = file_path.seek(0, os.SEEK_END)
+            file_path.seek(0)
+        batches = (self._prepare_chunk(chunk) for chunk in iter_excel_chunks(file_path, filename))
+        return self._import_batches(batches, filename, file_size, import_log_id, None, content_hash, upsert)
+    
+    def process_csv_file(
+        self,
+        file_path: Union[str, BinaryIO],
+        filename: str,
+        streaming: bool = False,
+        import_log_id: Optional[int] = None,
+        parallel: bool = False,
+        force: bool = False,
+        content_hash: Optional[str] = None,
+        upsert: bool = False,
+        bulk_load: bool = False
+    ) -> DataImportResponse:
+        """处理CSV文件并导入数据库
+
+        streaming=True 时按 settings.CHUNK_SIZE 分块读取、清洗并逐块提交，
+        内存占用与文件大小无关；否则整文件在一个事务内导入。
+        parallel=True 时由进程池并行解析清洗、按分片逐块提交（提交语义同流式导入）。
+        import_log_id 指向已创建的导入日志（如后台任务），分块导入时复用该日志记录进度。
+        整文件导入时 file_path 也可以是已打开的二进制文件对象。
+        导入前先计算内容哈希，内容相同的文件已成功导入过时直接返回（不解析、不写库），
+        force=True 时跳过该检查；content_hash 为调用方已算好的哈希。
+        upsert=True 时按 order_id 增量合并：已存在的订单更新，新订单插入（见 _upsert_columns）。
+        bulk_load=True 时使用大批量导入模式（见 process_csv_bulk），file_path 须为文件路径。
+        """
+        content_hash = content_hash or generate_file_hash(file_path, "sha256")
+        if not force:
+            duplicate = self.find_duplicate_import(content_hash)
+            if duplicate is not None:
+                return self.duplicate_response(filename, duplicate)
+
+        if bulk_load:
+            return self.process_csv_bulk(
+                file_path, filename, import_log_id=import_log_id, content_hash=content_hash, upsert=upsert
+            )
+
+        if parallel:
+            return self.process_csv_parallel(
+                file_path, filename, import_log_id=import_log_id, content_hash=content_hash, upsert=upsert
+            )
+
+        if streaming:
+            with open(file_path, "rb") as stream:
+                return self.process_csv_stream(
+                    stream, filename, os.path.getsize(file_path), import_log_id=import_log_id,
+                    force=True, content_hash=content_hash, upsert=upsert
+                )
+
+        started_at = datetime.now()
         try:
             # 读取CSV文件
             df = pd.read_csv(file_path)
@@ -29,19 +427,24 @@ class DataProcessor:
             # 数据清洗和验证
             cleaned_df = self._clean_data(df)
             
-            # 转换为数据库记录
-            records = self._convert_to_records(cleaned_df)
-            
-            # 批量插入数据库
-            self.db.add_all(records)
+            # 按列转换并批量写入数据库
+            inserted, updated, unchanged = self._write_columns(self._convert_to_columns(cleaned_df), upsert)
+            records_imported = inserted + updated
+            records_skipped = len(df) - inserted - updated - unchanged
             self.db.commit()
             
             # 记录导入日志
             import_log = DataImportLog(
                 filename=filename,
-                file_size=len(records),
-                records_imported=len(records),
-                import_status="success"
+                file_size=records_imported,
+                records_imported=records_imported,
+                records_skipped=records_skipped,
+                records_updated=updated,
+                records_unchanged=unchanged,
+                import_status="success",
+                content_hash=content_hash,
+                started_at=started_at,
+                finished_at=datetime.now()
             )
             self.db.add(import_log)
             self.db.commit()
@@ -49,8 +452,12 @@ class DataProcessor:
             return DataImportResponse(
                 success=True,
                 filename=filename,
-                records_imported=len(records),
-                message=f"成功导入 {len(records)} 条销售记录"
+                records_imported=records_imported,
+                records_skipped=records_skipped,
+                records_inserted=inserted,
+                records_updated=updated,
+                records_unchanged=unchanged,
+                message=self._success_message(inserted, updated, unchanged, records_skipped)
             )
             
         except Exception as e:
@@ -63,7 +470,9 @@ class DataProcessor:
                 file_size=0,
                 records_imported=0,
                 import_status="failed",
-                error_message=str(e)
+                error_message=str(e),
+                started_at=started_at,
+                finished_at=datetime.now()
             )
             self.db.add(import_log)
             self.db.commit()
@@ -75,110 +484,377 @@ class DataProcessor:
                 message=f"导入失败: {str(e)}",
                 errors=[str(e)]
             )
-    
+
+    def process_csv_stream(
+        self,
+        stream: BinaryIO,
+        filename: str,
+        file_size: Optional[int] = None,
+        import_log_id: Optional[int] = None,
+        force: bool = False,
+        content_hash: Optional[str] = None,
+        upsert: bool = False
+    ) -> DataImportResponse:
+        """从二进制文件对象分块流式导入CSV
+
+        stream 只需支持顺序读取（如上传文件或 SpooledPipe），可读取位置时据此记录字节进度。
+        可定位的流先计算内容哈希并做重复检查；不可定位的流（如边上传边导入）无法预读，
+        只在读取过程中计算哈希，导入成功后记录到日志，供之后的重复上传比对。
+        """
+        hashing_reader = None
+        if content_hash is None:
+            if stream.seekable():
+                content_hash = generate_file_hash(stream, "sha256")
+            else:
+                stream = hashing_reader = HashingReader(stream)
+        if content_hash is not None and not force:
+            duplicate = self.find_duplicate_import(content_hash)
+            if duplicate is not None:
+                return self.duplicate_response(filename, duplicate)
+
+        try:
+            stream.tell()
+            position = stream.tell
+        except (AttributeError, OSError):
+            position = None
+        result = self._import_batches(
+            self._read_chunks(stream), filename, file_size, import_log_id, position, content_hash, upsert
+        )
+
+        if hashing_reader is not None and result.success:
+            import_log = self.db.get(DataImportLog, result.job_id)
+            import_log.content_hash = hashing_reader.hexdigest()
+            self.db.commit()
+        return result
+
+    def process_csv_bulk(
+        self,
+        file_path: str,
+        filename: str,
+        import_log_id: Optional[int] = None,
+        content_hash: Optional[str] = None,
+        upsert: bool = False
+    ) -> DataImportResponse:
+        """大批量导入：暂停二级索引，按 settings.BULK_LOAD_CHUNK_SIZE 行的大事务流式写入，结束后重建索引
+
+        提交和失败语义同流式导入（每个大分块一个事务）。upsert=True 时保留 order_id 索引用于合并。
+        不做重复检查，由 process_csv_file 负责。
+        """
+        from app.services.bulk_load import bulk_load
+
+        with bulk_load(self.db.get_bind(), keep=["order_id"] if upsert else ()) as session:
+            processor = DataProcessor(session)
+            with open(file_path, "rb") as stream:
+                return processor._import_batches(
+                    processor._read_chunks(stream, settings.BULK_LOAD_CHUNK_SIZE), filename,
+                    os.path.getsize(file_path), import_log_id, stream.tell, content_hash, upsert
+                )
+
+    def process_csv_parallel(
+        self,
+        file_path: str,
+        filename: str,
+        workers: Optional[int] = None,
+        import_log_id: Optional[int] = None,
+        content_hash: Optional[str] = None,
+        upsert: bool = False
+    ) -> DataImportResponse:
+        """多进程并行解析清洗，单一写入方按分片顺序逐块提交
+
+        文件含跨行引号字段时无法按字节分片，退回单进程流式导入。
+        """
+        from app.services.parallel_import import ParallelCsvReader, MultilineFieldError
+
+        try:
+            reader = ParallelCsvReader(file_path, workers=workers)
+        except MultilineFieldError as e:
+            logger.warning(f"文件 {filename} {str(e)}，改用流式导入")
+            return self.process_csv_file(
+                file_path, filename, streaming=True, import_log_id=import_log_id,
+                force=True, content_hash=content_hash, upsert=upsert
+            )
+        return self._import_batches(
+            reader, filename, os.path.getsize(file_path), import_log_id, reader.tell, content_hash, upsert
+        )
+
+    def _import_batches(
+        self,
+        batches: Iterable[Tuple[Dict[str, list], int]],
+        filename: str,
+        file_size: Optional[int] = None,
+        import_log_id: Optional[int] = None,
+        position: Optional[Callable[[], int]] = None,
+        content_hash: Optional[str] = None,
+        upsert: bool = False
+    ) -> DataImportResponse:
+        """逐块写入并提交已清洗的列数据
+
+        batches 依次产出 (列数据, 该分块读取的原始行数)。每个分块（settings.CHUNK_SIZE 行）在独立事务中提交，导入日志的进度
+        与该分块的数据在同一事务中更新。第 N 块失败时：第 1..N-1 块保持已提交，
+        第 N 块整体回滚，后续分块不再处理，日志状态记为 partial（无已提交分块时为 failed）。
+        去重只在分块内部进行；upsert=True 时逐块按 order_id 合并，跨分块重复的订单以后出现的为准。
+        """
+        if import_log_id is not None:
+            import_log = self.db.get(DataImportLog, import_log_id)
+        else:
+            import_log = DataImportLog(filename=filename)
+            self.db.add(import_log)
+        import_log.file_size = file_size
+        import_log.records_imported = 0
+        import_log.records_skipped = 0
+        import_log.records_updated = 0
+        import_log.records_unchanged = 0
+        import_log.chunks_processed = 0
+        import_log.bytes_processed = 0
+        import_log.import_status = "processing"
+        import_log.started_at = datetime.now()
+        if content_hash is not None:
+            import_log.content_hash = content_hash
+        self.db.commit()
+
+        records_inserted = 0
+        records_updated = 0
+        records_unchanged = 0
+        records_skipped = 0
+        chunks_processed = 0
+        try:
+            for columns, rows_read in batches:
+                inserted, updated, unchanged = self._write_columns(columns, upsert)
+
+                records_inserted += inserted
+                records_updated += updated
+                records_unchanged += unchanged
+                records_skipped += rows_read - inserted - updated - unchanged
+                chunks_processed += 1
+                import_log.records_imported = records_inserted + records_updated
+                import_log.records_skipped = records_skipped
+                import_log.records_updated = records_updated
+                import_log.records_unchanged = records_unchanged
+                import_log.chunks_processed = chunks_processed
+                if position is not None:
+                    import_log.bytes_processed = position()
+                self.db.commit()
+
+                logger.info(f"文件 {filename} 第 {chunks_processed} 块已提交，累计 {import_log.records_imported} 条")
+
+            import_log.import_status = "success"
+            if file_size is not None:
+                import_log.bytes_processed = file_size
+            import_log.finished_at = datetime.now()
+            self.db.commit()
+
+            return DataImportResponse(
+                success=True,
+                filename=filename,
+                records_imported=records_inserted + records_updated,
+                records_skipped=records_skipped,
+                records_inserted=records_inserted,
+                records_updated=records_updated,
+                records_unchanged=records_unchanged,
+                chunks_processed=chunks_processed,
+                job_id=import_log.id,
+                message=self._success_message(
+                    records_inserted, records_updated, records_unchanged, records_skipped, chunks_processed
+                )
+            )
+
+        except Exception as e:
+            records_imported = records_inserted + records_updated
+            failed_chunk = chunks_processed + 1
+            logger.error(f"处理文件 {filename} 第 {failed_chunk} 块时发生错误: {str(e)}")
+            self.db.rollback()
+
+            # 回滚只撤销失败分块，已提交分块的数据和进度保持不变
+            import_log.import_status = "partial" if chunks_processed else "failed"
+            import_log.error_message = f"第 {failed_chunk} 块导入失败: {str(e)}"
+            import_log.finished_at = datetime.now()
+            self.db.commit()
+
+            return DataImportResponse(
+                success=False,
+                filename=filename,
+                records_imported=records_imported,
+                records_skipped=records_skipped,
+                records_inserted=records_inserted,
+                records_updated=records_updated,
+                records_unchanged=records_unchanged,
+                chunks_processed=chunks_processed,
+                job_id=import_log.id,
+                message=f"第 {failed_chunk} 块导入失败，前 {chunks_processed} 块（{records_imported} 条）已保留: {str(e)}",
+                errors=[str(e)]
+            )
+
+    def find_duplicate_import(self, content_hash: str) -> Optional[DataImportLog]:
+        """查找内容哈希相同且已成功导入的日志"""
+        return (
+            self.db.query(DataImportLog)
+            .filter(DataImportLog.content_hash == content_hash, DataImportLog.import_status == "success")
+            .order_by(DataImportLog.id.desc())
+            .first()
+        )
+
+    def duplicate_response(self, filename: str, duplicate: DataImportLog) -> DataImportResponse:
+        """重复上传的响应（不写入任何数据）"""
+        logger.info(f"文件 {filename} 与导入任务 {duplicate.id} 内容相同，跳过导入")
+        return DataImportResponse(
+            success=True,
+            filename=filename,
+            records_imported=0,
+            duplicate_of=duplicate.id,
+            message=f"文件内容与导入任务 {duplicate.id}（{duplicate.filename}）相同，已跳过；如需重新导入请使用 force=true"
+        )
+
     def _clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """数据清洗"""
-        # 删除重复行
-        df = df.drop_duplicates()
-        
-        # 删除空值行
-        df = df.dropna()
-        
-        # 标准化列名
-        df.columns = df.columns.str.strip().str.lower()
-        
-        # 数据类型转换
-        if 'sales_amount' in df.columns:
-            df['sales_amount'] = pd.to_numeric(df['sales_amount'], errors='coerce')
-        
-        if 'quantity' in df.columns:
-            df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce').astype(int)
-        
-        if 'unit_price' in df.columns:
-            df['unit_price'] = pd.to_numeric(df['unit_price'], errors='coerce')
-        
-        if 'sales_date' in df.columns:
-            df['sales_date'] = pd.to_datetime(df['sales_date'], errors='coerce')
-        
-        # 删除无效数据
-        df = df.dropna()
-        
-        return df
+        return clean_sales_data(df)
+    
+    def _convert_to_columns(self, df: pd.DataFrame) -> Dict[str, list]:
+        """将清洗后的DataFrame转换为按列组织的待写入数据"""
+        return to_sales_columns(df)
+    
+    def _prepare_chunk(self, chunk: pd.DataFrame) -> Tuple[Dict[str, list], int]:
+        """清洗并转换一个分块，返回 (列数据, 读取行数)"""
+        return self._convert_to_columns(self._clean_data(chunk)), len(chunk)
     
-    def _convert_to_records(self, df: pd.DataFrame) -> List[SalesRecord]:
-        """将DataFrame转换为数据库记录"""
-        records = []
+    def _read_chunks(self, stream: BinaryIO, chunksize: Optional[int] = None) -> Iterator[Tuple[Dict[str, list], int]]:
+        """按 chunksize（默认 settings.CHUNK_SIZE）行分块读取并清洗
+
+        读取器在首次迭代时才创建，空文件或表头错误等异常发生在 _import_batches 的保护范围内，
+        会被记录为失败的导入日志。
+        """
+        for chunk in pd.read_csv(stream, chunksize=chunksize or settings.CHUNK_SIZE):
+            yield self._prepare_chunk(chunk)
+    
+    def _write_columns(self, columns: Dict[str, list], upsert: bool = False) -> Tuple[int, int, int]:
+        """写入一个分块，返回 (新增数, 更新数, 未变化数)；数据版本号随分块在同一事务中加一
+
+        分块没有更新已有记录时登记为只新增，提交后列式存储只需追加新记录。
+        """
+        columns = add_dimension_keys(self.db, columns)
+        if upsert:
+            counts = self._upsert_columns(columns)
+        else:
+            counts = self._insert_columns(columns), 0, 0
+        bump_data_version(self.db.connection())
+        if counts[1] == 0:
+            note_append(self.db)
+        return counts
+
+    def _upsert_columns(self, columns: Dict[str, list]) -> Tuple[int, int, int]:
+        """经临时暂存表按 order_id 集合式合并到 sales_records，返回 (新增数, 更新数, 未变化数)
+
+        分块先批量写入暂存表（同一订单号保留最后一行），再用一条 UPDATE ... FROM
+        更新内容有变化的已有订单、一条 INSERT ... SELECT 插入新订单，不逐行查询。
+        sales_records.order_id 不是唯一键（历史数据可能已有重复），无法使用 ON CONFLICT，
+        已有多行的订单号会被同时更新。
+        汇总表在写入前按同一条件扣除被更新记录的旧值、加上新值和新订单。
+        """
+        connection = self.db.connection()
+        SALES_STAGING.create(connection, checkfirst=True)
+        connection.execute(SALES_STAGING.delete())
+        keys = list(columns)
+        values = zip(*columns.values())
+        while True:
+            batch = [dict(zip(keys, row)) for row in itertools.islice(values, settings.BATCH_SIZE)]
+            if not batch:
+                break
+            connection.execute(SALES_STAGING.insert(), batch)
+
+        staging = SALES_STAGING
+        rowid = literal_column("rowid")
+        connection.execute(staging.delete().where(
+            rowid.not_in(select(func.max(rowid)).select_from(staging).group_by(staging.c.order_id))
+        ))
+
+        sales = SalesRecord.__table__
+        # 星型模型下维度键随字符串列一同写入；未启用时清空被更新记录的键，切换回星型模型时重新补齐
+        key_columns = [name for name in DIMENSION_KEY_COLUMNS if name in columns]
+        stale_keys = {name: None for name in DIMENSION_KEY_COLUMNS if name not in columns}
+        same_order = sales.c.order_id == staging.c.order_id
+        changed = not_(and_(*[
+            sales.c[name].is_not_distinct_from(staging.c[name]) for name in SALES_COLUMNS if name != 'order_id'
+        ]))
+        matched = connection.execute(
+            select(func.count()).select_from(staging).where(exists().where(same_order))
+        ).scalar()
+        updated = connection.execute(
+            select(func.count()).select_from(staging).where(exists().where(same_order, changed))
+        ).scalar()
+
+        merge_delta(connection, rollup_delta(sales, exists().where(same_order, changed), sign=-1))
+        merge_delta(connection, rollup_delta(staging, same_order, changed))
+        merge_delta(connection, rollup_delta(staging, ~exists().where(same_order)))
+        remove_empty(connection)
+
+        connection.execute(
+            sales.update()
+            .where(same_order, changed)
+            .values({
+                **{name: staging.c[name] for name in SALES_COLUMNS + key_columns if name != 'order_id'},
+                **stale_keys,
+                'updated_at': func.now()
+            })
+        )
+        inserted = connection.execute(
+            sales.insert().from_select(
+                SALES_COLUMNS + key_columns + ['created_at', 'updated_at'],
+                select(*[staging.c[name] for name in SALES_COLUMNS + key_columns], func.now(), func.now())
+                .where(~exists().where(same_order))
+            )
+        ).rowcount
+        return inserted, updated, matched - updated
+
+    def _success_message(
+        self, inserted: int, updated: int, unchanged: int, skipped: int, chunks: Optional[int] = None
+    ) -> str:
+        """导入成功的响应消息"""
+        chunk_text = f"（{chunks} 个分块）" if chunks is not None else ""
+        if updated or unchanged:
+            return (f"成功导入 {inserted + updated} 条销售记录{chunk_text}：新增 {inserted} 条，"
+                    f"更新 {updated} 条，未变化 {unchanged} 条，跳过 {skipped} 条无效记录")
+        return f"成功导入 {inserted} 条销售记录{chunk_text}，跳过 {skipped} 条无效记录"
+
+    def _insert_columns(self, columns: Dict[str, list]) -> int:
+        """按 settings.BATCH_SIZE 组装字典批次，通过Core executemany写入，并合并到汇总表"""
+        insert_stmt = SalesRecord.__table__.insert()
+        keys = list(columns)
+        values = zip(*columns.values())
+        inserted = 0
         
-        for _, row in df.iterrows():
-            try:
-                record = SalesRecord(
-                    order_id=str(row.get('order_id', '')),
-                    product_name=str(row.get('product_name', '')),
-                    category=str(row.get('category', '')),
-                    customer_name=str(row.get('customer_name', '')),
-                    region=str(row.get('region', '')),
-                    sales_amount=float(row.get('sales_amount', 0)),
-                    quantity=int(row.get('quantity', 0)),
-                    unit_price=float(row.get('unit_price', 0)),
-                    sales_date=row.get('sales_date', datetime.now()),
-                    sales_person=str(row.get('sales_person', '')),
-                    payment_method=str(row.get('payment_method', ''))
-                )
-                records.append(record)
-            except Exception as e:
-                logger.warning(f"转换记录时跳过无效数据: {e}")
-                continue
+        while True:
+            batch = [dict(zip(keys, row)) for row in itertools.islice(values, settings.BATCH_SIZE)]
+            if not batch:
+                break
+            self.db.execute(insert_stmt, batch)
+            inserted += len(batch)
         
-        return records
+        merge_columns(self.db.connection(), columns)
+        return inserted
     
     def get_sales_statistics(self, query_params: Dict) -> Dict:
-        """获取销售统计信息"""
-        # 构建查询条件
-        query = self.db.query(SalesRecord)
-        
-        if query_params.get('start_date'):
-            query = query.filter(SalesRecord.sales_date >= query_params['start_date'])
-        
-        if query_params.get('end_date'):
-            query = query.filter(SalesRecord.sales_date <= query_params['end_date'])
-        
-        if query_params.get('region'):
-            query = query.filter(SalesRecord.region == query_params['region'])
-        
-        if query_params.get('category'):
-            query = query.filter(SalesRecord.category == query_params['category'])
-        
+        """获取销售统计信息（由 settings.ANALYTICS_BACKEND 选择的后端查询）"""
+        from app.services.analytics_backend import sales_totals, top_sales
+
+        filters = {
+            "start_date": query_params.get('start_date'),
+            "end_date": query_params.get('end_date'),
+            "region": query_params.get('region'),
+            "category": query_params.get('category')
+        }
         # 获取基础统计
-        total_sales = query.with_entities(
-            func.sum(SalesRecord.sales_amount).label('total_sales'),
-            func.sum(SalesRecord.quantity).label('total_quantity'),
-            func.count(SalesRecord.id).label('total_orders')
-        ).first()
+        totals = sales_totals(self.db, **filters)
         
         # 计算平均订单价值
-        avg_order_value = total_sales.total_sales / total_sales.total_orders if total_sales.total_orders > 0 else 0
-        
-        # 获取热销产品
-        top_products = self.db.query(
-            SalesRecord.product_name,
-            func.sum(SalesRecord.sales_amount).label('total_sales'),
-            func.sum(SalesRecord.quantity).label('total_quantity')
-        ).group_by(SalesRecord.product_name)\
-         .order_by(func.sum(SalesRecord.sales_amount).desc())\
-         .limit(10).all()
+        avg_order_value = totals.total_sales / totals.order_count if totals.order_count else 0
         
-        # 获取热销区域
-        top_regions = self.db.query(
-            SalesRecord.region,
-            func.sum(SalesRecord.sales_amount).label('total_sales')
-        ).group_by(SalesRecord.region)\
-         .order_by(func.sum(SalesRecord.sales_amount).desc())\
-         .limit(10).all()
+        # 获取热销产品和热销区域（与基础统计使用相同的过滤条件）
+        top_products = top_sales(self.db, 'product_name', ['total_sales', 'total_quantity'], 10, **filters)
+        top_regions = top_sales(self.db, 'region', ['total_sales'], 10, **filters)
         
         return {
-            "total_sales": float(total_sales.total_sales or 0),
-            "total_quantity": int(total_sales.total_quantity or 0),
-            "total_orders": int(total_sales.total_orders or 0),
+            "total_sales": float(totals.total_sales or 0),
+            "total_quantity": int(totals.total_quantity or 0),
+            "total_orders": int(totals.order_count or 0),
             "avg_order_value": float(avg_order_value),
             "top_products": [
                 {
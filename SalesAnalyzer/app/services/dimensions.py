@@ -0,0 +1,153 @@
+"""
+维度表（星型模型）服务
+
+settings.STAR_SCHEMA 开启时，产品、类别、区域、销售人员、支付方式在导入时解析为维度表中的整数键，
+写入 sales_records 的 *_id 列；分析查询按整数键分组，只为最终的前N条关联名称。
+名称 -> 键 的映射缓存在进程内存中。维度表只追加不删除，已缓存的键不会失效；
+事务中新建的键在提交后才进入共享缓存，回滚时丢弃。
+"""
+import threading
+import weakref
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event, select, false, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.sales import (
+    SalesRecord, DimProduct, DimCategory, DimRegion, DimSalesPerson, DimPaymentMethod
+)
+
+# 事实表字符串列 -> (维度键列, 维度模型)
+DIMENSIONS: Dict[str, Tuple[str, type]] = {
+    "product_name": ("product_id", DimProduct),
+    "category": ("category_id", DimCategory),
+    "region": ("region_id", DimRegion),
+    "sales_person": ("sales_person_id", DimSalesPerson),
+    "payment_method": ("payment_method_id", DimPaymentMethod),
+}
+DIMENSION_KEY_COLUMNS = [key for key, _ in DIMENSIONS.values()]
+
+_PENDING_KEYS = "pending_dimension_keys"
+_caches: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+def _shared_cache(bind) -> Dict[str, Dict[str, int]]:
+    """按数据库引擎区分的已提交维度键缓存"""
+    engine = getattr(bind, "engine", bind)
+    with _lock:
+        cache = _caches.get(engine)
+        if cache is None:
+            cache = _caches[engine] = {column: {} for column in DIMENSIONS}
+        return cache
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_keys(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEYS, None)
+    if pending:
+        shared = _shared_cache(session.get_bind())
+        with _lock:
+            for column, keys in pending.items():
+                shared[column].update(keys)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_keys(session: Session) -> None:
+    session.info.pop(_PENDING_KEYS, None)
+
+def resolve_keys(db: Session, column: str, values: List[str], connection=None) -> List[int]:
+    """将一列名称解析为维度键，缺失的名称在当前事务中插入维度表"""
+    _, model = DIMENSIONS[column]
+    shared = _shared_cache(db.get_bind())[column]
+    pending = db.info.setdefault(_PENDING_KEYS, {}).setdefault(column, {})
+    missing = {value for value in set(values) if value not in shared and value not in pending}
+    if missing:
+        table = model.__table__
+        connection = connection if connection is not None else db.connection()
+        connection.execute(
+            sqlite_insert(table).on_conflict_do_nothing(index_elements=["name"]),
+            [{"name": value} for value in missing]
+        )
+        rows = connection.execute(select(table.c.name, table.c.id).where(table.c.name.in_(missing)))
+        pending.update(rows.tuples().all())
+    return [shared.get(value) or pending[value] for value in values]
+
+def add_dimension_keys(db: Session, columns: Dict[str, list]) -> Dict[str, list]:
+    """星型模型下为分块列数据补充维度键列，否则原样返回"""
+    if not settings.STAR_SCHEMA:
+        return columns
+    keyed = dict(columns)
+    for column, (key_column, _) in DIMENSIONS.items():
+        keyed[key_column] = resolve_keys(db, column, columns[column])
+    return keyed
+
+def lookup_key(db: Session, column: str, value: str) -> Optional[int]:
+    """查询名称对应的维度键（只读，不存在时返回 None）"""
+    shared = _shared_cache(db.get_bind())[column]
+    key = shared.get(value) or db.info.get(_PENDING_KEYS, {}).get(column, {}).get(value)
+    if key is None:
+        _, model = DIMENSIONS[column]
+        key = db.execute(select(model.id).where(model.name == value)).scalar()
+    return key
+
+def dimension_filter(db: Session, column: str, value: str):
+    """按维度名称过滤的条件：星型模型下比较整数键，否则比较字符串列"""
+    if not settings.STAR_SCHEMA:
+        return getattr(SalesRecord, column) == value
+    key = lookup_key(db, column, value)
+    if key is None:
+        return false()
+    key_column, _ = DIMENSIONS[column]
+    return getattr(SalesRecord, key_column) == key
+
+def top_by_dimension(db: Session, column: str, measures: Dict[str, object], limit: Optional[int], filters=()):
+    """按维度分组汇总，按第一个指标降序取前 limit 条（None 表示全部）
+
+    星型模型下按整数键分组排序，只为结果中的前N条关联维度表取名称；
+    返回行的属性名为维度列名和 measures 的键，与按字符串列分组的结果一致。
+    """
+    order_label = next(iter(measures))
+    labeled = [expression.label(label) for label, expression in measures.items()]
+    if not settings.STAR_SCHEMA:
+        group = getattr(SalesRecord, column)
+        return db.query(group, *labeled).filter(*filters)\
+            .group_by(group)\
+            .order_by(measures[order_label].desc())\
+            .limit(limit).all()
+
+    key_column, model = DIMENSIONS[column]
+    key = getattr(SalesRecord, key_column)
+    ranked = select(key.label("key"), *labeled).where(*filters)\
+        .group_by(key)\
+        .order_by(measures[order_label].desc())\
+        .limit(limit).subquery()
+    return db.execute(
+        select(model.name.label(column), *[ranked.c[label] for label in measures])
+        .join_from(ranked, model, model.id == ranked.c.key)
+        .order_by(ranked.c[order_label].desc())
+    ).all()
+
+@event.listens_for(SalesRecord, "before_insert")
+@event.listens_for(SalesRecord, "before_update")
+def _fill_record_keys(mapper, connection, target: SalesRecord) -> None:
+    """ORM 写入的单条记录同样补充维度键"""
+    if not settings.STAR_SCHEMA:
+        return
+    db = Session.object_session(target)
+    for column, (key_column, _) in DIMENSIONS.items():
+        value = getattr(target, column)
+        setattr(target, key_column, None if value is None else resolve_keys(db, column, [value], connection)[0])
+
+def backfill_dimension_keys(bind) -> int:
+    """为维度键为空的已有记录补齐键（切换到星型模型或旧数据升级时），返回更新的记录数"""
+    updated = 0
+    with bind.begin() as conn:
+        for column, (key_column, model) in DIMENSIONS.items():
+            table = model.__tablename__
+            conn.execute(text(
+                f"INSERT OR IGNORE INTO {table} (name) SELECT DISTINCT {column} FROM sales_records "
+                f"WHERE {key_column} IS NULL AND {column} IS NOT NULL"
+            ))
+            updated = max(updated, conn.execute(text(
+                f"UPDATE sales_records SET {key_column} = (SELECT id FROM {table} WHERE name = sales_records.{column}) "
+                f"WHERE {key_column} IS NULL AND {column} IS NOT NULL"
+            )).rowcount)
+    return updated
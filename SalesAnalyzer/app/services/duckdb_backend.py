@@ -0,0 +1,374 @@
+"""
+DuckDB 分析后端
+
+settings.ANALYTICS_BACKEND = "duckdb" 时，sales_records 的分析列以 Parquet 文件快照保存在 settings.OLAP_SNAPSHOT_DIR 下
+（每个数据库一个子目录，manifest.json 记录文件列表和数据版本），分析查询由嵌入式列式引擎 DuckDB 直接扫描这些文件。
+快照按 app/services/replica.py 的机制与数据库同步：只新增记录的导入提交后追加新的 Parquet 文件，其他数据变化时全量重写；
+追加产生的文件数超过 settings.OLAP_MAX_PARTS 时合并为一个文件。重启后数据版本与记录数未变的快照直接复用。
+
+快照尚未就绪或与数据库的数据版本不一致、过滤条件无法在日粒度上表达（带时间的日期）、或未安装 duckdb 时，
+查询改用 sql 后端，结果始终与当前已提交的数据一致。结果格式与 sql 后端相同，聚合结果的 source 为 duckdb。
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import namedtuple
+from typing import List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.sales import SalesRecord
+from app.services.aggregation import DIMENSIONS, check_request
+from app.services.analytics_backend import AnalyticsBackend, sql_backend
+from app.services.column_store import row_type
+from app.services.replica import Replica, read_since
+from app.services.response_cache import data_version
+from app.services.rollup import MEASURES, rollup_conditions
+
+try:
+    import duckdb
+except ImportError:  # 可选依赖
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+# Parquet 快照的列：列名 -> (sales_records 上的表达式, DuckDB 类型)
+SNAPSHOT_COLUMNS = {
+    "day": (func.date(SalesRecord.sales_date), "DATE"),
+    **{name: (getattr(SalesRecord, name), "VARCHAR") for name in DIMENSIONS},
+    "sales_amount": (SalesRecord.sales_amount, "DOUBLE"),
+    "quantity": (SalesRecord.quantity, "BIGINT"),
+    "unit_price": (SalesRecord.unit_price, "DOUBLE"),
+}
+MEASURE_SQL = {"total_sales": "sum(sales_amount)", "total_quantity": "sum(quantity)", "order_count": "count(*)"}
+# 时间粒度 -> 分组键表达式，格式与 aggregation.TIME_BUCKETS 在 SQLite 上的结果相同
+TIME_BUCKET_SQL = {
+    "day": "strftime(\"day\", '%Y-%m-%d')",
+    "week": "strftime(\"day\", '%Y-W%W')",
+    "month": "strftime(\"day\", '%Y-%m')",
+    "year": "strftime(\"day\", '%Y')",
+}
+
+Manifest = namedtuple("Manifest", ["bind", "version", "max_id", "rows", "files"])
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+class ParquetSnapshot(Replica):
+    """sales_records 的 Parquet 文件快照，后台线程负责写入，查询只读取已发布的文件列表"""
+
+    name = "parquet-snapshot"
+
+    def __init__(self):
+        super().__init__()
+        self.manifest: Optional[Manifest] = None
+        self._write_lock = threading.Lock()
+        self._retired: List[str] = []
+
+    def enabled(self) -> bool:
+        return settings.ANALYTICS_BACKEND == "duckdb" and duckdb is not None
+
+    def directory(self, bind) -> str:
+        digest = hashlib.sha1(str(bind.url).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(settings.OLAP_SNAPSHOT_DIR, digest)
+
+    def current(self, db: Session) -> Optional[Manifest]:
+        """与数据库当前数据版本一致的快照；尚未就绪或已过期时返回 None 并安排后台刷新"""
+        if not self.enabled():
+            return None
+        manifest = self.manifest
+        if manifest is not None and self.is_current(db, manifest.bind, manifest.version):
+            return manifest
+        if manifest is None:
+            self.schedule_refresh(db.get_bind())
+        return None
+
+    def refresh(self, bind) -> int:
+        """自上次写入后只有登记过的新增分块时追加文件，否则全量重写；返回快照行数"""
+        with self._write_lock:
+            self._remove_retired()
+            manifest = self.manifest
+            if manifest is None or manifest.bind is not bind:
+                manifest = self._reuse(bind)
+                if manifest is None:
+                    return self._rebuild(bind)
+            batches = read_since(bind, manifest.max_id, self._columns(), settings.OLAP_PART_ROWS)
+            version, frame = next(batches)
+            if version != manifest.version and not self.insert_only(manifest.version, version):
+                batches.close()
+                return self._rebuild(bind)
+            files = list(manifest.files)
+            rows, max_id = manifest.rows, manifest.max_id
+            for frame in [frame] + [frame for _, frame in batches]:
+                if len(frame):
+                    files.append(self._write_part(bind, frame))
+                    rows += len(frame)
+                    max_id = int(frame["id"].max())
+            manifest = Manifest(bind, version, max_id, rows, tuple(files))
+            if len(files) > settings.OLAP_MAX_PARTS:
+                manifest = self._compact(manifest)
+            self._publish(manifest)
+            return rows
+
+    def _columns(self) -> dict:
+        return {name: expression for name, (expression, _) in SNAPSHOT_COLUMNS.items()}
+
+    def _write_part(self, bind, frame) -> str:
+        """将一批记录写为一个 Parquet 文件，返回文件路径"""
+        directory = self.directory(bind)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{uuid.uuid4().hex}.parquet")
+        columns = ", ".join(
+            ["CAST(id AS BIGINT) AS id"] +
+            [f"CAST({_quote(name)} AS {kind}) AS {_quote(name)}" for name, (_, kind) in SNAPSHOT_COLUMNS.items()]
+        )
+        connection = duckdb.connect()
+        try:
+            connection.register("batch", frame)
+            connection.execute(f"COPY (SELECT {columns} FROM batch) TO {_literal(path)} (FORMAT PARQUET)")
+        finally:
+            connection.close()
+        return path
+
+    def _rebuild(self, bind) -> int:
+        """全量重写快照"""
+        files, rows, max_id, version = [], 0, 0, 0
+        for version, frame in read_since(bind, 0, self._columns(), settings.OLAP_PART_ROWS):
+            # 没有记录时也写入一个空文件，查询不需要区分空快照
+            if len(frame) or not files:
+                files.append(self._write_part(bind, frame))
+                rows += len(frame)
+                max_id = int(frame["id"].max()) if len(frame) else max_id
+        manifest = Manifest(bind, version, max_id, rows, tuple(files))
+        if len(files) > settings.OLAP_MAX_PARTS:
+            manifest = self._compact(manifest)
+        self._publish(manifest)
+        logger.info(f"Parquet 快照已写入 {rows} 条记录（数据版本 {version}，{len(manifest.files)} 个文件）")
+        return rows
+
+    def _compact(self, manifest: Manifest) -> Manifest:
+        """将快照的全部文件合并为一个文件"""
+        path = os.path.join(self.directory(manifest.bind), f"part-{uuid.uuid4().hex}.parquet")
+        connection = duckdb.connect()
+        try:
+            connection.execute(
+                f"COPY (SELECT * FROM {_source(manifest.files)} ORDER BY id) TO {_literal(path)} (FORMAT PARQUET)"
+            )
+        finally:
+            connection.close()
+        self._retired.extend(manifest.files)
+        return manifest._replace(files=(path,))
+
+    def _reuse(self, bind) -> Optional[Manifest]:
+        """复用上次进程写入的快照：数据版本、最大 id 和记录数都与数据库一致时才复用"""
+        path = os.path.join(self.directory(bind), "manifest.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        sales = SalesRecord.__table__
+        with bind.connect() as conn:
+            max_id, rows = conn.execute(select(func.coalesce(func.max(sales.c.id), 0), func.count())).one()
+            version = data_version(conn)
+        files = tuple(saved.get("files", []))
+        if (saved.get("version"), saved.get("max_id"), saved.get("rows")) != (version, max_id, rows) \
+                or not files or not all(os.path.exists(file) for file in files):
+            return None
+        return Manifest(bind, version, max_id, rows, files)
+
+    def _publish(self, manifest: Manifest) -> None:
+        directory = self.directory(manifest.bind)
+        if self.manifest is not None and self.manifest.bind is manifest.bind:
+            self._retired.extend(set(self.manifest.files) - set(manifest.files))
+        else:
+            # 目录中不属于新快照的文件（上次进程的旧快照）
+            self._retired.extend(
+                os.path.join(directory, name) for name in os.listdir(directory)
+                if name.endswith(".parquet") and os.path.join(directory, name) not in manifest.files
+            )
+        temporary = os.path.join(directory, "manifest.json.tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({
+                "database": str(manifest.bind.url), "version": manifest.version, "max_id": manifest.max_id,
+                "rows": manifest.rows, "files": list(manifest.files)
+            }, f)
+        os.replace(temporary, os.path.join(directory, "manifest.json"))
+        self.manifest = manifest
+        self.forget_appended(manifest.version)
+
+    def _remove_retired(self) -> None:
+        """删除已被替换的文件；延迟到下一次刷新，使替换前开始的查询仍能读取"""
+        for path in self._retired:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._retired = []
+
+    def clear(self) -> None:
+        """丢弃已发布的快照（不删除文件，用于测试和切换数据库）"""
+        self.reset()
+        with self._write_lock:
+            self.manifest = None
+            self._retired = []
+
+    def stats(self) -> dict:
+        manifest = self.manifest
+        if not self.enabled():
+            state = "disabled"
+        else:
+            state = "ready" if manifest is not None else "cold"
+        return {
+            "state": state,
+            "rows": manifest.rows if manifest is not None else 0,
+            "data_version": manifest.version if manifest is not None else None,
+            "files": len(manifest.files) if manifest is not None else 0,
+        }
+
+parquet_snapshot = ParquetSnapshot()
+
+def _source(files: Tuple[str, ...]) -> str:
+    return f"read_parquet([{', '.join(_literal(file) for file in files)}])"
+
+def _conditions(start_date=None, end_date=None, **dimensions) -> Optional[Tuple[List[str], list]]:
+    """过滤条件对应的 (WHERE 子句列表, 参数)，日期无法在日粒度上表达时返回 None"""
+    if rollup_conditions(start_date, end_date) is None:
+        return None
+    clauses, parameters = [], []
+    if start_date:
+        clauses.append('"day" >= CAST(? AS DATE)')
+        parameters.append(start_date)
+    if end_date:
+        clauses.append('"day" < CAST(? AS DATE)')
+        parameters.append(end_date)
+    for name, value in dimensions.items():
+        if name not in DIMENSIONS:
+            return None
+        if value:
+            clauses.append(f"{_quote(name)} = ?")
+            parameters.append(value)
+    return clauses, parameters
+
+def _where(clauses: List[str]) -> str:
+    return f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+class DuckDBBackend(AnalyticsBackend):
+    """DuckDB 查询 Parquet 快照，快照不可用或条件无法表达时改用 sql 后端"""
+
+    name = "duckdb"
+
+    def __init__(self, snapshot: ParquetSnapshot):
+        self.snapshot = snapshot
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _execute(self, sql: str, parameters: list) -> list:
+        """在每个线程独立的游标上执行查询（DuckDB 连接不能在线程间共享同一游标）"""
+        with self._lock:
+            if self._connection is None:
+                self._connection = duckdb.connect()
+            cursor = self._connection.cursor()
+        try:
+            return cursor.execute(sql, parameters).fetchall()
+        finally:
+            cursor.close()
+
+    def _prepare(self, db: Session, filters: dict) -> Optional[Tuple[str, List[str], list]]:
+        """(数据源, WHERE 子句列表, 参数)，无法由快照回答时返回 None"""
+        manifest = self.snapshot.current(db)
+        if manifest is None:
+            return None
+        conditions = _conditions(**filters)
+        if conditions is None:
+            return None
+        return (_source(manifest.files), *conditions)
+
+    def top_sales(self, db: Session, column: str, measures: List[str], limit: Optional[int], **filters):
+        prepared = self._prepare(db, filters) if column in DIMENSIONS else None
+        if prepared is None:
+            return sql_backend.top_sales(db, column, measures, limit, **filters)
+        source, clauses, parameters = prepared
+        sql = (
+            f"SELECT {_quote(column)}, {', '.join(MEASURE_SQL[name] for name in measures)} FROM {source}"
+            f"{_where(clauses)} GROUP BY {_quote(column)} ORDER BY {MEASURE_SQL[measures[0]]} DESC NULLS LAST"
+        )
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        row = row_type(column, *measures)
+        return [row(*values) for values in self._execute(sql, parameters)]
+
+    def sales_totals(self, db: Session, **filters):
+        prepared = self._prepare(db, filters)
+        if prepared is None:
+            return sql_backend.sales_totals(db, **filters)
+        source, clauses, parameters = prepared
+        sql = f"SELECT {', '.join(MEASURE_SQL[name] for name in MEASURES)} FROM {source}{_where(clauses)}"
+        return row_type(*MEASURES)(*self._execute(sql, parameters)[0])
+
+    def daily_sales(self, db: Session, start_date=None, end_date=None):
+        prepared = self._prepare(db, {"start_date": start_date, "end_date": end_date})
+        if prepared is None:
+            return sql_backend.daily_sales(db, start_date, end_date)
+        source, clauses, parameters = prepared
+        sql = (
+            f"SELECT {TIME_BUCKET_SQL['day']}, {MEASURE_SQL['total_sales']}, {MEASURE_SQL['order_count']} "
+            f"FROM {source}{_where(clauses)} GROUP BY \"day\" ORDER BY \"day\" NULLS FIRST"
+        )
+        row = row_type("date", "total_sales", "order_count")
+        return [row(*values) for values in self._execute(sql, parameters)]
+
+    def aggregate_sales(self, db: Session, group_by: List[str], measures: List[str], start_date=None, end_date=None,
+                        sort: Optional[List[str]] = None, limit: Optional[int] = None, subtotals: str = "none",
+                        **filters) -> dict:
+        """多维聚合：DuckDB 原生支持 ROLLUP / CUBE 和 GROUPING()，每个分组集合的条数限制用窗口函数实现"""
+        parsed, order, checked = check_request(group_by, measures, sort, subtotals, filters)
+        prepared = self._prepare(db, {"start_date": start_date, "end_date": end_date, **checked})
+        if prepared is None:
+            return sql_backend.aggregate_sales(
+                db, group_by, measures, start_date, end_date, sort, limit, subtotals, **filters
+            )
+        source, clauses, parameters = prepared
+        labels = [label for _, _, label in parsed]
+        dimensions = [TIME_BUCKET_SQL.get(name, _quote(name)) for name in group_by]
+        columns = [f"{expression} AS {_quote(name)}" for expression, name in zip(dimensions, group_by)]
+        columns += [
+            f"{'count(*)' if field is None else f'{aggregate}({field})'} AS {_quote(label)}"
+            for aggregate, field, label in parsed
+        ]
+        keys = ", ".join(dimensions)
+        grouping = keys
+        if subtotals != "none":
+            columns.insert(0, f"{'GROUPING(' + keys + ')' if keys else '0'} AS \"grouping\"")
+            grouping = f"{subtotals.upper()}({keys})" if keys else ""
+        # 与 SQLite 相同：升序时空值在前，降序时空值在后
+        ordering = [f"{_quote(name)} {'DESC NULLS LAST' if descending else 'ASC NULLS FIRST'}" for name, descending in order]
+        ordering += [f"{_quote(name)} ASC NULLS FIRST" for name in group_by]
+        names = (["grouping"] if subtotals != "none" else []) + group_by + labels
+        sql = f"SELECT {', '.join(columns)} FROM {source}{_where(clauses)}"
+        if grouping:
+            sql += f" GROUP BY {grouping}"
+        if limit is not None:
+            partition = 'PARTITION BY "grouping" ' if subtotals != "none" else ""
+            window = f"row_number() OVER ({partition}{'ORDER BY ' + ', '.join(ordering) if ordering else ''})"
+            sql = (
+                f"SELECT {', '.join(_quote(name) for name in names)} FROM "
+                f"(SELECT *, {window} AS _rank FROM ({sql})) WHERE _rank <= {int(limit)}"
+            )
+        final_order = (['"grouping"'] if subtotals != "none" else []) + ordering
+        if final_order:
+            sql = f"SELECT * FROM ({sql}) ORDER BY {', '.join(final_order)}"
+        return {
+            "source": self.name,
+            "dimensions": group_by,
+            "measures": labels,
+            "rows": [dict(zip(names, values)) for values in self._execute(sql, parameters)],
+        }
+
+duckdb_backend = DuckDBBackend(parquet_snapshot)
@@ -0,0 +1,79 @@
+"""
+Excel工作簿流式读取服务
+
+.xlsx 使用 openpyxl 只读模式逐行迭代，不构造整表DataFrame，内存占用与行数无关；
+.xls 为旧版二进制格式，xlrd 需要载入整个工作表（该格式最多65536行）。
+两者都按 settings.CHUNK_SIZE 行产出DataFrame分块，交给与CSV相同的清洗写入流程。
+"""
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Union
+import pandas as pd
+from app.core.config import settings
+
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+
+def is_excel_file(filename: str) -> bool:
+    """是否为Excel工作簿"""
+    return filename.lower().endswith(EXCEL_EXTENSIONS)
+
+def iter_excel_chunks(
+    file: Union[str, BinaryIO],
+    filename: str,
+    chunk_size: Optional[int] = None
+) -> Iterator[pd.DataFrame]:
+    """按行分块读取工作簿的第一个工作表，首行为表头"""
+    chunk_size = chunk_size or settings.CHUNK_SIZE
+    if filename.lower().endswith(".xls"):
+        rows = _iter_xls_rows(file)
+    else:
+        rows = _iter_xlsx_rows(file)
+    return _chunk_rows(rows, chunk_size)
+
+def _chunk_rows(rows: Iterable[tuple], chunk_size: int) -> Iterator[pd.DataFrame]:
+    """将行迭代器组装为DataFrame分块，跳过全空行"""
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("工作簿为空")
+    columns: List[str] = [str(value).strip() if value is not None else "" for value in header]
+
+    batch = []
+    for row in rows:
+        if all(value is None or value == "" for value in row):
+            continue
+        batch.append(row[:len(columns)])
+        if len(batch) >= chunk_size:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+            batch = []
+    if batch:
+        yield pd.DataFrame.from_records(batch, columns=columns)
+
+def _iter_xlsx_rows(file: Union[str, BinaryIO]) -> Iterator[tuple]:
+    """openpyxl 只读模式逐行读取"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+def _iter_xls_rows(file: Union[str, BinaryIO]) -> Iterator[tuple]:
+    """xlrd 读取旧版 .xls，日期单元格转换为 datetime"""
+    import xlrd
+
+    if isinstance(file, str):
+        workbook = xlrd.open_workbook(file, on_demand=True)
+    else:
+        workbook = xlrd.open_workbook(file_contents=file.read(), on_demand=True)
+    try:
+        sheet = workbook.sheet_by_index(0)
+        for row in sheet.get_rows():
+            yield tuple(
+                xlrd.xldate_as_datetime(cell.value, workbook.datemode)
+                if cell.ctype == xlrd.XL_CELL_DATE else
+                (None if cell.ctype == xlrd.XL_CELL_EMPTY else cell.value)
+                for cell in row
+            )
+    finally:
+        workbook.release_resources()
@@ -0,0 +1,186 @@
+"""
+销售数据流式导出服务
+
+按过滤条件只查询导出需要的列，每次从数据库游标取一批行，编码后立即交给响应发送，
+内存占用只与批大小有关，与导出行数无关。支持的格式：
+- csv: 每批 EXPORT_BATCH_SIZE 行写成CSV（可选 gzip 压缩）
+- arrow: Arrow IPC 流，每批 EXPORT_ARROW_BATCH_SIZE 行为一个记录批
+- parquet: Parquet 文件，每批为一个行组
+arrow/parquet 按列类型导出（销售日期为时间戳），客户端可直接读入 DataFrame，需要安装 pyarrow（可选依赖）。
+导出列在 SQLite 上都不需要结果类型转换，参数仍由 SQLAlchemy 绑定，结果直接从 DBAPI 游标
+按批读取元组，省去逐行构造 Row 对象（约占导出耗时的三分之一）。
+"""
+import csv
+import io
+import zlib
+from typing import Iterator, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from app.core.config import settings
+from app.models.sales import SalesRecord
+from app.services.data_processor import sales_filters
+
+# 格式 -> (媒体类型, 文件扩展名)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", ".csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrow"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+# 表头 -> 列表达式；销售日期只导出日期部分，直接由 SQLite 格式化，不逐行转换为 datetime
+EXPORT_COLUMNS = [
+    ("ID", SalesRecord.id),
+    ("订单ID", SalesRecord.order_id),
+    ("产品名称", SalesRecord.product_name),
+    ("分类", SalesRecord.category),
+    ("客户名称", SalesRecord.customer_name),
+    ("区域", SalesRecord.region),
+    ("销售金额", SalesRecord.sales_amount),
+    ("数量", SalesRecord.quantity),
+    ("单价", SalesRecord.unit_price),
+    ("销售日期", func.date(SalesRecord.sales_date)),
+    ("销售人员", SalesRecord.sales_person),
+    ("支付方式", SalesRecord.payment_method),
+]
+
+# 字段名 -> (列表达式, Arrow 类型)；销售日期读取存储的字符串，按批由 Arrow 解析为时间戳
+ARROW_COLUMNS = [
+    ("id", SalesRecord.id, "int64"),
+    ("order_id", SalesRecord.order_id, "string"),
+    ("product_name", SalesRecord.product_name, "string"),
+    ("category", SalesRecord.category, "string"),
+    ("customer_name", SalesRecord.customer_name, "string"),
+    ("region", SalesRecord.region, "string"),
+    ("sales_amount", SalesRecord.sales_amount, "float64"),
+    ("quantity", SalesRecord.quantity, "int64"),
+    ("unit_price", SalesRecord.unit_price, "float64"),
+    ("sales_date", SalesRecord.sales_date, "timestamp[us]"),
+    ("sales_person", SalesRecord.sales_person, "string"),
+    ("payment_method", SalesRecord.payment_method, "string"),
+]
+
+class UnsupportedExportFormatError(ValueError):
+    """导出格式未知，或服务器未安装该格式所需的库"""
+    pass
+
+def check_export_format(format: str) -> None:
+    """检查导出格式可用，不可用时抛出 UnsupportedExportFormatError"""
+    if format not in EXPORT_FORMATS:
+        raise UnsupportedExportFormatError(f"不支持的导出格式: {format}（可选 {', '.join(EXPORT_FORMATS)}）")
+    if format in ("arrow", "parquet"):
+        try:
+            import pyarrow  # noqa: F401
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise UnsupportedExportFormatError(f"服务器未安装 pyarrow，无法导出 {format} 格式")
+
+def export_statement(db: Session, start_date=None, end_date=None, format: str = "csv", **dimensions) -> Select:
+    """导出查询：销售日期范围和区域/类别/产品名称过滤（空值表示不过滤）"""
+    columns = [column for _, column in EXPORT_COLUMNS] if format == "csv" else \
+        [column for _, column, _ in ARROW_COLUMNS]
+    return select(*columns).where(*sales_filters(db, start_date, end_date, **dimensions))
+
+def export_media_type(format: str = "csv", compress: bool = False) -> str:
+    return "application/gzip" if compress and format == "csv" else EXPORT_FORMATS[format][0]
+
+def export_filename(format: str = "csv", compress: bool = False) -> str:
+    filename = "sales_export" + EXPORT_FORMATS[format][1]
+    return filename + ".gz" if compress and format == "csv" else filename
+
+def iter_export(db: Session, statement: Select, format: str = "csv", compress: bool = False) -> Iterator[bytes]:
+    """按格式逐批生成导出文件内容，compress 只对 csv 生效（arrow/parquet 按列压缩的收益有限）"""
+    if format == "csv":
+        return iter_csv(db, statement, compress)
+    return iter_columnar(db, statement, format)
+
+def _fetch_batches(db: Session, statement: Select, batch_size: int) -> Iterator[list]:
+    result = db.connection().execute(statement)
+    try:
+        while True:
+            rows = result.cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        result.close()
+
+def iter_csv(db: Session, statement: Select, compress: bool = False,
+             batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """逐批生成导出文件内容（UTF-8 编码的CSV，compress=True 时为 gzip 格式）"""
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    compressor = zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    writer.writerow([header for header, _ in EXPORT_COLUMNS])
+    for rows in _fetch_batches(db, statement, batch_size):
+        writer.writerows(rows)
+        chunk = drain()
+        if chunk:
+            yield chunk
+    tail = drain()
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
+
+class _ChunkSink:
+    """pyarrow 写入器的输出目标，收集写出的字节供逐批发送"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_columnar(db: Session, statement: Select, format: str,
+                  batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """逐批生成 Arrow IPC 流（format="arrow"）或 Parquet 文件（format="parquet"）的内容"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    batch_size = batch_size or settings.EXPORT_ARROW_BATCH_SIZE
+    schema = pa.schema([(name, pa.type_for_alias(type_name)) for name, _, type_name in ARROW_COLUMNS])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema) if format == "parquet" else pa.ipc.new_stream(sink, schema)
+    try:
+        for rows in _fetch_batches(db, statement, batch_size):
+            arrays = [
+                pa.array(values, pa.string()).cast(field.type) if pa.types.is_timestamp(field.type)
+                else pa.array(values, field.type)
+                for values, field in zip(zip(*rows), schema)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
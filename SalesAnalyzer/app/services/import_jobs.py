@@ -0,0 +1,171 @@
+"""
+后台导入任务服务
+"""
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.sales import DataImportLog
+from app.schemas.sales import ImportJobStatus
+from app.services.data_processor import DataProcessor
+from app.utils.helpers import generate_file_hash
+
+logger = logging.getLogger(__name__)
+
+# 固定大小的导入线程池；信号量限制运行中 + 排队中的任务总数
+_executor = ThreadPoolExecutor(max_workers=settings.IMPORT_WORKERS, thread_name_prefix="import-job")
+_slots = threading.BoundedSemaphore(settings.IMPORT_WORKERS + settings.IMPORT_QUEUE_SIZE)
+
+class ImportQueueFullError(Exception):
+    """导入任务队列已满"""
+    pass
+
+class DuplicateImportError(Exception):
+    """文件内容与已成功导入的文件相同"""
+
+    def __init__(self, duplicate: DataImportLog):
+        super().__init__(f"文件内容与导入任务 {duplicate.id} 相同")
+        self.duplicate = duplicate
+
+def submit_import_job(
+    db: Session,
+    file_path: str,
+    filename: str,
+    parallel: bool = False,
+    force: bool = False,
+    upsert: bool = False
+) -> DataImportLog:
+    """创建排队中的导入日志并提交到后台线程池
+
+    提交前计算内容哈希，内容重复且 force=False 时抛出 DuplicateImportError（不写库）。
+    file_path 由任务接管，导入结束后删除；抛出异常时文件仍归调用方。
+    队列已满时抛出 ImportQueueFullError。
+    """
+    content_hash = generate_file_hash(file_path, "sha256")
+    if not force:
+        duplicate = DataProcessor(db).find_duplicate_import(content_hash)
+        if duplicate is not None:
+            raise DuplicateImportError(duplicate)
+
+    if not _slots.acquire(blocking=False):
+        raise ImportQueueFullError("导入任务队列已满，请稍后重试")
+
+    try:
+        import_log = DataImportLog(
+            filename=filename,
+            file_size=os.path.getsize(file_path),
+            records_imported=0,
+            import_status="queued",
+            content_hash=content_hash
+        )
+        db.add(import_log)
+        db.commit()
+        db.refresh(import_log)
+
+        _executor.submit(_run_import_job, import_log.id, file_path, filename, parallel, content_hash, upsert)
+    except Exception:
+        _slots.release()
+        raise
+
+    return import_log
+
+def _run_import_job(
+    job_id: int,
+    file_path: str,
+    filename: str,
+    parallel: bool = False,
+    content_hash: Optional[str] = None,
+    upsert: bool = False
+) -> None:
+    """在工作线程中以流式（或并行）模式执行导入（重复检查已在提交时完成）"""
+    db = SessionLocal()
+    try:
+        DataProcessor(db).process_file(
+            file_path, filename, streaming=True, import_log_id=job_id, parallel=parallel,
+            force=True, content_hash=content_hash, upsert=upsert
+        )
+    except Exception as e:
+        # process_csv_file 只在打开文件等前置步骤失败时抛出异常
+        logger.error(f"导入任务 {job_id} 执行失败: {str(e)}")
+        db.rollback()
+        import_log = db.get(DataImportLog, job_id)
+        if import_log is not None:
+            import_log.import_status = "failed"
+            import_log.error_message = str(e)
+            import_log.finished_at = datetime.now()
+            db.commit()
+    finally:
+        db.close()
+        _slots.release()
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+def fail_orphaned_jobs(db: Session) -> int:
+    """将上次进程退出时遗留的排队中/处理中任务标记为失败，返回处理的任务数
+
+    任务只存在于进程内的线程池中，进程重启后不会继续执行，需在启动时调用。
+    """
+    orphaned = db.query(DataImportLog).filter(
+        DataImportLog.import_status.in_(("queued", "processing"))
+    ).all()
+    for import_log in orphaned:
+        # 流式导入已提交的分块保持不变，与分块失败的语义一致
+        import_log.import_status = "partial" if import_log.chunks_processed else "failed"
+        import_log.error_message = "服务重启，导入任务已中断"
+        import_log.finished_at = datetime.now()
+    db.commit()
+    if orphaned:
+        logger.warning(f"已将 {len(orphaned)} 个中断的导入任务标记为失败")
+    return len(orphaned)
+
+def get_job_status(db: Session, job_id: int) -> Optional[ImportJobStatus]:
+    """根据导入日志计算任务状态、进度与吞吐"""
+    import_log = db.get(DataImportLog, job_id)
+    if import_log is None:
+        return None
+
+    records_imported = import_log.records_imported or 0
+    records_skipped = import_log.records_skipped or 0
+    records_unchanged = import_log.records_unchanged or 0
+    rows_processed = records_imported + records_unchanged + records_skipped
+    bytes_processed = import_log.bytes_processed or 0
+
+    elapsed_seconds = None
+    rows_per_second = None
+    if import_log.started_at:
+        elapsed_seconds = ((import_log.finished_at or datetime.now()) - import_log.started_at).total_seconds()
+        if elapsed_seconds > 0:
+            rows_per_second = round(rows_processed / elapsed_seconds, 1)
+
+    progress = None
+    if import_log.import_status == "success":
+        progress = 100.0
+    elif import_log.file_size:
+        progress = round(min(bytes_processed / import_log.file_size, 1.0) * 100, 1)
+
+    return ImportJobStatus(
+        job_id=import_log.id,
+        filename=import_log.filename,
+        status=import_log.import_status,
+        file_size=import_log.file_size,
+        bytes_processed=bytes_processed,
+        rows_processed=rows_processed,
+        records_imported=records_imported,
+        records_skipped=records_skipped,
+        records_updated=import_log.records_updated or 0,
+        records_unchanged=records_unchanged,
+        chunks_processed=import_log.chunks_processed or 0,
+        progress=progress,
+        elapsed_seconds=elapsed_seconds,
+        rows_per_second=rows_per_second,
+        started_at=import_log.started_at,
+        finished_at=import_log.finished_at,
+        error_message=import_log.error_message
+    )
@@ -0,0 +1,223 @@
+"""
+分片（断点续传）上传服务
+
+上传会话保存在 settings.UPLOAD_DIR/multipart/<upload_id>/ 下：manifest.json 记录文件名和声明的大小，
+每个分片先写入临时文件，校验通过后原子重命名为 <编号>.part。分片可以乱序、并发上传；
+连接中断的分片不会留下半个文件，客户端查询已收到的分片后只需重传缺失部分。
+完成时按编号顺序拼接为单个文件，交给后台导入任务。
+"""
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.sales import DataImportLog
+from app.services.import_jobs import submit_import_job, DuplicateImportError
+from app.utils.helpers import validate_file_extension
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+_UPLOAD_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+class MultipartUploadError(ValueError):
+    """分片上传请求无效"""
+    pass
+
+class UploadTooLargeError(MultipartUploadError):
+    """分片或文件总大小超过限制"""
+    pass
+
+class UploadNotFoundError(Exception):
+    """上传会话不存在或已结束"""
+    pass
+
+def _upload_root() -> str:
+    return os.path.join(settings.UPLOAD_DIR, "multipart")
+
+def _upload_dir(upload_id: str) -> str:
+    # upload_id 来自URL，只接受服务端生成的格式，避免路径穿越
+    if not _UPLOAD_ID_PATTERN.match(upload_id):
+        raise UploadNotFoundError(f"上传会话 {upload_id} 不存在")
+    return os.path.join(_upload_root(), upload_id)
+
+def _part_path(upload_dir: str, part_number: int) -> str:
+    return os.path.join(upload_dir, f"{part_number:05d}.part")
+
+def create_upload(filename: str, total_size: Optional[int] = None) -> dict:
+    """创建上传会话，返回会话信息（含 upload_id 和分片大小上限）"""
+    if not validate_file_extension(filename, settings.ALLOWED_EXTENSIONS):
+        raise MultipartUploadError("只支持CSV、Excel或压缩文件（.csv.gz/.csv.zst/.zip）")
+    if total_size is not None and total_size > settings.MULTIPART_MAX_FILE_SIZE:
+        raise UploadTooLargeError("文件大小超过限制")
+
+    manifest = {
+        "upload_id": uuid.uuid4().hex,
+        "filename": os.path.basename(filename),
+        "total_size": total_size,
+        "created_at": time.time(),
+    }
+    upload_dir = _upload_dir(manifest["upload_id"])
+    os.makedirs(upload_dir)
+    with open(os.path.join(upload_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    return get_upload(manifest["upload_id"])
+
+def get_upload(upload_id: str) -> dict:
+    """读取会话信息及已收到的分片（编号 -> 字节数），用于断点续传"""
+    upload_dir = _upload_dir(upload_id)
+    try:
+        with open(os.path.join(upload_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise UploadNotFoundError(f"上传会话 {upload_id} 不存在")
+    parts = _list_parts(upload_dir)
+    manifest.update(
+        part_size_limit=settings.MULTIPART_PART_SIZE,
+        max_parts=settings.MULTIPART_MAX_PARTS,
+        parts=parts,
+        received_bytes=sum(parts.values()),
+    )
+    return manifest
+
+def _list_parts(upload_dir: str) -> Dict[int, int]:
+    parts = {}
+    for name in os.listdir(upload_dir):
+        if name.endswith(".part"):
+            parts[int(name[:-len(".part")])] = os.path.getsize(os.path.join(upload_dir, name))
+    return dict(sorted(parts.items()))
+
+async def write_part(
+    upload_id: str,
+    part_number: int,
+    chunks: AsyncIterator[bytes],
+    checksum: Optional[str] = None
+) -> dict:
+    """接收一个分片：写入临时文件，校验大小和 SHA-256 后原子替换为正式分片
+
+    同一编号重复上传时后完成的覆盖先完成的；传输中断或校验失败时删除临时文件并抛出异常，
+    已收到的其他分片不受影响。
+    """
+    upload_dir = _upload_dir(upload_id)
+    if not os.path.exists(os.path.join(upload_dir, MANIFEST_NAME)):
+        raise UploadNotFoundError(f"上传会话 {upload_id} 不存在")
+    if not 1 <= part_number <= settings.MULTIPART_MAX_PARTS:
+        raise MultipartUploadError(f"分片编号需在 1 到 {settings.MULTIPART_MAX_PARTS} 之间")
+
+    # 其他分片的已收字节数 + 本分片不能超过总大小上限
+    received = sum(size for number, size in _list_parts(upload_dir).items() if number != part_number)
+    limit = min(settings.MULTIPART_PART_SIZE, settings.MULTIPART_MAX_FILE_SIZE - received)
+
+    hasher = hashlib.sha256()
+    size = 0
+    temp_path = os.path.join(upload_dir, f"{part_number:05d}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temp_path, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > limit:
+                    raise UploadTooLargeError("分片大小超过限制")
+                hasher.update(chunk)
+                f.write(chunk)
+        if size == 0:
+            raise MultipartUploadError("分片内容为空")
+        if checksum and checksum.lower() != hasher.hexdigest():
+            raise MultipartUploadError(f"分片 {part_number} 校验和不一致")
+        os.replace(temp_path, _part_path(upload_dir, part_number))
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return {"part_number": part_number, "size": size, "sha256": hasher.hexdigest()}
+
+def assemble_upload(upload_id: str, parts: Optional[List[int]] = None) -> str:
+    """按编号顺序拼接分片，返回拼接后的文件路径（会话保留，由调用方在提交导入后删除）
+
+    parts 为客户端确认的分片编号列表，省略时使用已收到的全部分片；编号必须从1开始连续。
+    """
+    manifest = get_upload(upload_id)
+    received = manifest["parts"]
+    expected = sorted(parts) if parts else list(received)
+    if not expected or expected != list(range(1, len(expected) + 1)):
+        raise MultipartUploadError("分片编号需从1开始连续")
+    missing = [number for number in expected if number not in received]
+    if missing:
+        raise MultipartUploadError(f"缺少分片: {', '.join(map(str, missing))}")
+    total_size = sum(received[number] for number in expected)
+    if manifest["total_size"] is not None and total_size != manifest["total_size"]:
+        raise MultipartUploadError(f"已收到 {total_size} 字节，与声明的 {manifest['total_size']} 字节不一致")
+
+    upload_dir = _upload_dir(upload_id)
+    file_path = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4().hex}_{manifest['filename']}")
+    try:
+        with open(file_path, "wb") as output:
+            for number in expected:
+                with open(_part_path(upload_dir, number), "rb") as part:
+                    shutil.copyfileobj(part, output, 1024 * 1024)
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return file_path
+
+def complete_upload(
+    db: Session,
+    upload_id: str,
+    parts: Optional[List[int]] = None,
+    force: bool = False,
+    upsert: bool = False
+) -> DataImportLog:
+    """拼接分片并提交后台导入任务，成功提交（或内容重复）后删除上传会话
+
+    提交失败（如队列已满）时删除拼接文件但保留分片，客户端可以稍后重试完成操作。
+    """
+    filename = get_upload(upload_id)["filename"]
+    file_path = assemble_upload(upload_id, parts)
+    try:
+        import_log = submit_import_job(db, file_path, filename, False, force, upsert)
+    except DuplicateImportError:
+        os.remove(file_path)
+        delete_upload(upload_id)
+        raise
+    except BaseException:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    delete_upload(upload_id)
+    return import_log
+
+def delete_upload(upload_id: str) -> None:
+    """删除上传会话及其分片"""
+    upload_dir = _upload_dir(upload_id)
+    if not os.path.isdir(upload_dir):
+        raise UploadNotFoundError(f"上传会话 {upload_id} 不存在")
+    shutil.rmtree(upload_dir, ignore_errors=True)
+
+def cleanup_expired_uploads(max_age: Optional[float] = None) -> int:
+    """删除超过有效期未完成的上传会话，返回删除数量"""
+    max_age = settings.MULTIPART_UPLOAD_TTL if max_age is None else max_age
+    root = _upload_root()
+    if not os.path.isdir(root):
+        return 0
+    removed = 0
+    for upload_id in os.listdir(root):
+        upload_dir = os.path.join(root, upload_id)
+        # 目录修改时间即最近一次收到分片的时间，仍在上传的会话不会被清理
+        try:
+            expired = time.time() - os.path.getmtime(upload_dir) > max_age
+        except OSError:
+            continue
+        if expired:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+            removed += 1
+    if removed:
+        logger.info(f"已清理 {removed} 个过期的分片上传会话")
+    return removed
@@ -0,0 +1,90 @@
+"""
+销售记录游标（keyset）分页
+
+OFFSET 分页需要先扫描并丢弃前面的所有行，页码越大越慢。游标分页记住上一页最后一行的 (排序键, id)，
+下一页直接在索引上定位到该位置之后，耗时与页码无关：
+- id：按主键排序，按区域/类别过滤时走 ix_sales_records_region_cover / category_cover（过滤列之后紧跟 id）；
+- sales_date：按日期排序（同一天内按 id），走表达式索引 ix_sales_records_sales_day_cover，
+  没有销售日期的记录不出现在该排序的结果中。
+总数读取汇总表并按数据版本缓存（见 record_count），不对每页请求执行 COUNT(*)。
+"""
+import base64
+import json
+from typing import List, Optional, Tuple
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Query, Session
+from app.services.data_processor import sales_totals
+from app.services.response_cache import cached_call
+
+# 排序名 -> 排序键表达式（与对应索引中的表达式一致，才能按索引定位）
+SORT_KEYS = {
+    "id": lambda model: model.id,
+    "sales_date": lambda model: func.date(model.sales_date),
+}
+ORDERS = ("asc", "desc")
+
+class InvalidCursorError(ValueError):
+    """游标无法解析，或与请求的排序方式不一致"""
+
+def encode_cursor(sort: str, order: str, key, last_id: int) -> str:
+    """将排序方式和最后一行的 (排序键, id) 编码为不透明的游标字符串"""
+    payload = json.dumps([sort, order, key, last_id], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[object, int]:
+    """解析游标，返回 (排序键, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_order, key, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("无效的分页游标") from e
+    if (cursor_sort, cursor_order) != (sort, order) or not isinstance(last_id, int):
+        raise InvalidCursorError("分页游标与排序方式不一致，请从第一页重新查询")
+    return key, last_id
+
+def keyset_page(
+    query: Query, sort: str, order: str, cursor: Optional[str], limit: int
+) -> Tuple[list, Optional[str]]:
+    """按游标取一页记录，返回 (记录列表, 下一页游标)，没有更多记录时游标为 None
+
+    cursor 为空时从第一页开始。query 为已加过滤条件的销售记录查询（映射 sales_records 表的任一模型）：
+    查询实体时返回记录对象，按列投影时返回各行的值元组。
+    """
+    if sort not in SORT_KEYS:
+        raise InvalidCursorError(f"不支持的排序字段: {sort}（可选 {', '.join(SORT_KEYS)}）")
+    if order not in ORDERS:
+        raise InvalidCursorError(f"不支持的排序方向: {order}（可选 asc、desc）")
+    single = len(query.column_descriptions) == 1
+    model = query.column_descriptions[0]["entity"]
+    key = SORT_KEYS[sort](model)
+    descending = order == "desc"
+
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, sort, order)
+        if sort == "id":
+            query = query.filter(key < last_id if descending else key > last_id)
+        elif descending:
+            # 展开的条件比行值比较 (key, id) < (?, ?) 更容易让 SQLite 按表达式索引定位
+            query = query.filter(key <= last_key, or_(key < last_key, model.id < last_id))
+        else:
+            query = query.filter(key >= last_key, or_(key > last_key, model.id > last_id))
+    elif sort != "id":
+        # 第一页加上覆盖全部日期的范围条件，避免有过滤条件时规划器改用过滤列索引再整体排序
+        query = query.filter(key <= "9999-12-31" if descending else key >= "")
+
+    ordering = [key.desc(), model.id.desc()] if descending else [key, model.id]
+    if sort == "id":
+        ordering = ordering[:1]
+    rows = query.add_columns(key.label("sort_key"), model.id.label("seek_id"))\
+        .order_by(*ordering).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, order, rows[-1].sort_key, rows[-1].seek_id)
+    return [row[0] if single else tuple(row[:-2]) for row in rows], next_cursor
+
+def record_count(db: Session, **filters) -> int:
+    """符合过滤条件（区域/类别）的记录数，读取汇总表并按数据版本缓存"""
+    return cached_call(
+        db, "record_count", filters, lambda: int(sales_totals(db, **filters).order_count or 0)
+    )
@@ -0,0 +1,169 @@
+"""
+多进程并行CSV解析服务
+
+将大CSV按字节范围切分为与行边界对齐的分片，由进程池并行解析和清洗，
+清洗后的列数据按分片顺序交给单一写入方写入 sales_records。
+分片按字节切分，要求引号内的字段不包含换行符（ParallelCsvReader 会预先检查）。
+工作进程返回打包后的列数据：数值和日期为 NumPy 数组，字符串列拼接为单个字符串，
+避免逐个值序列化 Python 对象抵消并行收益。
+"""
+import io
+import csv
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+from app.services.data_processor import clean_sales_data, STRING_COLUMNS, FLOAT_COLUMNS
+
+# 字符串列打包时的分隔符，值本身包含该字符时该列退回为列表
+_STRING_SEPARATOR = "\x00"
+_SCAN_BLOCK_SIZE = 4 * 1024 * 1024
+
+PackedColumns = Dict[str, Union[str, list, np.ndarray]]
+
+class MultilineFieldError(ValueError):
+    """CSV中存在包含换行符的引号字段，无法按字节分片"""
+    pass
+
+def has_multiline_quoted_fields(file_path: str, data_start: int = 0) -> bool:
+    """检查数据区是否存在跨行的引号字段
+
+    引号字段内的转义引号成对出现，因此某一物理行中引号个数为奇数即说明有字段跨行。
+    不含引号的块只做一次字节查找。
+    """
+    with open(file_path, "rb") as f:
+        f.seek(data_start)
+        tail = b""
+        while True:
+            block = f.read(_SCAN_BLOCK_SIZE)
+            if not block:
+                return tail.count(b'"') % 2 == 1
+            block = tail + block
+            cut = block.rfind(b"\n") + 1
+            lines, tail = block[:cut], block[cut:]
+            if b'"' in lines and any(line.count(b'"') % 2 for line in lines.split(b"\n")):
+                return True
+
+def pack_sales_columns(df: pd.DataFrame) -> PackedColumns:
+    """将清洗后的DataFrame打包为便于跨进程传输的列数据（缺失列按默认值补齐）"""
+    rows = len(df)
+    packed = {}
+    for column in STRING_COLUMNS:
+        values = df[column].astype(str).tolist() if column in df.columns else [''] * rows
+        joined = _STRING_SEPARATOR.join(values)
+        if rows and joined.count(_STRING_SEPARATOR) == rows - 1:
+            packed[column] = joined
+        else:
+            packed[column] = values
+    for column in FLOAT_COLUMNS:
+        packed[column] = df[column].to_numpy(dtype=float) if column in df.columns else np.zeros(rows)
+    packed['quantity'] = (
+        df['quantity'].to_numpy(dtype=np.int64) if 'quantity' in df.columns else np.zeros(rows, dtype=np.int64)
+    )
+    if 'sales_date' in df.columns:
+        packed['sales_date'] = df['sales_date'].to_numpy(dtype='datetime64[us]')
+    else:
+        packed['sales_date'] = np.full(rows, np.datetime64(datetime.now(), 'us'))
+    return packed
+
+def unpack_sales_columns(packed: PackedColumns) -> Dict[str, list]:
+    """还原为与 to_sales_columns 相同的Python值列表"""
+    columns = {}
+    for column in STRING_COLUMNS:
+        value = packed[column]
+        columns[column] = value.split(_STRING_SEPARATOR) if isinstance(value, str) else value
+    for column in FLOAT_COLUMNS + ['quantity']:
+        columns[column] = packed[column].tolist()
+    # datetime64[us] 转为 object 时得到 datetime.datetime
+    columns['sales_date'] = packed['sales_date'].astype(object).tolist()
+    return columns
+
+def read_csv_header(file_path: str) -> Tuple[List[str], int]:
+    """读取表头，返回 (列名列表, 数据区起始字节偏移)"""
+    with open(file_path, "rb") as f:
+        header_line = f.readline()
+    columns = next(csv.reader([header_line.decode("utf-8-sig")]))
+    return columns, len(header_line)
+
+def split_csv_shards(file_path: str, data_start: int, shard_size: int) -> List[Tuple[int, int]]:
+    """按 shard_size 字节切分数据区，每个分片的边界向后对齐到下一个换行符"""
+    file_size = os.path.getsize(file_path)
+    shards = []
+    with open(file_path, "rb") as f:
+        start = data_start
+        while start < file_size:
+            end = start + shard_size
+            if end >= file_size:
+                end = file_size
+            else:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            shards.append((start, end))
+            start = end
+    return shards
+
+def parse_shard(file_path: str, start: int, end: int, columns: List[str]) -> Tuple[PackedColumns, int]:
+    """在工作进程中解析并清洗一个分片，返回 (打包的列数据, 读取行数)"""
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    if not data.strip():
+        return pack_sales_columns(pd.DataFrame(columns=columns)), 0
+
+    df = pd.read_csv(io.BytesIO(data), header=None, names=columns)
+    return pack_sales_columns(clean_sales_data(df)), len(df)
+
+class ParallelCsvReader:
+    """按分片顺序产出并行清洗结果的迭代器
+
+    同时在途的分片数不超过 workers * 2，写入方变慢时解析会随之暂停，
+    内存占用由分片大小和并发度决定，与文件大小无关。
+    存在跨行引号字段时抛出 MultilineFieldError，分片边界可能落在字段内部。
+    """
+
+    def __init__(self, file_path: str, workers: Optional[int] = None, shard_size: Optional[int] = None):
+        self.file_path = file_path
+        self.workers = workers or settings.IMPORT_PROCESS_WORKERS
+        self.shard_size = shard_size or settings.PARALLEL_SHARD_SIZE
+        self.columns, data_start = read_csv_header(file_path)
+        if has_multiline_quoted_fields(file_path, data_start):
+            raise MultilineFieldError("CSV中存在包含换行符的引号字段，无法按字节分片并行解析")
+        self.shards = split_csv_shards(file_path, data_start, self.shard_size)
+        self._position = data_start
+
+    def tell(self) -> int:
+        """已交付给写入方的数据截止字节偏移"""
+        return self._position
+
+    def __iter__(self) -> Iterator[Tuple[Dict[str, list], int]]:
+        # spawn 避免在持有数据库连接和线程的进程中 fork
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as executor:
+            pending = deque()
+            shards = iter(self.shards)
+
+            def submit_next():
+                shard = next(shards, None)
+                if shard is not None:
+                    pending.append((shard, executor.submit(parse_shard, self.file_path, *shard, self.columns)))
+
+            for _ in range(self.workers * 2):
+                submit_next()
+
+            try:
+                while pending:
+                    (_, end), future = pending.popleft()
+                    result = future.result()
+                    submit_next()
+                    self._position = end
+                    packed, rows_read = result
+                    yield unpack_sales_columns(packed), rows_read
+            finally:
+                for _, future in pending:
+                    future.cancel()
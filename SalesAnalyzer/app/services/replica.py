@@ -0,0 +1,132 @@
+"""
+分析数据副本的公共机制
+
+内存列式存储（column_store）和 Parquet 快照（duckdb_backend）都是 sales_records 的只读副本，按数据版本与数据库同步：
+- DataProcessor 只新增记录的导入分块在事务中登记其数据版本（note_append），提交后通知各副本在后台按 id 追加新记录；
+- 其他数据变化（更新、删除、其他进程写入）的版本未登记，副本在后台全量重建；
+- 查询前比较副本与数据库的数据版本，不一致时由调用方改为查询数据库。
+"""
+import logging
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from app.models.sales import SalesRecord, DataVersion
+from app.services.response_cache import data_version
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "replica_appends"
+_replicas: List["Replica"] = []
+
+def read_since(bind, max_id: int, columns: Dict[str, object], batch_size: int) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """读取 id 大于 max_id 的记录，按 id 升序分批产出 (数据版本, 记录)
+
+    columns 为 结果列名 -> sales_records 上的表达式，产出的 DataFrame 另含 id 列。
+    版本号与记录在同一条语句中读取（左连接保证没有新记录时也返回版本），二者来自同一读快照。
+    """
+    sales = SalesRecord.__table__
+    version = select(func.coalesce(func.max(DataVersion.version), 0).label("version")).subquery()
+    statement = select(version.c.version, sales.c.id, *columns.values())\
+        .select_from(version.outerjoin(sales, sales.c.id > max_id)).order_by(sales.c.id)
+    names = ["version", "id", *columns]
+    with bind.connect() as conn:
+        for rows in conn.execute(statement).partitions(batch_size):
+            frame = pd.DataFrame.from_records(rows, columns=names)
+            yield int(frame["version"].iat[0]), frame[frame["id"].notna()].drop(columns="version")
+
+class Replica:
+    """按数据版本同步的副本基类：一个后台线程负责加载和追加，子类实现 enabled 和 refresh"""
+
+    name = "replica"
+
+    def __init__(self):
+        self._appended = set()
+        self._lock = threading.Lock()
+        self._pending_bind = None
+        self._worker: Optional[threading.Thread] = None
+        _replicas.append(self)
+
+    def enabled(self) -> bool:
+        raise NotImplementedError
+
+    def refresh(self, bind) -> int:
+        """使副本与数据库一致，返回副本行数"""
+        raise NotImplementedError
+
+    def insert_only(self, since: int, version: int) -> bool:
+        """since 之后到 version 的数据版本是否都是登记过的只新增分块"""
+        return all(number in self._appended for number in range(since + 1, version + 1))
+
+    def forget_appended(self, version: int) -> None:
+        """副本已同步到 version，丢弃之前的登记"""
+        with self._lock:
+            self._appended = {number for number in self._appended if number > version}
+
+    def is_current(self, db: Session, bind, version: Optional[int]) -> bool:
+        """副本（属于 bind、数据版本为 version）是否与 db 的当前数据一致；不一致时安排后台刷新"""
+        current = db.get_bind()
+        if bind is current and version == data_version(db):
+            return True
+        self.schedule_refresh(current)
+        return False
+
+    def schedule_refresh(self, bind) -> None:
+        """在后台线程中刷新副本；刷新进行中时合并为完成后再刷新一次"""
+        if not self.enabled():
+            return
+        with self._lock:
+            self._pending_bind = bind
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._refresh_pending, name=self.name, daemon=True)
+            self._worker.start()
+
+    def _refresh_pending(self) -> None:
+        while True:
+            with self._lock:
+                bind, self._pending_bind = self._pending_bind, None
+                if bind is None:
+                    self._worker = None
+                    return
+            try:
+                self.refresh(bind)
+            except Exception as e:
+                logger.error(f"刷新 {self.name} 失败: {str(e)}")
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """等待后台刷新完成"""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def appended(self, bind, versions: List[int]) -> None:
+        """登记只新增记录的数据版本，并在后台追加"""
+        if not self.enabled():
+            return
+        with self._lock:
+            self._appended.update(versions)
+        self.schedule_refresh(bind)
+
+    def reset(self) -> None:
+        """等待后台刷新结束并丢弃登记"""
+        self.wait()
+        with self._lock:
+            self._appended = set()
+
+def note_append(db: Session) -> None:
+    """在导入事务中登记本次数据版本只新增了记录，事务提交后通知各副本"""
+    if any(replica.enabled() for replica in _replicas):
+        db.info.setdefault(_PENDING_KEY, []).append(data_version(db))
+
+@event.listens_for(Session, "after_commit")
+def _append_on_commit(session: Session) -> None:
+    versions = session.info.pop(_PENDING_KEY, None)
+    if versions:
+        for replica in _replicas:
+            replica.appended(session.get_bind(), versions)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
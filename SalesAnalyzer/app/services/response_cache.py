@@ -0,0 +1,129 @@
+"""
+分析接口响应缓存
+
+分析数据只在导入提交时变化。data_version 表保存单调递增的数据版本号，DataProcessor 每个分块
+在写入销售数据的同一事务中加一（ORM 写入在 flush 时加一），其他进程（如 bulk_import.py）的导入同样可见。
+缓存条目按 (数据库, 接口, 规范化后的参数) 存放，并记录计算时的数据版本；请求时先读取当前版本，
+版本不同即视为未命中，不需要按时间过期。条目数超过 settings.RESPONSE_CACHE_SIZE 时按最近最少使用淘汰。
+"""
+import functools
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.sales import SalesRecord, DataVersion
+
+def bump_data_version(connection) -> None:
+    """在当前事务中将数据版本号加一，随事务提交生效"""
+    statement = sqlite_insert(DataVersion.__table__).values(id=1, version=1)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=["id"], set_={"version": DataVersion.__table__.c.version + 1}
+    ))
+
+def data_version(db: Session) -> int:
+    """当前已提交的数据版本号"""
+    return db.execute(select(DataVersion.version).where(DataVersion.id == 1)).scalar() or 0
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session: Session, flush_context) -> None:
+    """ORM 新增、修改或删除销售记录时同样更新数据版本"""
+    if any(isinstance(obj, SalesRecord) for obj in (*session.new, *session.dirty, *session.deleted)):
+        bump_data_version(session.connection())
+
+class ResponseCache:
+    """按数据版本失效的LRU缓存，记录命中和未命中次数"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[int, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_entries(self) -> int:
+        return settings.RESPONSE_CACHE_SIZE if self._max_entries is None else self._max_entries
+
+    def get(self, key: Hashable, version: int) -> Tuple[bool, object]:
+        """返回 (是否命中, 缓存值)，版本不同的条目视为未命中并删除"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Hashable, version: int, value: object) -> None:
+        """写入条目，超过上限时淘汰最久未使用的条目"""
+        with self._lock:
+            existing = self._entries.get(key)
+            # 并发计算时保留较新版本的结果
+            if existing is not None and existing[0] > version:
+                return
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空条目并重置计数"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+response_cache = ResponseCache()
+
+def _cache_key(db: Session, name: str, arguments: Dict[str, object]) -> Hashable:
+    params = tuple(sorted((key, value) for key, value in arguments.items() if key != "db"))
+    return str(db.get_bind().url), name, params
+
+def _lookup(db: Session, key: Hashable) -> Tuple[Optional[int], bool, object]:
+    """返回 (当前数据版本, 是否命中, 缓存值)；缓存关闭时版本为 None
+    
+    先读取数据版本再计算：计算期间有导入提交时，结果按较旧的版本号存放，下次请求会重新计算，不会返回过期数据。
+    """
+    if response_cache.max_entries <= 0:
+        return None, False, None
+    version = data_version(db)
+    hit, value = response_cache.get(key, version)
+    return version, hit, value
+
+def cached_call(db: Session, name: str, arguments: Dict[str, object], compute: Callable[[], object]) -> object:
+    """按数据版本缓存只读计算 compute 的结果，name 和 arguments 组成缓存键"""
+    key = _cache_key(db, name, arguments)
+    version, hit, value = _lookup(db, key)
+    if hit:
+        return value
+    value = compute()
+    if version is not None:
+        response_cache.put(key, version, value)
+    return value
+
+def cached_response(endpoint: Callable) -> Callable:
+    """缓存接口函数的返回值，接口须通过 db 参数注入数据库会话且只读
+
+    参数取 FastAPI 解析后的值（默认值已补齐），不带参数和显式传默认值的请求共用条目。
+    """
+    name = f"{endpoint.__module__}.{endpoint.__qualname__}"
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        return cached_call(kwargs["db"], name, kwargs, lambda: endpoint(*args, **kwargs))
+    return wrapper
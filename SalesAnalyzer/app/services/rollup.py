@@ -0,0 +1,161 @@
+"""
+销售日汇总表服务
+
+sales_daily_rollup 按 (日期, 区域, 类别, 产品) 粒度保存销售金额、数量和记录数的合计。
+DataProcessor 的每个导入批次在写入 sales_records 的同一事务中合并增量（按订单号增量合并时先扣除旧值），
+ORM 单条写入通过映射器事件维护；分块提交或失败回滚时汇总表与明细始终一致。
+分析接口的过滤条件能在该粒度上表达时读取汇总表（见 rollup_conditions），耗时取决于天数和维度组合数，与明细行数无关。
+明细中为空的区域/类别/产品在汇总表中记为空字符串。
+"""
+import re
+from typing import Dict, Optional
+from sqlalchemy import event, func, inspect, select, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+from app.models.sales import SalesRecord, SalesDailyRollup
+from app.services.response_cache import bump_data_version
+
+GRAIN = ["region", "category", "product_name"]
+MEASURES = ["total_sales", "total_quantity", "order_count"]
+ROLLUP_COLUMNS = ["day"] + GRAIN + MEASURES
+
+# 指标名 -> (明细表聚合, 汇总表聚合)
+MEASURE_EXPRESSIONS = {
+    "total_sales": (func.sum(SalesRecord.sales_amount), func.sum(SalesDailyRollup.total_sales)),
+    "total_quantity": (func.sum(SalesRecord.quantity), func.sum(SalesDailyRollup.total_quantity)),
+    "order_count": (func.count(SalesRecord.id), func.sum(SalesDailyRollup.order_count)),
+}
+
+_DAY = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+def rollup_conditions(start_date=None, end_date=None, **dimensions) -> Optional[list]:
+    """将过滤条件转换为汇总表上的等价条件，无法在日粒度上表达时返回 None
+
+    明细查询按 sales_date 与参数的字符串比较过滤（见 sales_date_range）：'YYYY-MM-DD' 形式的
+    开始日期包含当天，结束日期不含当天（当天记录带时间部分，比较时大于参数），汇总表按同样的语义比较 day 列。
+    带时间的字符串和 datetime 参数无法在日粒度上表达。dimensions 为区域/类别/产品名称，空值表示不过滤。
+    """
+    conditions = []
+    for value in (start_date, end_date):
+        if value and not (isinstance(value, str) and _DAY.match(value)):
+            return None
+    if start_date:
+        conditions.append(SalesDailyRollup.day >= start_date)
+    if end_date:
+        conditions.append(SalesDailyRollup.day < end_date)
+    for column, value in dimensions.items():
+        if column not in GRAIN:
+            return None
+        if value:
+            conditions.append(getattr(SalesDailyRollup, column) == value)
+    return conditions
+
+def _merge_statement(source=None):
+    """按主键合并增量的 INSERT ... ON CONFLICT DO UPDATE，source 为 SELECT 时从查询结果合并"""
+    table = SalesDailyRollup.__table__
+    statement = sqlite_insert(table)
+    if source is not None:
+        statement = statement.from_select(ROLLUP_COLUMNS, source)
+    return statement.on_conflict_do_update(
+        index_elements=["day"] + GRAIN,
+        set_={name: table.c[name] + statement.excluded[name] for name in MEASURES}
+    )
+
+def rollup_delta(source, *conditions, sign: int = 1) -> Select:
+    """按汇总粒度聚合 source（sales_records 或同列的暂存表）中满足条件的行，sign=-1 时为扣减量"""
+    keys = [func.coalesce(func.date(source.c.sales_date), "")] + [
+        func.coalesce(source.c[name], "") for name in GRAIN
+    ]
+    # WHERE 子句避免 INSERT ... SELECT ... ON CONFLICT 的语法歧义
+    return select(
+        *keys,
+        sign * func.sum(source.c.sales_amount),
+        sign * func.sum(source.c.quantity),
+        sign * func.count()
+    ).where(true(), *conditions).group_by(*keys)
+
+def merge_delta(connection: Connection, source: Select) -> None:
+    """将 rollup_delta 查询的结果合并到汇总表"""
+    connection.execute(_merge_statement(source))
+
+def merge_columns(connection: Connection, columns: Dict[str, list]) -> None:
+    """将一个分块的列数据（见 to_sales_columns）按汇总粒度聚合后合并到汇总表
+
+    分块的 sales_date 已是 Timestamp 对象列表，逐行按字典聚合比转换为 DataFrame 再分组快得多；
+    合并语句直接交给驱动 executemany，省去逐行的参数处理。
+    """
+    totals = {}
+    for sales_date, region, category, product_name, amount, quantity in zip(
+        columns["sales_date"], columns["region"], columns["category"], columns["product_name"],
+        columns["sales_amount"], columns["quantity"]
+    ):
+        key = (sales_date.date(), region, category, product_name)
+        total = totals.get(key)
+        if total is None:
+            totals[key] = [amount, quantity, 1]
+        else:
+            total[0] += amount
+            total[1] += quantity
+            total[2] += 1
+    if not totals:
+        return
+    statement = str(_merge_statement().compile(dialect=connection.dialect))
+    connection.exec_driver_sql(statement, [
+        (day.isoformat(), region, category, product_name, *total)
+        for (day, region, category, product_name), total in totals.items()
+    ])
+
+def remove_empty(connection: Connection) -> None:
+    """删除扣减后已没有记录的汇总行"""
+    connection.execute(SalesDailyRollup.__table__.delete().where(SalesDailyRollup.order_count <= 0))
+
+def rebuild_sales_rollup(bind) -> int:
+    """按 sales_records 全量重建汇总表，返回汇总行数"""
+    sales = SalesRecord.__table__
+    with bind.begin() as conn:
+        conn.execute(SalesDailyRollup.__table__.delete())
+        merge_delta(conn, rollup_delta(sales))
+        bump_data_version(conn)
+        return conn.execute(select(func.count()).select_from(SalesDailyRollup)).scalar()
+
+def backfill_sales_rollup(bind) -> int:
+    """汇总表为空而已有销售记录时（旧数据库升级或绕过模型写入后）全量重建，返回汇总行数"""
+    with bind.connect() as conn:
+        empty = conn.execute(select(SalesDailyRollup.day).limit(1)).first() is None
+        has_records = conn.execute(select(SalesRecord.id).limit(1)).first() is not None
+    return rebuild_sales_rollup(bind) if empty and has_records else 0
+
+def _record_row(target: SalesRecord) -> dict:
+    """ORM 记录当前值对应的汇总增量"""
+    sales_date = target.sales_date
+    return {
+        "day": sales_date.strftime("%Y-%m-%d") if hasattr(sales_date, "strftime") else str(sales_date or "")[:10],
+        **{name: getattr(target, name) or "" for name in GRAIN},
+        "total_sales": target.sales_amount or 0,
+        "total_quantity": target.quantity or 0,
+        "order_count": 1,
+    }
+
+def _remove_stored(connection: Connection, target: SalesRecord) -> None:
+    """扣除记录在数据库中的当前值（修改前的值不一定已加载到对象上，直接从表中读取）"""
+    sales = SalesRecord.__table__
+    merge_delta(connection, rollup_delta(sales, sales.c.id == target.id, sign=-1))
+    remove_empty(connection)
+
+@event.listens_for(SalesRecord, "after_insert")
+def _rollup_inserted(mapper, connection, target: SalesRecord) -> None:
+    connection.execute(_merge_statement(), [_record_row(target)])
+
+@event.listens_for(SalesRecord, "before_update")
+def _rollup_updated(mapper, connection, target: SalesRecord) -> None:
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes()
+               for name in ["sales_date"] + GRAIN + ["sales_amount", "quantity"]):
+        return
+    _remove_stored(connection, target)
+    connection.execute(_merge_statement(), [_record_row(target)])
+
+@event.listens_for(SalesRecord, "before_delete")
+def _rollup_deleted(mapper, connection, target: SalesRecord) -> None:
+    _remove_stored(connection, target)
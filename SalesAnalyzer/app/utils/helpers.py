@@ -4,19 +4,29 @@
 import os
 import hashlib
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, BinaryIO, Union
 
 def validate_file_extension(filename: str, allowed_extensions: List[str]) -> bool:
     """验证文件扩展名"""
     return any(filename.lower().endswith(ext.lower()) for ext in allowed_extensions)
 
-def generate_file_hash(file_path: str) -> str:
-    """生成文件哈希值"""
-    hash_md5 = hashlib.md5()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+def generate_file_hash(file: Union[str, BinaryIO], algorithm: str = "md5", chunk_size: int = 1024 * 1024) -> str:
+    """生成文件哈希值
+
+    file 可以是文件路径或可定位的二进制文件对象，文件对象读取后恢复原位置。
+    """
+    hasher = hashlib.new(algorithm)
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                hasher.update(chunk)
+    else:
+        position = file.tell()
+        file.seek(0)
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            hasher.update(chunk)
+        file.seek(position)
+    return hasher.hexdigest()
 
 def format_currency(amount: float) -> str:
     """格式化货币显示"""
@@ -0,0 +1,201 @@
+"""
+查询计划检查工具
+
+通过测试客户端依次调用分析和列表接口（以及 DataProcessor.get_sales_statistics 和读取明细的日趋势），
+捕获实际执行的 SELECT 语句，对每条语句运行 EXPLAIN QUERY PLAN，标记全表扫描和临时B树排序。
+用法: python -m app.utils.query_advisor [--database sqlite:///./sales_analyzer.db] [--analyze]
+有需要关注的问题时退出码为 1，可用于 CI。
+"""
+import argparse
+import re
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Tuple
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+# 问题级别：warning 需要关注；info 为当前查询形态下无法避免的开销（如整表汇总、对分组结果排序）
+WARNING = "warning"
+INFO = "info"
+
+# 汇总表的行数取决于天数和维度组合数，与明细行数无关，全表扫描和分组排序只作提示
+SUMMARY_TABLES = {"sales_daily_rollup"}
+
+_SCAN = re.compile(r"^SCAN (\w+)(?: USING (COVERING )?INDEX (\w+))?")
+_TEMP_BTREE = re.compile(r"^USE TEMP B-TREE FOR (.+)$")
+
+def explain(connection, statement: str, parameters=()) -> List[str]:
+    """返回语句的 EXPLAIN QUERY PLAN 明细行"""
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return [row[-1] for row in rows]
+
+def plan_issues(statement: str, plan: List[str]) -> List[Tuple[str, str]]:
+    """从执行计划中找出全表扫描和临时B树排序，返回 [(级别, 说明)]"""
+    grouped = re.search(r"\bGROUP BY\b", statement, re.IGNORECASE) is not None
+    summary = any(re.search(rf"\bFROM {table}\b", statement) for table in SUMMARY_TABLES)
+    issues = []
+    for detail in plan:
+        scan = _SCAN.match(detail)
+        if scan:
+            table, covering, index = scan.groups()
+            if table in SUMMARY_TABLES:
+                issues.append((INFO, f"汇总表全扫描 {table}"))
+            elif index is None:
+                issues.append((WARNING, f"全表扫描 {table}"))
+            elif covering:
+                issues.append((INFO, f"覆盖索引全扫描 {table}（{index}）"))
+            else:
+                issues.append((WARNING, f"按索引 {index} 扫描 {table} 全部行并回表"))
+            continue
+        temp = _TEMP_BTREE.match(detail)
+        if temp:
+            purpose = temp.group(1)
+            if purpose == "ORDER BY" and grouped:
+                issues.append((INFO, "临时B树排序分组结果"))
+            elif summary:
+                issues.append((INFO, f"汇总表临时B树排序（{purpose}）"))
+            else:
+                issues.append((WARNING, f"临时B树排序（{purpose}）"))
+    return issues
+
+@contextmanager
+def capture_selects(engine: Engine) -> Iterator[List[Tuple[str, tuple]]]:
+    """记录上下文中在 engine 上执行的 SELECT 语句及参数"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def _sample_filters(db: Session) -> Dict[str, str]:
+    """从数据中取过滤参数：出现最多的区域和类别、最近30天的日期范围"""
+    from app.models.sales import SalesRecord
+
+    def most_common(column, default):
+        return db.query(column).group_by(column).order_by(func.count().desc()).limit(1).scalar() or default
+
+    latest = db.query(func.max(SalesRecord.sales_date)).scalar() or datetime.now()
+    if isinstance(latest, str):
+        latest = datetime.fromisoformat(latest)
+    return {
+        "region": most_common(SalesRecord.region, "北京"),
+        "category": most_common(SalesRecord.category, "电子产品"),
+        "start_date": (latest - timedelta(days=30)).strftime("%Y-%m-%d"),
+        "end_date": latest.strftime("%Y-%m-%d"),
+    }
+
+def workload(client, db: Session, filters: Dict[str, str]) -> List[Tuple[str, Callable[[], object]]]:
+    """被检查的查询：[(名称, 执行函数)]"""
+    from app.services.data_processor import DataProcessor, daily_sales
+
+    date_range = {"start_date": filters["start_date"], "end_date": filters["end_date"]}
+    requests = [
+        ("/api/v1/analytics/top-products", {}),
+        ("/api/v1/analytics/top-regions", {}),
+        ("/api/v1/analytics/sales-trend", {}),
+        ("/api/v1/analytics/sales-trend", date_range),
+        ("/api/v1/sales/", {}),
+        ("/api/v1/sales/", {"region": filters["region"]}),
+        ("/api/v1/sales/", {"category": filters["category"]}),
+        ("/api/v1/sales/", {"region": filters["region"], "category": filters["category"]}),
+        ("/api/v1/sales/statistics/summary", {}),
+    ]
+    steps = []
+    for path, params in requests:
+        query = "&".join(f"{key}={value}" for key, value in params.items())
+        name = f"GET {path}" + (f"?{query}" if query else "")
+        steps.append((name, lambda path=path, params=params: client.get(path, params=params).raise_for_status()))
+    for params in (date_range, {"region": filters["region"]}):
+        steps.append((
+            f"DataProcessor.get_sales_statistics({params})",
+            lambda params=params: DataProcessor(db).get_sales_statistics(params)
+        ))
+    # 带时间的日期范围无法在汇总粒度上表达，读取明细表（如 /sales/trend）
+    start, end = (datetime.fromisoformat(filters[key]) + timedelta(hours=12) for key in ("start_date", "end_date"))
+    steps.append(("daily_sales(明细)", lambda: daily_sales(db, start, end)))
+    return steps
+
+def advise(engine: Engine) -> List[dict]:
+    """执行 workload 中的每个查询，返回各条 SELECT 语句的执行计划和问题（检查期间关闭响应缓存）"""
+    from fastapi.testclient import TestClient
+    from app.core.config import settings
+    from app.core.database import get_db
+    from app.main import app
+
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    cache_size = settings.RESPONSE_CACHE_SIZE
+    settings.RESPONSE_CACHE_SIZE = 0
+    db = session_factory()
+    report = []
+    try:
+        client = TestClient(app)
+        for name, run in workload(client, db, _sample_filters(db)):
+            with capture_selects(engine) as statements:
+                run()
+            with engine.connect() as connection:
+                for statement, parameters in statements:
+                    plan = explain(connection, statement, parameters)
+                    report.append({
+                        "query": name,
+                        "statement": " ".join(statement.split()),
+                        "plan": plan,
+                        "issues": plan_issues(statement, plan),
+                    })
+    finally:
+        db.close()
+        settings.RESPONSE_CACHE_SIZE = cache_size
+        if previous is None:
+            app.dependency_overrides.pop(get_db, None)
+        else:
+            app.dependency_overrides[get_db] = previous
+    return report
+
+def main():
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="检查分析和列表查询的执行计划")
+    parser.add_argument("--database", default=settings.DATABASE_URL, help="数据库URL")
+    parser.add_argument("--analyze", action="store_true", help="检查前先执行 ANALYZE 更新统计信息")
+    parser.add_argument("--verbose", action="store_true", help="同时输出没有问题的语句")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database)
+    if args.analyze:
+        with engine.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+    warnings = 0
+    for entry in advise(engine):
+        levels = {level for level, _ in entry["issues"]}
+        warnings += sum(level == WARNING for level, _ in entry["issues"])
+        if not args.verbose and WARNING not in levels:
+            continue
+        print(f"[{'需关注' if WARNING in levels else '正常'}] {entry['query']}")
+        print(f"    {entry['statement']}")
+        for detail in entry["plan"]:
+            print(f"    | {detail}")
+        for level, message in entry["issues"]:
+            print(f"    - {level}: {message}")
+    engine.dispose()
+    print(f"共发现 {warnings} 个需要关注的问题")
+    sys.exit(1 if warnings else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+列表接口的快速JSON序列化
+
+列表接口按列投影查询，结果行组装为字典后直接序列化，不经过 Pydantic 逐行校验和 jsonable_encoder。
+安装 orjson（可选依赖）时使用 orjson，原生支持 datetime 且比标准库快数倍；否则退回标准库 json，
+两者输出一致（datetime 为 ISO 8601，微秒为0时省略，非ASCII字符不转义）。
+"""
+import json
+from datetime import date, datetime
+from typing import Iterable, Iterator, List, Sequence
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content) -> bytes:
+    """序列化为UTF-8编码的JSON"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+def rows_to_dicts(names: Sequence[str], rows: Iterable[Sequence]) -> List[dict]:
+    """按列名把结果行组装为字典"""
+    return [dict(zip(names, row)) for row in rows]
+
+def ndjson_chunks(names: Sequence[str], rows: Iterable[Sequence], batch_size: int = 1000) -> Iterator[bytes]:
+    """逐行序列化为 NDJSON（每行一个对象），每 batch_size 行合并为一块发送"""
+    lines = []
+    for row in rows:
+        lines.append(dumps(dict(zip(names, row))))
+        if len(lines) >= batch_size:
+            yield b"\n".join(lines) + b"\n"
+            lines.clear()
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+class FastJSONResponse(Response):
+    """用 dumps 序列化内容的JSON响应"""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,121 @@
+"""
+流式数据管道工具
+"""
+import io
+import hashlib
+import tempfile
+import threading
+from typing import BinaryIO, Optional
+
+class SpooledPipe(io.RawIOBase):
+    """单生产者/单消费者的字节管道
+
+    生产者（如读取请求体的事件循环）调用 write() 追加数据，从不阻塞；
+    消费者（如解析线程）以普通只读文件对象的方式读取，无数据时阻塞等待。
+    未读数据不超过 spool_threshold 时只保存在内存中，超过后新数据溢出到临时文件，
+    消费者追上后临时文件清空、重新回到内存模式。
+    """
+
+    def __init__(self, spool_threshold: int):
+        super().__init__()
+        self.spool_threshold = spool_threshold
+        self._buffer = bytearray()
+        self._file = None
+        self._file_read_pos = 0
+        self._file_write_pos = 0
+        self._bytes_read = 0
+        self._writer_closed = False
+        self._error = None
+        self._condition = threading.Condition()
+        self.spilled = False
+
+    def readable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        """追加数据（生产者调用）"""
+        with self._condition:
+            if self._writer_closed:
+                raise ValueError("管道写入端已关闭")
+            if self._file_write_pos > self._file_read_pos or len(self._buffer) + len(data) > self.spool_threshold:
+                # 临时文件中仍有未读数据时继续写入文件，保证读取顺序
+                if self._file is None:
+                    self._file = tempfile.TemporaryFile()
+                    self.spilled = True
+                self._file.seek(self._file_write_pos)
+                self._file.write(data)
+                self._file_write_pos += len(data)
+            else:
+                self._buffer.extend(data)
+            self._condition.notify_all()
+        return len(data)
+
+    def close_writer(self, error: Optional[BaseException] = None) -> None:
+        """关闭写入端；error 不为空时消费者读取将抛出异常。重复调用时保留首次的结果"""
+        with self._condition:
+            if self._writer_closed:
+                return
+            self._writer_closed = True
+            self._error = error
+            self._condition.notify_all()
+
+    def readinto(self, b) -> int:
+        """读取数据（消费者调用），无数据时阻塞直到有新数据或写入端关闭"""
+        with self._condition:
+            while not self._buffer and self._file_read_pos == self._file_write_pos:
+                if self._error is not None:
+                    raise IOError(f"上传数据流中断: {self._error}")
+                if self._writer_closed:
+                    return 0
+                self._condition.wait()
+
+            if self._buffer:
+                size = min(len(b), len(self._buffer))
+                b[:size] = self._buffer[:size]
+                del self._buffer[:size]
+            else:
+                self._file.seek(self._file_read_pos)
+                size = self._file.readinto(memoryview(b)[:self._file_write_pos - self._file_read_pos])
+                self._file_read_pos += size
+                if self._file_read_pos == self._file_write_pos:
+                    # 消费者已追上，回收临时文件空间
+                    self._file.truncate(0)
+                    self._file_read_pos = self._file_write_pos = 0
+
+            self._bytes_read += size
+            return size
+
+    def tell(self) -> int:
+        """消费者已读取的字节数"""
+        return self._bytes_read
+
+    def close(self) -> None:
+        with self._condition:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        super().close()
+
+class HashingReader(io.RawIOBase):
+    """边读取边计算内容哈希的只读包装，用于无法预先读取的不可定位流"""
+
+    def __init__(self, stream: BinaryIO, algorithm: str = "sha256"):
+        super().__init__()
+        self._stream = stream
+        self._hasher = hashlib.new(algorithm)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        size = self._stream.readinto(b)
+        if size:
+            self._hasher.update(memoryview(b)[:size])
+        return size
+
+    def tell(self) -> int:
+        return self._stream.tell()
+
+    def hexdigest(self) -> str:
+        """已读取内容的哈希值（读取到末尾后即为整个流的哈希）"""
+        return self._hasher.hexdigest()
@@ -0,0 +1,87 @@
+"""
+内存列式存储基准测试
+
+先把 N 行生成数据导入临时数据库（或用 --db 指定已有数据库），再对比分析查询在三种来源上的延迟（毫秒，取中位数）：
+- detail: 扫描 sales_records（SALES_ROLLUP=false）
+- rollup: 读取汇总表 sales_daily_rollup
+- column_store: 内存列式存储（COLUMN_STORE=true）
+另报告列式存储的全量加载耗时、行数和容量占用。
+用法: python benchmarks/bench_column_store.py [--rows 1m] [--db path/to/sales.db] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_export import load_database
+from benchmarks.generate_data import parse_rows
+
+SOURCES = ["detail", "rollup", "column_store"]
+
+def queries(db):
+    """(名称, 查询) 列表，覆盖仪表盘和统计接口使用的查询"""
+    from app.services.dashboard import dashboard_summary
+    from app.services.data_processor import DataProcessor, daily_sales, sales_totals, top_sales
+
+    return [
+        ("sales_totals", lambda: sales_totals(db)),
+        ("top_products", lambda: top_sales(db, "product_name", ["total_sales", "total_quantity", "order_count"], 10)),
+        ("category_stats", lambda: top_sales(db, "category", ["total_sales", "order_count", "total_quantity"], None)),
+        ("trend_90d", lambda: daily_sales(db, "2024-04-01", "2024-06-30")),
+        ("statistics_filtered", lambda: DataProcessor(db).get_sales_statistics(
+            {"start_date": "2024-03-01", "end_date": "2024-06-30", "region": "北京"}
+        )),
+        ("dashboard", lambda: dashboard_summary(db)),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="内存列式存储基准测试")
+    parser.add_argument("--rows", default="1m", help="生成数据行数，支持 10k / 1m / 10m")
+    parser.add_argument("--db", help="使用已有的数据库文件，不生成数据")
+    parser.add_argument("--repeat", type=int, default=5, help="每个查询的重复次数")
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.config import settings
+    from app.services.column_store import column_store
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        if not db_path:
+            db_path = os.path.join(tmp, "bench.db")
+            print(f"生成并导入 {args.rows} 行数据")
+            load_database(db_path, parse_rows(args.rows))
+
+        engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+        db = sessionmaker(bind=engine)()
+        settings.COLUMN_STORE = True
+        started = time.perf_counter()
+        column_store.load(engine)
+        print({"load_seconds": round(time.perf_counter() - started, 2), **column_store.stats()})
+
+        results = {}
+        for source in SOURCES:
+            settings.COLUMN_STORE = source == "column_store"
+            settings.SALES_ROLLUP = source != "detail"
+            for name, query in queries(db):
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    query()
+                    timings.append((time.perf_counter() - started) * 1000)
+                    db.rollback()
+                results.setdefault(name, {})[source] = round(statistics.median(timings), 2)
+        for name, timings in results.items():
+            print({"query": name, **timings})
+        db.close()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
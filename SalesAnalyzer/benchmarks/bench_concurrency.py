@@ -0,0 +1,165 @@
+"""
+接口并发基准测试
+
+以子进程启动 uvicorn（单进程），用 httpx 异步客户端在不同并发数下发送混合请求，报告吞吐（请求/秒）
+和 p50/p99 延迟。请求按顺序轮流为：
+- health: GET /health，不访问数据库
+- summary: GET /api/v1/sales/statistics/summary，命中响应缓存
+- top_products: GET /api/v1/analytics/top-products，命中响应缓存
+- slow_list: GET /api/v1/sales/?skip=<随机偏移>&limit=1000，偏移分页需要扫描，较慢
+fast_p99_ms 只统计前三种请求，反映慢查询是否拖慢其他请求；errors 为失败的请求数（如连接池等待超时），计入延迟。
+指定 --baseline-ref 时先在该 git 版本的临时工作树中启动服务测一遍作为对照。
+用法: python benchmarks/bench_concurrency.py [--db path/to/sales.db] [--concurrency 1 16 64] [--baseline-ref HEAD~1]
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+# 添加项目根目录到Python路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_export import load_database
+from benchmarks.generate_data import parse_rows
+
+KINDS = ["health", "summary", "top_products", "slow_list"]
+SLOW_PAGE_SIZE = 1000
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _percentile(values: List[float], percent: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+def start_server(code_root: str, db_path: str, workdir: str, port: int) -> subprocess.Popen:
+    """在 workdir 中启动服务（配置中的数据库路径是相对路径，workdir 下放数据库的符号链接）"""
+    os.symlink(os.path.abspath(db_path), os.path.join(workdir, "sales_analyzer.db"))
+    env = {**os.environ, "PYTHONPATH": code_root}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env
+    )
+    import httpx
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("服务启动超时")
+
+def request_path(kind: str, rng: random.Random, rows: int) -> str:
+    if kind == "health":
+        return "/health"
+    if kind == "summary":
+        return "/api/v1/sales/statistics/summary"
+    if kind == "top_products":
+        return "/api/v1/analytics/top-products"
+    return f"/api/v1/sales/?skip={rng.randrange(max(rows - SLOW_PAGE_SIZE, 1))}&limit={SLOW_PAGE_SIZE}"
+
+async def run_level(port: int, concurrency: int, total: int, rows: int) -> dict:
+    """concurrency 个客户端并发发送共 total 个请求"""
+    import httpx
+
+    rng = random.Random(42)
+    paths = [(KINDS[i % len(KINDS)], request_path(KINDS[i % len(KINDS)], rng, rows)) for i in range(total)]
+    latencies = {kind: [] for kind in KINDS}
+    next_index = 0
+    errors = 0
+
+    async def worker(client):
+        nonlocal next_index, errors
+        while next_index < len(paths):
+            kind, path = paths[next_index]
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                failed = (await client.get(path)).status_code != 200
+            except httpx.HTTPError:
+                failed = True
+            latencies[kind].append(time.perf_counter() - start)
+            errors += failed
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=300) as client:
+        # 预热：填充响应缓存
+        for kind in KINDS[:3]:
+            await client.get(request_path(kind, rng, rows))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    everything = [value for values in latencies.values() for value in values]
+    fast = [value for kind in KINDS[:3] for value in latencies[kind]]
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "requests_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(_percentile(everything, 50) * 1000, 1),
+        "p99_ms": round(_percentile(everything, 99) * 1000, 1),
+        "fast_p50_ms": round(_percentile(fast, 50) * 1000, 1),
+        "fast_p99_ms": round(_percentile(fast, 99) * 1000, 1),
+        "slow_p50_ms": round(_percentile(latencies["slow_list"], 50) * 1000, 1),
+    }
+
+def measure(label: str, code_root: str, db_path: str, args) -> None:
+    """启动一个服务，依次测量各并发数"""
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT COUNT(*) FROM sales_records").fetchone()[0]
+    with tempfile.TemporaryDirectory() as workdir:
+        port = _free_port()
+        server = start_server(code_root, db_path, workdir, port)
+        try:
+            for concurrency in args.concurrency:
+                total = max(args.requests, concurrency * 4)
+                print({"code": label, **asyncio.run(run_level(port, concurrency, total, rows))}, flush=True)
+        finally:
+            server.terminate()
+            server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="接口并发基准测试")
+    parser.add_argument("--db", help="使用已有的数据库文件；不指定时生成数据")
+    parser.add_argument("--rows", default="200k", help="未指定 --db 时生成的数据行数")
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 16, 64], help="并发客户端数")
+    parser.add_argument("--requests", type=int, default=200, help="每个并发数下的请求总数")
+    parser.add_argument("--baseline-ref", help="对照的 git 版本，在临时工作树中启动")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        if not db_path:
+            db_path = os.path.join(tmp, "bench.db")
+            print(f"生成并导入 {args.rows} 行数据")
+            load_database(db_path, parse_rows(args.rows))
+        if args.baseline_ref:
+            worktree = os.path.join(tmp, "baseline")
+            prefix = subprocess.run(
+                ["git", "rev-parse", "--show-prefix"], cwd=ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+            subprocess.run(
+                ["git", "worktree", "add", "--detach", worktree, args.baseline_ref], cwd=ROOT,
+                capture_output=True, check=True
+            )
+            try:
+                measure(args.baseline_ref, os.path.join(worktree, prefix), db_path, args)
+            finally:
+                subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=ROOT, capture_output=True)
+        measure("current", ROOT, db_path, args)
+
+if __name__ == "__main__":
+    main()
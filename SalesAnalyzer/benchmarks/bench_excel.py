@@ -0,0 +1,82 @@
+"""
+Excel读取方式基准测试
+
+对比 openpyxl 只读逐行分块读取（iter_excel_chunks）与 pd.read_excel 整表读取的耗时和峰值内存。
+每种方式在独立子进程中运行，峰值RSS互不影响。只测读取和清洗，不写数据库。
+用法: python benchmarks/bench_excel.py [--rows 300000] [--xlsx 已有文件.xlsx]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def write_xlsx(rows: int, path: str) -> None:
+    """以 openpyxl 只写模式生成测试工作簿"""
+    from openpyxl import Workbook
+    from benchmarks.generate_data import generate_sales_data
+
+    df = generate_sales_data(rows)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(list(df.columns))
+    for row in df.itertuples(index=False):
+        sheet.append(list(row))
+    workbook.save(path)
+
+def measure(mode: str, path: str) -> dict:
+    """在当前进程中读取一次并返回耗时、行数和峰值RSS"""
+    import pandas as pd
+    from app.services.data_processor import clean_sales_data
+    from app.services.excel_import import iter_excel_chunks
+
+    start = time.perf_counter()
+    rows = 0
+    if mode == "iter_rows":
+        for chunk in iter_excel_chunks(path, os.path.basename(path)):
+            rows += len(clean_sales_data(chunk))
+    else:
+        rows = len(clean_sales_data(pd.read_excel(path)))
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "rows": rows,
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(rows / elapsed) if elapsed else 0,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel读取方式基准测试")
+    parser.add_argument("--rows", type=int, default=300000, help="生成的工作簿行数")
+    parser.add_argument("--xlsx", help="使用已有的工作簿，不再生成")
+    parser.add_argument("--mode", choices=["iter_rows", "read_excel"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # 子进程：只测一种方式
+        print(json.dumps(measure(args.mode, args.xlsx)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.xlsx
+        if path is None:
+            path = os.path.join(tmp, "bench.xlsx")
+            write_xlsx(args.rows, path)
+        print(f"工作簿: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        for mode in ("iter_rows", "read_excel"):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode, "--xlsx", path],
+                capture_output=True, text=True, check=True, cwd=ROOT
+            ).stdout
+            print(output.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+销售数据导出基准测试
+
+先把 N 行生成数据导入临时数据库（或用 --db 指定已有数据库），再对比导出方式的吞吐（MB/s）和峰值RSS：
+- stream_csv: GET /api/v1/sales/export，按批读取游标、边编码边发送
+- stream_gzip: GET /api/v1/sales/export?gzip=true
+- stream_csv_filtered: 同 stream_csv，加上日期范围和区域过滤
+- stream_arrow / stream_parquet: GET /api/v1/sales/export?format=arrow|parquet
+- buffered: 原 /sales/export 的写法（ORM 查询全部记录，整个文件写入 StringIO 后再复制到 BytesIO），对照组
+- dataframe_parquet: 客户端视角，下载 Parquet 并读入 pandas DataFrame 的总耗时
+- dataframe_json_pages: 对照组，按游标逐页读取 /api/v1/sales/ 的JSON（每页 JSON_PAGE_SIZE 行）拼成 DataFrame
+
+每种方式在独立子进程中运行，峰值RSS互不影响；吞吐按响应体字节数计算（gzip 为压缩后大小）。
+直接以 ASGI 调用应用，流式导出收到即丢弃响应体（TestClient 会在内存中缓存整个响应体，峰值RSS不准确）；
+dataframe_* 保留响应体并构造 DataFrame，峰值RSS包含客户端的内存占用。
+用法: python benchmarks/bench_export.py [--rows 1m] [--db path/to/sales.db] [--modes ...]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional, Tuple
+
+# 添加项目根目录到Python路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_suite import _peak_rss_mb
+from benchmarks.generate_data import parse_rows, write_sales_csv
+
+MODES = [
+    "stream_csv", "stream_gzip", "stream_csv_filtered", "stream_arrow", "stream_parquet", "buffered",
+    "dataframe_parquet", "dataframe_json_pages",
+]
+FILTERS = {"start_date": "2024-03-01", "end_date": "2024-06-30", "region": "北京"}
+JSON_PAGE_SIZE = 10000
+
+def buffered_export(db) -> bytes:
+    """改为流式导出前 /sales/export 的写法"""
+    import csv
+    import io
+    from app.models.sales import SalesRecord
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow([
+        'ID', '订单ID', '产品名称', '分类', '客户名称', '区域',
+        '销售金额', '数量', '单价', '销售日期', '销售人员', '支付方式'
+    ])
+    for record in db.query(SalesRecord).all():
+        writer.writerow([
+            record.id, record.order_id, record.product_name, record.category,
+            record.customer_name, record.region, record.sales_amount, record.quantity,
+            record.unit_price, record.sales_date.strftime('%Y-%m-%d') if record.sales_date else '',
+            record.sales_person, record.payment_method
+        ])
+    return io.BytesIO(output.getvalue().encode('utf-8')).getvalue()
+
+async def asgi_get(app, path: str, params: dict, body: Optional[list] = None) -> Tuple[int, dict]:
+    """以 ASGI 调用 GET 请求，返回 (响应体字节数, 响应头)；传入 body 列表时保留响应体"""
+    from urllib.parse import urlencode
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": urlencode(params).encode(), "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    size = 0
+    status = None
+    headers = {}
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            # 响应发送完之前客户端不会断开，StreamingResponse 监听断开时在此等待
+            await asyncio.Event().wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal size, status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            headers.update((key.decode(), value.decode()) for key, value in message["headers"])
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+            if body is not None:
+                body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    if status != 200:
+        raise RuntimeError(f"请求失败，状态码 {status}")
+    return size, headers
+
+def load_dataframe(app, mode: str) -> Tuple[int, int]:
+    """按客户端的方式把全部记录读入 DataFrame，返回 (下载字节数, 行数)"""
+    import io
+    import pandas as pd
+
+    if mode == "dataframe_parquet":
+        body = []
+        size, _ = asyncio.run(asgi_get(app, "/api/v1/sales/export", {"format": "parquet"}, body))
+        return size, len(pd.read_parquet(io.BytesIO(b"".join(body))))
+
+    size, frames, cursor = 0, [], ""
+    while cursor is not None:
+        body = []
+        page_size, headers = asyncio.run(
+            asgi_get(app, "/api/v1/sales/", {"cursor": cursor, "limit": JSON_PAGE_SIZE}, body)
+        )
+        size += page_size
+        frames.append(pd.DataFrame(json.loads(b"".join(body))))
+        cursor = headers.get("x-next-cursor")
+    df = pd.concat(frames, ignore_index=True)
+    df["sales_date"] = pd.to_datetime(df["sales_date"])
+    return size, len(df)
+
+def measure(mode: str, db_path: str) -> dict:
+    """在当前进程中按一种方式导出一次，返回字节数、耗时、吞吐和峰值RSS"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import get_db
+    from app.main import app
+
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    baseline_rss = _peak_rss_mb()
+    size = 0
+    rows = None
+    start = time.perf_counter()
+    if mode.startswith("dataframe_"):
+        size, rows = load_dataframe(app, mode)
+    elif mode == "buffered":
+        db = session_factory()
+        try:
+            size = len(buffered_export(db))
+        finally:
+            db.close()
+    else:
+        params = dict(FILTERS) if mode == "stream_csv_filtered" else {}
+        params["gzip"] = str(mode == "stream_gzip").lower()
+        if mode in ("stream_arrow", "stream_parquet"):
+            params["format"] = mode.split("_", 1)[1]
+        size, _ = asyncio.run(asgi_get(app, "/api/v1/sales/export", params))
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+
+    report = {
+        "mode": mode,
+        "bytes_mb": round(size / 1024 / 1024, 1),
+        "seconds": round(elapsed, 2),
+        "mb_per_sec": round(size / 1024 / 1024 / elapsed, 1) if elapsed else 0,
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    if rows is not None:
+        report["dataframe_rows"] = rows
+    return report
+
+def load_database(db_path: str, rows: int) -> None:
+    """生成 rows 行数据并以大批量导入模式写入新数据库"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    from app.models import sales  # noqa: F401 注册模型表
+    from app.services.data_processor import DataProcessor
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    csv_path = db_path + ".csv"
+    write_sales_csv(csv_path, rows, 42, skewed=True)
+    db = sessionmaker(bind=engine)()
+    try:
+        DataProcessor(db).process_csv_file(csv_path, "bench.csv", bulk_load=True)
+    finally:
+        db.close()
+        engine.dispose()
+        os.remove(csv_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="销售数据导出基准测试")
+    parser.add_argument("--rows", default="1m", help="生成数据行数，支持 10k / 1m / 10m")
+    parser.add_argument("--db", help="使用已有的数据库文件，不生成数据")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES, help="对比的导出方式")
+    parser.add_argument("--measure", nargs=2, metavar=("MODE", "DB"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        # 子进程：只测一种方式
+        print(json.dumps(measure(*args.measure)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        if not db_path:
+            db_path = os.path.join(tmp, "bench.db")
+            print(f"生成并导入 {args.rows} 行数据")
+            load_database(db_path, parse_rows(args.rows))
+        for mode in args.modes:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--measure", mode, db_path],
+                capture_output=True, text=True, cwd=ROOT
+            )
+            if output.returncode != 0:
+                print({"mode": mode, "error": output.stderr.strip().splitlines()[-1:]})
+            else:
+                print(json.loads(output.stdout.strip().splitlines()[-1]))
+
+if __name__ == "__main__":
+    main()
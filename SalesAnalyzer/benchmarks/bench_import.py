@@ -0,0 +1,50 @@
+"""
+CSV导入吞吐基准测试
+
+用法: python benchmarks/bench_import.py data.csv [--streaming]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.services.data_processor import DataProcessor
+
+def run(csv_path: str, streaming: bool) -> dict:
+    """在临时SQLite数据库中导入一次并计时"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            start = time.perf_counter()
+            result = DataProcessor(db).process_csv_file(csv_path, os.path.basename(csv_path), streaming=streaming)
+            elapsed = time.perf_counter() - start
+        finally:
+            db.close()
+            engine.dispose()
+
+    return {
+        "success": result.success,
+        "records_imported": result.records_imported,
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(result.records_imported / elapsed) if elapsed else 0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV导入吞吐基准测试")
+    parser.add_argument("csv_path", help="CSV文件路径")
+    parser.add_argument("--streaming", action="store_true", help="使用分块流式导入")
+    args = parser.parse_args()
+
+    print(run(args.csv_path, args.streaming))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+销售记录列表接口基准测试（大 limit 请求）
+
+对比列表接口在不同 limit 下的延迟和峰值RSS：
+- legacy_schema: 改为按列投影前的 GET /api/v1/sales/（ORM 对象经 List[SalesRecordSchema] 响应模型校验后编码），对照组
+- legacy_dicts: 改为按列投影前的 /sales/list（ORM 对象逐个拼字典，再经 jsonable_encoder 编码），对照组
+- json: GET /api/v1/sales/，按列投影、直接序列化结果行
+- ndjson: GET /api/v1/sales/?format=ndjson，边读取边逐行发送
+- simple_json: 简化版 GET /sales/list?limit=
+
+每个 (方式, limit) 组合在独立子进程中运行，直接以 ASGI 调用应用、收到即丢弃响应体。
+用法: python benchmarks/bench_listing.py --db path/to/sales.db [--limits 10000 100000 500000] [--modes ...]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+# 添加项目根目录到Python路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_export import asgi_get, load_database
+from benchmarks.bench_suite import _peak_rss_mb
+
+MODES = ["legacy_schema", "legacy_dicts", "json", "ndjson", "simple_json"]
+
+def add_legacy_routes(app) -> None:
+    """注册改为按列投影前的两种列表写法"""
+    from typing import List
+    from fastapi import Depends
+    from sqlalchemy.orm import Session
+    from app.core.database import get_db
+    from app.models.sales import SalesRecord
+    from app.schemas.sales import SalesRecord as SalesRecordSchema
+
+    @app.get("/bench/legacy-schema", response_model=List[SalesRecordSchema])
+    async def legacy_schema(limit: int = 100, db: Session = Depends(get_db)):
+        return db.query(SalesRecord).offset(0).limit(limit).all()
+
+    @app.get("/bench/legacy-dicts")
+    async def legacy_dicts(limit: int = 100, db: Session = Depends(get_db)):
+        return [
+            {
+                "id": record.id,
+                "order_id": record.order_id,
+                "product_name": record.product_name,
+                "category": record.category,
+                "customer_name": record.customer_name,
+                "region": record.region,
+                "sales_amount": record.sales_amount,
+                "quantity": record.quantity,
+                "unit_price": record.unit_price,
+                "sales_date": record.sales_date.isoformat() if record.sales_date else None,
+                "sales_person": record.sales_person,
+                "payment_method": record.payment_method
+            }
+            for record in db.query(SalesRecord).limit(limit).all()
+        ]
+
+def measure(mode: str, limit: int, db_path: str) -> dict:
+    """在当前进程中按一种方式请求一次，返回响应大小、耗时和峰值RSS"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import get_db
+    from app.main import app
+    import simple_app
+
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    simple_app.app.dependency_overrides[simple_app.get_db] = override_get_db
+    add_legacy_routes(app)
+    target, path, params = {
+        "legacy_schema": (app, "/bench/legacy-schema", {}),
+        "legacy_dicts": (app, "/bench/legacy-dicts", {}),
+        "json": (app, "/api/v1/sales/", {}),
+        "ndjson": (app, "/api/v1/sales/", {"format": "ndjson"}),
+        "simple_json": (simple_app.app, "/sales/list", {}),
+    }[mode]
+    baseline_rss = _peak_rss_mb()
+    start = time.perf_counter()
+    size, _ = asyncio.run(asgi_get(target, path, {**params, "limit": limit}))
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+
+    return {
+        "mode": mode,
+        "limit": limit,
+        "bytes_mb": round(size / 1024 / 1024, 1),
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(limit / elapsed) if elapsed else 0,
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="销售记录列表接口基准测试")
+    parser.add_argument("--db", help="使用已有的数据库文件（行数应不少于最大 limit）；不指定时生成数据")
+    parser.add_argument("--rows", default="1m", help="未指定 --db 时生成的数据行数")
+    parser.add_argument("--limits", nargs="+", type=int, default=[10000, 100000, 500000], help="请求的 limit")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES, help="对比的写法")
+    parser.add_argument("--measure", nargs=3, metavar=("MODE", "LIMIT", "DB"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        # 子进程：只测一个组合
+        mode, limit, db_path = args.measure
+        print(json.dumps(measure(mode, int(limit), db_path)))
+        return
+
+    import tempfile
+    from benchmarks.generate_data import parse_rows
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        if not db_path:
+            db_path = os.path.join(tmp, "bench.db")
+            print(f"生成并导入 {args.rows} 行数据")
+            load_database(db_path, parse_rows(args.rows))
+        for limit in args.limits:
+            for mode in args.modes:
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--measure", mode, str(limit), db_path],
+                    capture_output=True, text=True, cwd=ROOT
+                )
+                if output.returncode != 0:
+                    print({"mode": mode, "limit": limit, "error": output.stderr.strip().splitlines()[-1:]})
+                else:
+                    print(json.loads(output.stdout.strip().splitlines()[-1]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+并行解析导入扩展性基准测试
+
+分别测量不同进程数下的纯解析清洗吞吐（不写库）与完整导入吞吐，
+并以同一文件的单进程流式导入作为基线。进程数超过CPU核数时不会有加速。
+用法: python benchmarks/bench_parallel.py data.csv [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.services.data_processor import DataProcessor
+from app.services.parallel_import import ParallelCsvReader
+
+def parse_only(csv_path: str, workers: int) -> dict:
+    """只做并行解析清洗，不写数据库"""
+    start = time.perf_counter()
+    rows = sum(len(columns["order_id"]) for columns, _ in ParallelCsvReader(csv_path, workers=workers))
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 2), "rows_per_sec": round(rows / elapsed)}
+
+def full_import(csv_path: str, workers: int = None) -> dict:
+    """并行解析 + 单写入方导入到临时SQLite数据库；workers 为空时做单进程流式导入"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            processor = DataProcessor(db)
+            start = time.perf_counter()
+            if workers is None:
+                result = processor.process_csv_file(csv_path, os.path.basename(csv_path), streaming=True)
+            else:
+                result = processor.process_csv_parallel(csv_path, os.path.basename(csv_path), workers=workers)
+            elapsed = time.perf_counter() - start
+        finally:
+            db.close()
+            engine.dispose()
+    return {"seconds": round(elapsed, 2), "rows_per_sec": round(result.records_imported / elapsed)}
+
+def main():
+    parser = argparse.ArgumentParser(description="并行解析导入扩展性基准测试")
+    parser.add_argument("csv_path", help="CSV文件路径")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="进程数列表")
+    args = parser.parse_args()
+
+    print(f"CPU核数: {os.cpu_count()}")
+    print({"streaming_baseline": full_import(args.csv_path)})
+    for workers in args.workers:
+        print({"workers": workers, "parse_only": parse_only(args.csv_path, workers),
+               "full_import": full_import(args.csv_path, workers)})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+导入吞吐基准测试套件
+
+按数据规模（默认 10k、1m，可加 10m）生成确定性的倾斜分布 + 脏数据销售CSV（缓存在 --data-dir），
+对每个导入入口分别测量吞吐（行/秒）、峰值RSS和导入后的数据库文件大小，结果写入JSON以便跨提交对比。
+每个（规模, 入口）组合在独立子进程和临时数据库中运行，峰值RSS互不影响。
+
+入口：
+- process_csv_file: DataProcessor.process_csv_file 整文件导入
+- process_csv_file_streaming: DataProcessor.process_csv_file(streaming=True)
+- process_csv_file_bulk: DataProcessor.process_csv_file(bulk_load=True)，大批量导入模式（计时含重建索引）
+- upload_csv: POST /api/v1/upload/csv（multipart表单，经完整ASGI栈）
+- upload_csv_background: POST /api/v1/upload/csv?background=true，计时到后台任务结束
+- upload_stream: POST /api/v1/upload/stream（原始请求体边收边导入）
+
+上传入口使用 TestClient 进程内调用，不含网络传输；为测量大文件，子进程内放宽 MAX_FILE_SIZE。
+用法: python benchmarks/bench_suite.py [--sizes 10k 1m 10m] [--targets ...] [--output results.json]
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# 添加项目根目录到Python路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.generate_data import parse_rows, write_sales_csv
+
+TARGETS = [
+    "process_csv_file",
+    "process_csv_file_streaming",
+    "process_csv_file_bulk",
+    "upload_csv",
+    "upload_csv_background",
+    "upload_stream",
+]
+
+def _peak_rss_mb() -> float:
+    # Linux 下 ru_maxrss 会继承父进程（生成数据时）的峰值，优先读取 exec 后重新计数的 VmHWM
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def _db_size(db_path: str) -> int:
+    return sum(os.path.getsize(path) for path in (db_path, db_path + "-wal") if os.path.exists(path))
+
+def measure(target: str, csv_path: str) -> dict:
+    """在当前进程中对一个入口导入一次，返回耗时、导入/跳过行数、峰值RSS和数据库大小"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.config import settings
+    from app.core.database import Base
+    from app.models import sales  # noqa: F401 注册模型表
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        settings.UPLOAD_DIR = os.path.join(tmp, "uploads")
+        os.makedirs(settings.UPLOAD_DIR)
+        settings.MAX_FILE_SIZE = max(settings.MAX_FILE_SIZE, os.path.getsize(csv_path) + 1)
+        # 应用和测试客户端的导入时间不计入耗时
+        importlib.import_module("app.services.data_processor")
+        if not target.startswith("process_csv_file"):
+            importlib.import_module("app.main")
+            importlib.import_module("fastapi.testclient")
+        baseline_rss = _peak_rss_mb()
+        try:
+            start = time.perf_counter()
+            if target.startswith("process_csv_file"):
+                result = _run_processor(session_factory, csv_path, target.rsplit("_", 1)[-1])
+            else:
+                result = _run_upload(session_factory, target, csv_path)
+            elapsed = time.perf_counter() - start
+        finally:
+            engine.dispose()
+        db_size = _db_size(db_path)
+
+    imported = result["records_imported"]
+    return {
+        "target": target,
+        "success": result["success"],
+        "records_imported": imported,
+        "records_skipped": result.get("records_skipped"),
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(imported / elapsed) if elapsed else 0,
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+        "db_size_mb": round(db_size / 1024 / 1024, 1),
+    }
+
+def _run_processor(session_factory, csv_path: str, mode: str) -> dict:
+    from app.services.data_processor import DataProcessor
+
+    db = session_factory()
+    try:
+        result = DataProcessor(db).process_csv_file(
+            csv_path, os.path.basename(csv_path), streaming=mode == "streaming", bulk_load=mode == "bulk"
+        )
+    finally:
+        db.close()
+    return result.model_dump()
+
+def _run_upload(session_factory, target: str, csv_path: str) -> dict:
+    from fastapi.testclient import TestClient
+    from app.core.database import get_db
+    from app.main import app
+    from app.services import import_jobs
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    import_jobs.SessionLocal = session_factory
+    client = TestClient(app)
+    filename = os.path.basename(csv_path)
+    with open(csv_path, "rb") as f:
+        if target == "upload_stream":
+            response = client.post(
+                "/api/v1/upload/stream", params={"filename": filename},
+                content=iter(lambda: f.read(1024 * 1024), b"")
+            )
+        else:
+            response = client.post(
+                "/api/v1/upload/csv", params={"background": target == "upload_csv_background"},
+                files={"file": (filename, f, "text/csv")}
+            )
+    response.raise_for_status()
+    result = response.json()
+    if result.get("job_id") is not None:
+        while True:
+            job = client.get(f"/api/v1/upload/jobs/{result['job_id']}").json()
+            if job["status"] not in ("queued", "processing"):
+                break
+            time.sleep(0.1)
+        result = {
+            "success": job["status"] == "success",
+            "records_imported": job["records_imported"],
+            "records_skipped": job["records_skipped"],
+        }
+    return result
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=ROOT
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def main():
+    parser = argparse.ArgumentParser(description="导入吞吐基准测试套件")
+    parser.add_argument("--sizes", nargs="+", default=["10k", "1m"], help="数据规模，支持 10k / 1m / 10m")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=TARGETS, help="测量的导入入口")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--dirty", type=float, default=0.02, help="脏数据行比例")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "sales_bench_data"),
+                        help="生成数据的缓存目录，参数相同的数据只生成一次")
+    parser.add_argument("--output", default="bench_results.json", help="结果JSON路径")
+    parser.add_argument("--measure", nargs=2, metavar=("TARGET", "CSV"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        # 子进程：只测一个组合
+        print(json.dumps(measure(*args.measure)))
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    results = []
+    for size in args.sizes:
+        rows = parse_rows(size)
+        csv_path = os.path.join(args.data_dir, f"sales_{rows}_seed{args.seed}_dirty{args.dirty}.csv")
+        if not os.path.exists(csv_path):
+            print(f"生成 {rows} 行数据: {csv_path}")
+            write_sales_csv(csv_path + ".tmp", rows, args.seed, skewed=True, dirty=args.dirty)
+            os.replace(csv_path + ".tmp", csv_path)
+        for target in args.targets:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--measure", target, csv_path],
+                capture_output=True, text=True, cwd=ROOT
+            )
+            if output.returncode != 0:
+                result = {"target": target, "success": False, "error": output.stderr.strip().splitlines()[-1:]}
+            else:
+                result = json.loads(output.stdout.strip().splitlines()[-1])
+            result.update(rows=rows, file_size_mb=round(os.path.getsize(csv_path) / 1024 / 1024, 1))
+            print(result)
+            results.append(result)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "dirty": args.dirty,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+
+if __name__ == "__main__":
+    main()
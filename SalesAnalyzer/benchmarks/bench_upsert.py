@@ -0,0 +1,105 @@
+"""
+按订单号增量合并（upsert）基准测试
+
+先导入 N 行基础数据，再导入一份与之重叠的增量文件（一部分订单内容变化、一部分为新订单、
+其余不变），对比三种写法：
+- append: 现有的追加写入（Core executemany，不去重，重叠订单会重复计数）
+- staging_merge: upsert=True，暂存表 + 集合式 UPDATE ... FROM / INSERT ... SELECT
+- orm_per_row: 逐行 SELECT 再更新、新订单 add_all（改为 Core 写入前的 ORM 方式）
+
+用法: python benchmarks/bench_upsert.py [--rows 100000] [--changed 0.1] [--new 0.1]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.sales import SalesRecord
+from app.services.data_processor import DataProcessor, clean_sales_data, to_sales_columns
+from benchmarks.generate_data import generate_sales_data
+
+def make_extract(rows: int, changed: float, new: float):
+    """生成基础数据，以及与之重叠的增量数据（末尾一部分订单数量变化，另追加一部分新订单）"""
+    base = generate_sales_data(rows, seed=1)
+    extract = base.copy()
+    changed_rows = int(rows * changed)
+    if changed_rows:
+        extract.loc[rows - changed_rows:, "quantity"] += 1
+    new_rows = generate_sales_data(int(rows * new), seed=2)
+    new_rows["order_id"] = "NEW" + new_rows["order_id"]
+    return base, pd.concat([extract, new_rows], ignore_index=True)
+
+def orm_per_row(db, csv_path: str) -> None:
+    """逐行查询后更新或新增（对照组）"""
+    columns = to_sales_columns(clean_sales_data(pd.read_csv(csv_path)))
+    keys = list(columns)
+    new_records = []
+    for values in zip(*columns.values()):
+        row = dict(zip(keys, values))
+        existing = db.query(SalesRecord).filter(SalesRecord.order_id == row["order_id"]).all()
+        if existing:
+            for record in existing:
+                for key, value in row.items():
+                    setattr(record, key, value)
+        else:
+            new_records.append(SalesRecord(**row))
+    db.add_all(new_records)
+    db.commit()
+
+def run(mode: str, base_csv: str, extract_csv: str) -> dict:
+    """在临时数据库中导入基础数据后，按指定方式导入增量数据并计时"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            processor = DataProcessor(db)
+            processor.process_csv_file(base_csv, "base.csv", streaming=True)
+            start = time.perf_counter()
+            if mode == "orm_per_row":
+                orm_per_row(db, extract_csv)
+                result = None
+            else:
+                result = processor.process_csv_file(
+                    extract_csv, "extract.csv", streaming=True, force=True, upsert=(mode == "staging_merge")
+                )
+            elapsed = time.perf_counter() - start
+            total_rows = db.query(SalesRecord).count()
+        finally:
+            db.close()
+            engine.dispose()
+
+    report = {"mode": mode, "seconds": round(elapsed, 2), "rows_after": total_rows}
+    if result is not None:
+        report.update(
+            inserted=result.records_inserted, updated=result.records_updated, unchanged=result.records_unchanged
+        )
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="按订单号增量合并基准测试")
+    parser.add_argument("--rows", type=int, default=100000, help="基础数据行数")
+    parser.add_argument("--changed", type=float, default=0.1, help="内容变化的订单比例")
+    parser.add_argument("--new", type=float, default=0.1, help="新订单比例")
+    parser.add_argument("--modes", nargs="+", default=["append", "staging_merge", "orm_per_row"], help="对比的写法")
+    args = parser.parse_args()
+
+    base, extract = make_extract(args.rows, args.changed, args.new)
+    with tempfile.TemporaryDirectory() as tmp:
+        base_csv = os.path.join(tmp, "base.csv")
+        extract_csv = os.path.join(tmp, "extract.csv")
+        base.to_csv(base_csv, index=False)
+        extract.to_csv(extract_csv, index=False)
+        for mode in args.modes:
+            print(run(mode, base_csv, extract_csv))
+
+if __name__ == "__main__":
+    main()
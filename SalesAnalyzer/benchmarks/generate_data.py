@@ -0,0 +1,120 @@
+"""
+基准测试用销售数据生成器
+
+同一组参数（行数、种子、分布、脏数据比例）总是生成相同的数据，便于跨提交对比。
+大数据量按分块生成并追加写入，内存占用与总行数无关。
+用法: python benchmarks/generate_data.py 1m data.csv --skewed --dirty 0.02
+"""
+import argparse
+import numpy as np
+import pandas as pd
+
+PRODUCTS = {
+    "笔记本电脑": "电子产品", "智能手机": "电子产品", "平板电脑": "电子产品",
+    "显示器": "电子产品", "耳机": "电子产品", "键盘": "电子产品", "鼠标": "电子产品",
+    "办公椅": "办公用品", "办公桌": "办公用品", "打印机": "办公用品",
+}
+REGIONS = ["北京", "上海", "广州", "深圳", "杭州", "南京", "成都", "武汉", "西安", "重庆"]
+SALES_PERSONS = ["李销售", "王销售", "赵销售", "钱销售", "孙销售", "吴销售", "郑销售"]
+PAYMENT_METHODS = ["信用卡", "支付宝", "微信支付", "银行转账"]
+
+# 倾斜分布的Zipf指数：少数热销产品和区域占大部分订单
+ZIPF_EXPONENT = 1.2
+# 脏数据类型，按顺序轮流注入：缺失字段、非数值金额、无效日期、与上一行完全重复
+DIRTY_KINDS = ("missing", "bad_amount", "bad_date", "duplicate")
+GENERATE_CHUNK_ROWS = 1000000
+
+def parse_rows(value: str) -> int:
+    """解析行数，支持 10k / 1m / 10m 这样的简写"""
+    value = value.strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+def _zipf_weights(n: int) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** ZIPF_EXPONENT
+    return weights / weights.sum()
+
+def generate_sales_data(
+    rows: int,
+    seed: int = 42,
+    skewed: bool = False,
+    dirty: float = 0.0,
+    start: int = 0
+) -> pd.DataFrame:
+    """生成与 sample_sales_data.csv 同列的确定性销售数据
+
+    skewed=True 时产品、区域和客户按Zipf分布倾斜；dirty 为注入脏数据行的比例，
+    这些行会被导入时的清洗规则丢弃。start 为订单号起始编号（分块生成时使用）。
+    """
+    rng = np.random.default_rng(seed)
+    products = np.array(list(PRODUCTS))
+    regions = np.array(REGIONS)
+    if skewed:
+        product = rng.choice(products, rows, p=_zipf_weights(len(products)))
+        region = rng.choice(regions, rows, p=_zipf_weights(len(regions)))
+        customer = np.minimum(rng.zipf(ZIPF_EXPONENT + 0.3, rows), 100000)
+    else:
+        product = products[rng.integers(0, len(products), rows)]
+        region = regions[rng.integers(0, len(regions), rows)]
+        customer = rng.integers(0, 100000, rows)
+    quantity = rng.integers(1, 10, rows)
+    unit_price = np.round(rng.uniform(10, 10000, rows), 2)
+
+    df = pd.DataFrame({
+        "order_id": [f"ORD{i:09d}" for i in range(start, start + rows)],
+        "product_name": product,
+        "category": [PRODUCTS[p] for p in product],
+        "customer_name": [f"客户{i}" for i in customer],
+        "region": region,
+        "sales_amount": np.round(quantity * unit_price, 2),
+        "quantity": quantity,
+        "unit_price": unit_price,
+        "sales_date": (pd.Timestamp("2024-01-01")
+                       + pd.to_timedelta(rng.integers(0, 365, rows), unit="D")).strftime("%Y-%m-%d"),
+        "sales_person": np.array(SALES_PERSONS)[rng.integers(0, len(SALES_PERSONS), rows)],
+        "payment_method": np.array(PAYMENT_METHODS)[rng.integers(0, len(PAYMENT_METHODS), rows)],
+    })
+    if dirty > 0:
+        _inject_dirty_rows(df, rng, dirty)
+    return df
+
+def _inject_dirty_rows(df: pd.DataFrame, rng: np.random.Generator, fraction: float) -> None:
+    """按比例把随机行改为脏数据（原地修改）"""
+    count = int(len(df) * fraction)
+    # 第0行没有上一行可重复
+    positions = np.sort(rng.choice(np.arange(1, len(df)), min(count, len(df) - 1), replace=False))
+    kinds = np.resize(np.array(DIRTY_KINDS), len(positions))
+    df["sales_amount"] = df["sales_amount"].astype(object)
+    df.loc[positions[kinds == "missing"], "product_name"] = None
+    df.loc[positions[kinds == "bad_amount"], "sales_amount"] = "N/A"
+    df.loc[positions[kinds == "bad_date"], "sales_date"] = "2024-13-45"
+    duplicates = positions[kinds == "duplicate"]
+    df.iloc[duplicates] = df.iloc[duplicates - 1].to_numpy()
+
+def write_sales_csv(
+    path: str,
+    rows: int,
+    seed: int = 42,
+    skewed: bool = False,
+    dirty: float = 0.0,
+    chunk_rows: int = GENERATE_CHUNK_ROWS
+) -> None:
+    """分块生成并写入CSV；每块使用 seed + 块序号，结果与块大小相同时一致"""
+    for index, start in enumerate(range(0, rows, chunk_rows)):
+        chunk = generate_sales_data(min(chunk_rows, rows - start), seed + index, skewed, dirty, start)
+        chunk.to_csv(path, mode="w" if index == 0 else "a", header=index == 0, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="生成基准测试用销售CSV")
+    parser.add_argument("rows", type=parse_rows, help="行数，支持 10k / 1m / 10m")
+    parser.add_argument("output", help="输出文件路径")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--skewed", action="store_true", help="产品、区域和客户按Zipf分布倾斜")
+    parser.add_argument("--dirty", type=float, default=0.0, help="脏数据行比例，如 0.02")
+    args = parser.parse_args()
+
+    write_sales_csv(args.output, args.rows, args.seed, args.skewed, args.dirty)
+    print(f"已生成 {args.rows} 行数据: {args.output}")
+
+if __name__ == "__main__":
+    main()
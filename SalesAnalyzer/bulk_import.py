@@ -0,0 +1,31 @@
+"""
+大批量导入脚本（初始导入和离线回填）
+
+逐个文件导入，导入期间暂停 sales_records 的二级索引，每个文件导入后重建，详见 app/services/bulk_load.py。
+用法: python bulk_import.py data1.csv [data2.csv ...] [--upsert] [--force]
+"""
+import argparse
+import os
+from app.core.database import SessionLocal, upgrade_database
+from app.services.data_processor import DataProcessor
+
+def main():
+    parser = argparse.ArgumentParser(description="大批量导入销售CSV")
+    parser.add_argument("files", nargs="+", help="CSV文件路径")
+    parser.add_argument("--upsert", action="store_true", help="按订单号增量合并：已有订单更新，新订单插入")
+    parser.add_argument("--force", action="store_true", help="跳过内容重复检查")
+    args = parser.parse_args()
+
+    upgrade_database()
+    db = SessionLocal()
+    try:
+        for file_path in args.files:
+            result = DataProcessor(db).process_csv_file(
+                file_path, os.path.basename(file_path), force=args.force, upsert=args.upsert, bulk_load=True
+            )
+            print(f"{file_path}: {result.message}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,22 @@
 """
 数据库初始化脚本
 """
-from app.core.database import engine, Base
+from app.core.config import settings
+from app.core.database import engine, upgrade_database
 from app.models.sales import SalesRecord, DataImportLog
+from app.services.dimensions import backfill_dimension_keys
+from app.services.rollup import backfill_sales_rollup
 
 def init_database():
-    """初始化数据库表"""
+    """初始化数据库表（已有数据库会补齐新增的列和索引）"""
     print("正在创建数据库表...")
-    Base.metadata.create_all(bind=engine)
+    for change in upgrade_database():
+        print(f"已升级: {change}")
+    if settings.STAR_SCHEMA:
+        print(f"已补齐 {backfill_dimension_keys(engine)} 条记录的维度键")
+    rollup_rows = backfill_sales_rollup(engine)
+    if rollup_rows:
+        print(f"已按销售记录重建 {rollup_rows} 行日汇总")
     print("数据库表创建完成!")
 
 if __name__ == "__main__":
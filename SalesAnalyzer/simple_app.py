@@ -3,20 +3,61 @@
 """
 from fastapi import FastAPI, HTTPException, UploadFile, File, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional
-import pandas as pd
 import os
+import uuid
 import shutil
+from contextlib import asynccontextmanager
+from app.core.database import in_db_pool, run_in_db_pool, upgrade_database
+from app.core.config import settings
+from app.services.data_processor import DataProcessor
+from app.services.analytics_backend import aggregate_sales, daily_sales, sales_totals, top_sales
+from app.services.column_store import column_store
+from app.services.duckdb_backend import parquet_snapshot
+from app.services.archive_import import check_decompression_support, UnsupportedCompressionError
+from app.utils.helpers import validate_file_extension
+from app.services.multipart_upload import cleanup_expired_uploads
+from app.services.dimensions import backfill_dimension_keys
+from app.services.rollup import backfill_sales_rollup
+from app.services.response_cache import cached_call, cached_response, data_version, response_cache
+from app.services.dashboard import dashboard_summary
+from app.services.aggregation import InvalidAggregationError, split_list
+from app.services.pagination import InvalidCursorError, keyset_page, record_count
+from app.utils.serialization import NDJSON_MEDIA_TYPE, FastJSONResponse, ndjson_chunks, rows_to_dicts
+from app.services.export import (
+    UnsupportedExportFormatError, check_export_format, export_filename, export_media_type, export_statement,
+    iter_export
+)
+from app.api.api_v1.endpoints import multipart
+from app.services.import_jobs import (
+    submit_import_job, get_job_status, fail_orphaned_jobs, ImportQueueFullError, DuplicateImportError
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时清理上次进程遗留的后台导入任务和过期的分片上传，在后台加载列式存储和 Parquet 快照"""
+    db = SessionLocal()
+    try:
+        fail_orphaned_jobs(db)
+    finally:
+        db.close()
+    cleanup_expired_uploads()
+    column_store.schedule_refresh(engine)
+    parquet_snapshot.schedule_refresh(engine)
+    yield
 
 # 创建FastAPI应用
 app = FastAPI(
     title="销售数据分析系统",
     description="基于FastAPI的销售数据分析系统",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # 配置CORS
@@ -38,17 +79,17 @@ Base = declarative_base()
 class SalesRecord(Base):
     __tablename__ = "sales_records"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     order_id = Column(String(100), index=True)
-    product_name = Column(String(200), index=True)
-    category = Column(String(100), index=True)
-    customer_name = Column(String(100), index=True)
-    region = Column(String(100), index=True)
+    product_name = Column(String(200))
+    category = Column(String(100))
+    customer_name = Column(String(100))
+    region = Column(String(100))
     sales_amount = Column(Float)
     quantity = Column(Integer)
     unit_price = Column(Float)
-    sales_date = Column(DateTime, index=True)
-    sales_person = Column(String(100), index=True)
+    sales_date = Column(DateTime)
+    sales_person = Column(String(100))
     payment_method = Column(String(50))
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
@@ -60,12 +101,20 @@ class DataImportLog(Base):
     filename = Column(String(255))
     file_size = Column(Integer)
     records_imported = Column(Integer)
+    records_skipped = Column(Integer, default=0)
+    records_updated = Column(Integer, default=0)
+    records_unchanged = Column(Integer, default=0)
+    chunks_processed = Column(Integer, default=0)
+    bytes_processed = Column(Integer, default=0)
+    content_hash = Column(String(64), index=True, nullable=True)
     import_status = Column(String(50))
     error_message = Column(Text, nullable=True)
     imported_at = Column(DateTime, default=datetime.now)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
 
-# 创建表
-Base.metadata.create_all(bind=engine)
+# 创建表，并为旧版本数据库补齐新增列和索引（按完整模型升级：维度表、维度键列和组合覆盖索引）
+upgrade_database(engine)
 
 # 添加初始数据的函数
 def load_sample_data():
@@ -223,7 +272,8 @@ async def health_check():
     return {"status": "healthy", "message": "系统运行正常"}
 
 @app.get("/api/v1/sales/")
-async def get_sales_records(
+@in_db_pool
+def get_sales_records(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db)
@@ -249,11 +299,14 @@ async def get_sales_records(
     ]
 
 @app.get("/api/v1/sales/statistics/summary")
-async def get_sales_summary(db: Session = Depends(get_db)):
+@in_db_pool
+@cached_response
+def get_sales_summary(db: Session = Depends(get_db)):
     """获取销售摘要"""
-    total_sales = db.query(func.sum(SalesRecord.sales_amount)).scalar() or 0
-    total_orders = db.query(func.count(SalesRecord.id)).scalar() or 0
-    total_quantity = db.query(func.sum(SalesRecord.quantity)).scalar() or 0
+    totals = sales_totals(db)
+    total_sales = totals.total_sales or 0
+    total_orders = totals.order_count or 0
+    total_quantity = totals.total_quantity or 0
     avg_order_value = total_sales / total_orders if total_orders > 0 else 0
     
     return {
@@ -264,82 +317,106 @@ async def get_sales_summary(db: Session = Depends(get_db)):
     }
 
 @app.post("/api/v1/upload/csv")
-async def upload_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    """上传CSV文件"""
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="只支持CSV文件")
+async def upload_csv(
+    file: UploadFile = File(...),
+    background: bool = False,
+    force: bool = False,
+    upsert: bool = False,
+    db: Session = Depends(get_db)
+):
+    """上传CSV、Excel或压缩文件（background=true 时后台导入并立即返回任务ID）
+
+    内容与已成功导入的文件相同时跳过导入并返回 duplicate_of，force=true 时强制重新导入；
+    upsert=true 时按订单号增量合并。
+    """
+    if not validate_file_extension(file.filename, settings.ALLOWED_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="只支持CSV、Excel或压缩文件（.csv.gz/.csv.zst/.zip）")
+    try:
+        check_decompression_support(file.filename)
+    except UnsupportedCompressionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # 保存文件
-    upload_dir = "data/uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    file_path = os.path.join(upload_dir, file.filename)
+    if background:
+        # 后台导入需要在请求结束后读取文件，保存到唯一文件名，避免同名并发上传互相覆盖
+        upload_dir = "data/uploads"
+        os.makedirs(upload_dir, exist_ok=True)
+        file_path = os.path.join(upload_dir, f"{uuid.uuid4().hex}_{os.path.basename(file.filename)}")
+        try:
+            await run_in_threadpool(_save_upload, file, file_path)
+            import_log = await run_in_db_pool(submit_import_job, db, file_path, file.filename, False, force, upsert)
+        except DuplicateImportError as e:
+            os.remove(file_path)
+            return _duplicate_result(file.filename, e.duplicate.id)
+        except ImportQueueFullError as e:
+            os.remove(file_path)
+            raise HTTPException(status_code=503, detail=str(e))
+        except Exception as e:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise HTTPException(status_code=500, detail=f"处理文件失败: {str(e)}")
+        return JSONResponse(status_code=202, content={
+            "success": True,
+            "filename": file.filename,
+            "job_id": import_log.id,
+            "message": f"已提交后台导入任务 {import_log.id}"
+        })
     
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # 读取和处理CSV
-        df = pd.read_csv(file_path)
-        records_imported = 0
-        
-        for _, row in df.iterrows():
-            try:
-                record = SalesRecord(
-                    order_id=str(row.get('order_id', '')),
-                    product_name=str(row.get('product_name', '')),
-                    category=str(row.get('category', '')),
-                    customer_name=str(row.get('customer_name', '')),
-                    region=str(row.get('region', '')),
-                    sales_amount=float(row.get('sales_amount', 0)),
-                    quantity=int(row.get('quantity', 0)),
-                    unit_price=float(row.get('unit_price', 0)),
-                    sales_date=pd.to_datetime(row.get('sales_date', datetime.now())),
-                    sales_person=str(row.get('sales_person', '')),
-                    payment_method=str(row.get('payment_method', ''))
-                )
-                db.add(record)
-                records_imported += 1
-            except Exception as e:
-                continue
-        
-        db.commit()
-        
-        # 记录导入日志
-        import_log = DataImportLog(
-            filename=file.filename,
-            file_size=len(df),
-            records_imported=records_imported,
-            import_status="success"
+        # 直接读取已接收的上传文件，按列向量化转换并批量写入
+        result = await run_in_threadpool(
+            DataProcessor(db).process_file, file.file, file.filename, force=force, upsert=upsert
         )
-        db.add(import_log)
-        db.commit()
-        
-        # 清理临时文件
-        os.remove(file_path)
-        
-        return {
-            "success": True,
-            "filename": file.filename,
-            "records_imported": records_imported,
-            "message": f"成功导入 {records_imported} 条记录"
-        }
-        
     except Exception as e:
         db.rollback()
-        if os.path.exists(file_path):
-            os.remove(file_path)
         raise HTTPException(status_code=500, detail=f"处理文件失败: {str(e)}")
+    
+    if not result.success:
+        raise HTTPException(status_code=500, detail=f"处理文件失败: {result.message}")
+    
+    if result.duplicate_of is not None:
+        return _duplicate_result(file.filename, result.duplicate_of)
+    
+    return {
+        "success": True,
+        "filename": file.filename,
+        "records_imported": result.records_imported,
+        "records_skipped": result.records_skipped,
+        "records_inserted": result.records_inserted,
+        "records_updated": result.records_updated,
+        "records_unchanged": result.records_unchanged,
+        "message": result.message
+    }
+
+@app.get("/api/v1/upload/jobs/{job_id}")
+@in_db_pool
+def get_import_job(job_id: int, db: Session = Depends(get_db)):
+    """获取后台导入任务状态"""
+    status = get_job_status(db, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="导入任务不存在")
+    return status
+
+def _save_upload(file: UploadFile, file_path: str):
+    """将上传文件写入磁盘"""
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+def _duplicate_result(filename: str, duplicate_of: int) -> dict:
+    """重复上传的响应"""
+    return {
+        "success": True,
+        "filename": filename,
+        "records_imported": 0,
+        "duplicate_of": duplicate_of,
+        "message": f"文件内容与导入任务 {duplicate_of} 相同，已跳过导入"
+    }
 
 @app.get("/api/v1/analytics/top-products")
-async def get_top_products(limit: int = 10, db: Session = Depends(get_db)):
+@in_db_pool
+@cached_response
+def get_top_products(limit: int = 10, db: Session = Depends(get_db)):
     """获取热销产品"""
-    top_products = db.query(
-        SalesRecord.product_name,
-        func.sum(SalesRecord.sales_amount).label('total_sales'),
-        func.sum(SalesRecord.quantity).label('total_quantity')
-    ).group_by(SalesRecord.product_name)\
-     .order_by(func.sum(SalesRecord.sales_amount).desc())\
-     .limit(limit).all()
+    top_products = top_sales(db, 'product_name', ['total_sales', 'total_quantity'], limit)
     
     return [
         {
@@ -351,14 +428,11 @@ async def get_top_products(limit: int = 10, db: Session = Depends(get_db)):
     ]
 
 @app.get("/api/v1/analytics/top-regions")
-async def get_top_regions(limit: int = 10, db: Session = Depends(get_db)):
+@in_db_pool
+@cached_response
+def get_top_regions(limit: int = 10, db: Session = Depends(get_db)):
     """获取热销区域"""
-    top_regions = db.query(
-        SalesRecord.region,
-        func.sum(SalesRecord.sales_amount).label('total_sales')
-    ).group_by(SalesRecord.region)\
-     .order_by(func.sum(SalesRecord.sales_amount).desc())\
-     .limit(limit).all()
+    top_regions = top_sales(db, 'region', ['total_sales'], limit)
     
     return [
         {
@@ -368,13 +442,22 @@ async def get_top_regions(limit: int = 10, db: Session = Depends(get_db)):
         for r in top_regions
     ]
 
+@app.get("/api/v1/analytics/cache-stats")
+@in_db_pool
+def get_cache_stats(db: Session = Depends(get_db)):
+    """响应缓存命中统计、当前数据版本和列式存储状态"""
+    return {**response_cache.stats(), "data_version": data_version(db), "column_store": column_store.stats()}
+
 # 添加前端期望的API端点
 @app.get("/sales/stats")
-async def get_sales_stats(db: Session = Depends(get_db)):
+@in_db_pool
+@cached_response
+def get_sales_stats(db: Session = Depends(get_db)):
     """获取销售统计信息"""
-    total_sales = db.query(func.sum(SalesRecord.sales_amount)).scalar() or 0
-    total_orders = db.query(func.count(SalesRecord.id)).scalar() or 0
-    total_quantity = db.query(func.sum(SalesRecord.quantity)).scalar() or 0
+    totals = sales_totals(db)
+    total_sales = totals.total_sales or 0
+    total_orders = totals.order_count or 0
+    total_quantity = totals.total_quantity or 0
     avg_order_value = total_sales / total_orders if total_orders > 0 else 0
     
     return {
@@ -385,170 +468,225 @@ async def get_sales_stats(db: Session = Depends(get_db)):
     }
 
 @app.get("/sales/trend")
-async def get_sales_trend(days: int = 30, db: Session = Depends(get_db)):
+@in_db_pool
+def get_sales_trend(days: int = 30, db: Session = Depends(get_db)):
     """获取销售趋势"""
     from datetime import timedelta
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
     
-    # 按日期分组统计销售
-    daily_sales = db.query(
-        func.date(SalesRecord.sales_date).label('date'),
-        func.sum(SalesRecord.sales_amount).label('daily_sales'),
-        func.count(SalesRecord.id).label('daily_orders')
-    ).filter(
-        SalesRecord.sales_date >= start_date,
-        SalesRecord.sales_date <= end_date
-    ).group_by(func.date(SalesRecord.sales_date))\
-     .order_by(func.date(SalesRecord.sales_date)).all()
+    # 按日期分组统计销售（按当前时间截取的范围不在日粒度上，读取明细表）
+    trend = daily_sales(db, start_date, end_date)
     
     return [
         {
             "date": str(d.date),
-            "sales": float(d.daily_sales),
-            "orders": int(d.daily_orders)
+            "sales": float(d.total_sales),
+            "orders": int(d.order_count)
         }
-        for d in daily_sales
+        for d in trend
     ]
 
 @app.get("/sales/category-stats")
-async def get_category_stats(db: Session = Depends(get_db)):
+@in_db_pool
+@cached_response
+def get_category_stats(db: Session = Depends(get_db)):
     """获取分类统计"""
-    category_stats = db.query(
-        SalesRecord.category,
-        func.sum(SalesRecord.sales_amount).label('total_sales'),
-        func.count(SalesRecord.id).label('total_orders'),
-        func.sum(SalesRecord.quantity).label('total_quantity')
-    ).group_by(SalesRecord.category)\
-     .order_by(func.sum(SalesRecord.sales_amount).desc()).all()
+    category_stats = top_sales(db, 'category', ['total_sales', 'order_count', 'total_quantity'], None)
     
     return [
         {
             "category": c.category,
             "total_sales": float(c.total_sales),
-            "total_orders": int(c.total_orders),
+            "total_orders": int(c.order_count),
             "total_quantity": int(c.total_quantity)
         }
         for c in category_stats
     ]
 
+@app.get("/sales/dashboard")
+@in_db_pool
+def get_dashboard(days: int = 30, recent: int = 10, db: Session = Depends(get_db)):
+    """仪表盘数据：/sales/stats、/sales/trend（按日粒度）、/sales/category-stats 和最近 recent 条销售记录
+
+    前三部分由一次分组查询得到，整个响应按数据版本和当天日期缓存。
+    """
+    today = date.today()
+
+    def compute():
+        rows, _ = keyset_page(db.query(*LIST_COLUMNS), "sales_date", "desc", "", recent) if recent > 0 else ([], None)
+        return {**dashboard_summary(db, days, today), "recent_sales": rows_to_dicts(LIST_FIELDS, rows)}
+
+    return cached_call(db, f"{__name__}.get_dashboard", {"days": days, "recent": recent, "today": today}, compute)
+
+@app.get("/sales/aggregate")
+@in_db_pool
+@cached_response
+def get_aggregate(
+    group_by: str = "",
+    measures: str = "sum(sales_amount),count",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    region: Optional[str] = None,
+    category: Optional[str] = None,
+    product_name: Optional[str] = None,
+    sales_person: Optional[str] = None,
+    payment_method: Optional[str] = None,
+    sort: Optional[str] = None,
+    limit: int = 1000,
+    subtotals: str = "none",
+    db: Session = Depends(get_db)
+):
+    """多维聚合查询（与 /api/v1/analytics/aggregate 相同，group_by/measures/sort 为逗号分隔）"""
+    try:
+        return aggregate_sales(
+            db, split_list(group_by), split_list(measures), start_date, end_date, split_list(sort), limit, subtotals,
+            region=region, category=category, product_name=product_name, sales_person=sales_person,
+            payment_method=payment_method
+        )
+    except InvalidAggregationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# 列表接口返回的字段，按列投影查询后直接序列化结果行
+LIST_FIELDS = [
+    "id", "order_id", "product_name", "category", "customer_name", "region", "sales_amount",
+    "quantity", "unit_price", "sales_date", "sales_person", "payment_method"
+]
+LIST_COLUMNS = [getattr(SalesRecord, name) for name in LIST_FIELDS]
+
+def list_response(rows, format: str, payload=None, headers=None):
+    """format 为 ndjson 时逐行流式返回记录（分页信息在响应头中），否则返回 JSON（payload 为外层字段）"""
+    if format == "ndjson":
+        return StreamingResponse(ndjson_chunks(LIST_FIELDS, rows), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+    data = rows_to_dicts(LIST_FIELDS, rows)
+    return FastJSONResponse({"data": data, **payload} if payload is not None else data, headers=headers)
+
 @app.get("/sales/list")
-async def get_sales_list(
+@in_db_pool
+def get_sales_list(
     page: int = 1,
     size: int = 20,
     limit: int = None,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    order: str = "asc",
+    format: str = "json",
     db: Session = Depends(get_db)
 ):
-    """获取销售记录列表（支持分页）"""
+    """获取销售记录列表（支持分页）
+
+    传 cursor 时使用游标分页：空字符串取第一页，之后传上一页返回的 next_cursor，耗时与页码无关；
+    不传时按 page 偏移分页。总数读取汇总表并按数据版本缓存。
+    format=ndjson 时每行一条记录，总数和下一页游标在响应头 X-Total-Count、X-Next-Cursor 中。
+    """
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail=f"不支持的格式: {format}（可选 json、ndjson）")
+    query = db.query(*LIST_COLUMNS)
     if limit:
         # 如果指定了limit，使用limit而不是分页
-        records = db.query(SalesRecord).limit(limit).all()
-        return [
-            {
-                "id": record.id,
-                "order_id": record.order_id,
-                "product_name": record.product_name,
-                "category": record.category,
-                "customer_name": record.customer_name,
-                "region": record.region,
-                "sales_amount": record.sales_amount,
-                "quantity": record.quantity,
-                "unit_price": record.unit_price,
-                "sales_date": record.sales_date.isoformat() if record.sales_date else None,
-                "sales_person": record.sales_person,
-                "payment_method": record.payment_method
-            }
-            for record in records
-        ]
-    else:
-        # 使用分页
-        skip = (page - 1) * size
-        records = db.query(SalesRecord).offset(skip).limit(size).all()
-        total = db.query(func.count(SalesRecord.id)).scalar()
-        
-        return {
-            "data": [
-                {
-                    "id": record.id,
-                    "order_id": record.order_id,
-                    "product_name": record.product_name,
-                    "category": record.category,
-                    "customer_name": record.customer_name,
-                    "region": record.region,
-                    "sales_amount": record.sales_amount,
-                    "quantity": record.quantity,
-                    "unit_price": record.unit_price,
-                    "sales_date": record.sales_date.isoformat() if record.sales_date else None,
-                    "sales_person": record.sales_person,
-                    "payment_method": record.payment_method
-                }
-                for record in records
-            ],
+        rows = query.limit(limit)
+        return list_response(rows.yield_per(settings.EXPORT_BATCH_SIZE) if format == "ndjson" else rows.all(), format)
+
+    total = record_count(db)
+    headers = {"X-Total-Count": str(total)}
+    if cursor is not None:
+        try:
+            rows, next_cursor = keyset_page(query, sort, order, cursor, size)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return list_response(rows, format, {
             "pagination": {
-                "page": page,
                 "size": size,
                 "total": total,
-                "pages": (total + size - 1) // size
+                "next_cursor": next_cursor,
+                "sort": sort,
+                "order": order
             }
+        }, headers)
+
+    # 使用偏移分页
+    skip = (page - 1) * size
+    rows = query.offset(skip).limit(size).all()
+    return list_response(rows, format, {
+        "pagination": {
+            "page": page,
+            "size": size,
+            "total": total,
+            "pages": (total + size - 1) // size
         }
+    }, headers)
 
 @app.get("/sales/query")
 async def query_sales(
     page: int = 1,
     size: int = 20,
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    order: str = "asc",
+    format: str = "json",
     db: Session = Depends(get_db)
 ):
     """查询销售记录（别名，与list相同）"""
-    return await get_sales_list(page=page, size=size, db=db)
+    return await get_sales_list(page=page, size=size, cursor=cursor, sort=sort, order=order, format=format, db=db)
 
 @app.post("/sales/upload")
-async def upload_sales_file(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_sales_file(
+    file: UploadFile = File(...),
+    background: bool = False,
+    force: bool = False,
+    upsert: bool = False,
+    db: Session = Depends(get_db)
+):
     """上传销售数据文件（别名，与/api/v1/upload/csv相同）"""
-    return await upload_csv(file=file, db=db)
+    return await upload_csv(file=file, background=background, force=force, upsert=upsert, db=db)
+
+@app.get("/sales/upload/jobs/{job_id}")
+async def get_sales_upload_job(job_id: int, db: Session = Depends(get_db)):
+    """获取导入任务状态（别名，与/api/v1/upload/jobs/{job_id}相同）"""
+    return await get_import_job(job_id=job_id, db=db)
+
+# 分片（断点续传）上传，与主应用共用同一组端点
+app.include_router(multipart.router, prefix="/api/v1/upload/multipart", tags=["数据上传"])
+app.include_router(multipart.router, prefix="/sales/upload/multipart", tags=["数据上传"])
 
 @app.get("/sales/export")
-async def export_sales(
-    page: int = 1,
-    size: int = 20,
+@in_db_pool
+def export_sales(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    region: Optional[str] = None,
+    category: Optional[str] = None,
+    product_name: Optional[str] = None,
+    format: str = "csv",
+    gzip: bool = False,
+    page: Optional[int] = None,
+    size: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    """导出销售数据"""
-    skip = (page - 1) * size
-    records = db.query(SalesRecord).offset(skip).limit(size).all()
-    
-    # 转换为CSV格式
-    import io
-    import csv
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # 写入表头
-    writer.writerow([
-        'ID', '订单ID', '产品名称', '分类', '客户名称', '区域', 
-        '销售金额', '数量', '单价', '销售日期', '销售人员', '支付方式'
-    ])
-    
-    # 写入数据
-    for record in records:
-        writer.writerow([
-            record.id, record.order_id, record.product_name, record.category,
-            record.customer_name, record.region, record.sales_amount, record.quantity,
-            record.unit_price, record.sales_date.strftime('%Y-%m-%d') if record.sales_date else '',
-            record.sales_person, record.payment_method
-        ])
-    
-    from fastapi.responses import StreamingResponse
-    
-    output.seek(0)
+    """按过滤条件流式导出销售数据（format 为 csv/arrow/parquet，传 size 时只导出第 page 页）"""
+    try:
+        check_export_format(format)
+    except UnsupportedExportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    statement = export_statement(
+        db, start_date, end_date, format, region=region, category=category, product_name=product_name
+    )
+    if size:
+        statement = statement.offset(((page or 1) - 1) * size).limit(size)
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode('utf-8')),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=sales_export_page_{page}.csv"}
+        iter_export(db, statement, format, compress=gzip),
+        media_type=export_media_type(format, gzip),
+        headers={"Content-Disposition": f"attachment; filename={export_filename(format, gzip)}"}
     )
 
 if __name__ == "__main__":
     import uvicorn
     # 启动时加载示例数据
     load_sample_data()
+    if settings.STAR_SCHEMA:
+        backfill_dimension_keys(engine)
+    # 示例数据经简化模型写入，不触发汇总表维护，这里按明细补齐
+    backfill_sales_rollup(engine)
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
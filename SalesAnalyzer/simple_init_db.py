@@ -17,6 +17,7 @@ def init_database():
         from sqlalchemy.ext.declarative import declarative_base
         from sqlalchemy.orm import sessionmaker
         from datetime import datetime
+        from app.core.config import settings
         
         # 创建数据库引擎
         DATABASE_URL = "sqlite:///./sales_analyzer.db"
@@ -32,17 +33,17 @@ def init_database():
         class SalesRecord(Base):
             __tablename__ = "sales_records"
             
-            id = Column(Integer, primary_key=True, index=True)
+            id = Column(Integer, primary_key=True)
             order_id = Column(String(100), index=True)
-            product_name = Column(String(200), index=True)
-            category = Column(String(100), index=True)
-            customer_name = Column(String(100), index=True)
-            region = Column(String(100), index=True)
+            product_name = Column(String(200))
+            category = Column(String(100))
+            customer_name = Column(String(100))
+            region = Column(String(100))
             sales_amount = Column(Float)
             quantity = Column(Integer)
             unit_price = Column(Float)
-            sales_date = Column(DateTime, index=True)
-            sales_person = Column(String(100), index=True)
+            sales_date = Column(DateTime)
+            sales_person = Column(String(100))
             payment_method = Column(String(50))
             created_at = Column(DateTime, default=datetime.now)
             updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
@@ -55,12 +56,29 @@ def init_database():
             filename = Column(String(255))
             file_size = Column(Integer)
             records_imported = Column(Integer)
+            records_skipped = Column(Integer, default=0)
+            records_updated = Column(Integer, default=0)
+            records_unchanged = Column(Integer, default=0)
+            chunks_processed = Column(Integer, default=0)
+            bytes_processed = Column(Integer, default=0)
+            content_hash = Column(String(64), index=True, nullable=True)
             import_status = Column(String(50))
             error_message = Column(Text, nullable=True)
             imported_at = Column(DateTime, default=datetime.now)
+            started_at = Column(DateTime, nullable=True)
+            finished_at = Column(DateTime, nullable=True)
         
-        # 创建表
-        Base.metadata.create_all(bind=engine)
+        # 创建表，已有数据库补齐新增的列和索引（按完整模型升级：维度表、维度键列和组合覆盖索引）
+        from app.core.database import upgrade_database
+        from app.services.dimensions import backfill_dimension_keys
+        from app.services.rollup import backfill_sales_rollup
+        for change in upgrade_database(engine):
+            print(f"🔧 已升级: {change}")
+        if settings.STAR_SCHEMA:
+            print(f"🔧 已补齐 {backfill_dimension_keys(engine)} 条记录的维度键")
+        rollup_rows = backfill_sales_rollup(engine)
+        if rollup_rows:
+            print(f"🔧 已按销售记录重建 {rollup_rows} 行日汇总")
         
         print("✅ 数据库表创建完成!")
         print("📁 数据库文件: sales_analyzer.db")
@@ -0,0 +1,47 @@
+"""
+测试公共夹具
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base, get_db
+from app.main import app
+from app.services import import_jobs
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """基于临时SQLite文件的独立会话工厂"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+@pytest.fixture
+def db(session_factory):
+    """独立的数据库会话"""
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def client(session_factory, monkeypatch):
+    """使用独立数据库的测试客户端"""
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    monkeypatch.setattr(import_jobs, "SessionLocal", session_factory)
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
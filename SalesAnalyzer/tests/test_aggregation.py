@@ -0,0 +1,102 @@
+"""
+多维聚合查询测试用例
+"""
+import pytest
+from sqlalchemy import event
+from app.core.config import settings
+from app.services.aggregation import aggregate_sales
+from app.services.data_processor import DataProcessor
+from tests.test_rollup import write_sales
+
+SPECS = [
+    {"group_by": ["region", "month"], "measures": ["sum(sales_amount)", "count", "avg(quantity)"]},
+    {"group_by": ["category", "week"], "measures": ["sum(quantity)"], "start_date": "2024-01-18", "region": "北京"},
+    {"group_by": ["product_name"], "measures": ["count"], "sort": ["-count", "product_name"], "limit": 3},
+    {"group_by": ["year", "category"], "measures": ["avg(sales_amount)"], "subtotals": "cube"},
+]
+
+@pytest.fixture
+def loaded(db, tmp_path):
+    DataProcessor(db).process_csv_file(str(write_sales(tmp_path)), "sales.csv")
+
+def normalized(result):
+    """金额合计的浮点误差与求和顺序有关，比较时取近似值"""
+    return [
+        {key: pytest.approx(value) if isinstance(value, float) else value for key, value in row.items()}
+        for row in result["rows"]
+    ]
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_rollup_matches_detail(db, loaded, monkeypatch, spec):
+    """测试汇总表和明细表上的聚合结果一致，且每次聚合只执行一条SQL语句"""
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    from_rollup = aggregate_sales(db, **spec)
+    monkeypatch.setattr(settings, "SALES_ROLLUP", False)
+    from_detail = aggregate_sales(db, **spec)
+
+    assert (from_rollup["source"], from_detail["source"]) == ("rollup", "detail")
+    assert len(statements) == 2
+    assert from_rollup["rows"] and normalized(from_rollup) == normalized(from_detail)
+
+def test_detail_only_measures_and_dimensions(db, loaded):
+    """测试汇总表无法回答的维度、指标和过滤条件读取明细表"""
+    assert aggregate_sales(db, ["sales_person"], ["count"])["source"] == "detail"
+    assert aggregate_sales(db, ["region"], ["max(unit_price)"])["source"] == "detail"
+    assert aggregate_sales(db, ["region"], ["count"], payment_method="信用卡")["source"] == "detail"
+    assert aggregate_sales(db, ["region"], ["count"])["source"] == "rollup"
+
+def test_rollup_subtotals(db, loaded):
+    """测试 ROLLUP 小计：grouping 位掩码、逐级小计与明细行之和一致，limit 作用于每个分组集合"""
+    result = aggregate_sales(
+        db, ["category", "region"], ["sum(sales_amount)", "count"], subtotals="rollup",
+        sort=["-sum_sales_amount"], limit=2
+    )
+    by_grouping = {}
+    for row in result["rows"]:
+        by_grouping.setdefault(row["grouping"], []).append(row)
+
+    assert list(by_grouping) == [0, 1, 3]
+    assert [len(rows) for rows in by_grouping.values()] == [2, 2, 1]
+    grand_total = by_grouping[3][0]
+    assert grand_total["category"] is None and grand_total["region"] is None and grand_total["count"] == 60
+    subtotals = aggregate_sales(db, ["category"], ["sum(sales_amount)", "count"])["rows"]
+    assert [(row["category"], row["count"]) for row in by_grouping[1]] == sorted(
+        [(row["category"], row["count"]) for row in subtotals], key=lambda item: -item[1]
+    )
+    assert by_grouping[0][0]["sum_sales_amount"] >= by_grouping[0][1]["sum_sales_amount"]
+
+@pytest.mark.parametrize("params", [
+    {"group_by": "customer_name"},
+    {"measures": "median(sales_amount)"},
+    {"measures": "sum"},
+    {"group_by": "region", "sort": "-sum_quantity"},
+    {"group_by": "region,region"},
+])
+def test_invalid_requests(client, params):
+    """测试无效的维度、指标和排序字段返回400"""
+    response = client.get("/api/v1/analytics/aggregate", params=params)
+    assert response.status_code == 400
+    assert response.json()["detail"]
+
+def test_aggregate_endpoint(client, db, loaded):
+    """测试接口按逗号分隔的参数分组、过滤和排序"""
+    response = client.get("/api/v1/analytics/aggregate", params={
+        "group_by": "region", "measures": "sum(quantity),count", "category": "办公用品", "sort": "-count,region"
+    })
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["source"] == "rollup" and result["measures"] == ["sum_quantity", "count"]
+    assert sum(row["count"] for row in result["rows"]) == 20
+    assert [row["count"] for row in result["rows"]] == sorted((row["count"] for row in result["rows"]), reverse=True)
+
+def test_statistics_top_lists_use_filters(db, loaded):
+    """测试统计信息中的热销产品和区域与合计使用相同的过滤条件"""
+    statistics = DataProcessor(db).get_sales_statistics({"region": "上海"})
+
+    assert [region["region"] for region in statistics["top_regions"]] == ["上海"]
+    assert {product["product_name"] for product in statistics["top_products"]} == {"智能手机"}
+    assert sum(product["total_sales"] for product in statistics["top_products"]) == pytest.approx(
+        statistics["total_sales"]
+    )
@@ -0,0 +1,98 @@
+"""
+大批量导入模式测试用例
+"""
+import subprocess
+import sys
+from sqlalchemy import create_engine
+from app.core.config import settings
+from app.core.database import index_names as table_index_names, upgrade_database
+from app.models.sales import SalesRecord, DataImportLog
+from app.services.bulk_load import suspendable_indexes
+from app.services.data_processor import DataProcessor
+
+SAMPLE_CSV = "data/sample_sales_data.csv"
+
+def index_names(bind):
+    with bind.connect() as conn:
+        return table_index_names(conn, "sales_records")
+
+def test_bulk_load_rebuilds_indexes(db, monkeypatch):
+    """测试大批量导入按大分块提交，结束后索引和连接PRAGMA恢复"""
+    monkeypatch.setattr(settings, "BULK_LOAD_CHUNK_SIZE", 8)
+    engine = db.get_bind()
+    before = index_names(engine)
+
+    result = DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv", bulk_load=True)
+
+    assert result.success
+    assert result.chunks_processed == 2
+    assert db.query(SalesRecord).count() == 15
+    assert index_names(engine) == before
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT count(*) FROM sqlite_stat1").scalar() > 0
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 2
+
+def test_bulk_load_failure_keeps_committed_chunks(db, monkeypatch):
+    """测试导入失败时已提交分块保留，索引照常重建"""
+    monkeypatch.setattr(settings, "BULK_LOAD_CHUNK_SIZE", 4)
+    convert = DataProcessor._convert_to_columns
+    calls = []
+
+    def failing_convert(self, df):
+        calls.append(len(df))
+        if len(calls) == 3:
+            raise ValueError("模拟写入失败")
+        return convert(self, df)
+
+    monkeypatch.setattr(DataProcessor, "_convert_to_columns", failing_convert)
+    result = DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv", bulk_load=True)
+
+    assert not result.success
+    assert db.query(SalesRecord).count() == 8
+    assert db.query(DataImportLog).one().import_status == "partial"
+    assert {index.name for index in suspendable_indexes()} <= index_names(db.get_bind())
+
+def test_upsert_keeps_order_id_index():
+    """测试按订单号合并时不暂停 order_id 索引"""
+    assert "ix_sales_records_order_id" in {index.name for index in suspendable_indexes()}
+    assert "ix_sales_records_order_id" not in {index.name for index in suspendable_indexes(["order_id"])}
+
+CRASHING_IMPORT = """
+import os, sys
+from sqlalchemy import create_engine
+from app.core.config import settings
+from app.core.database import Base
+from app.services.bulk_load import bulk_load
+from app.services.data_processor import DataProcessor
+
+engine = create_engine(sys.argv[1])
+Base.metadata.create_all(engine)
+settings.BULK_LOAD_CHUNK_SIZE = 4
+with bulk_load(engine) as session:
+    processor = DataProcessor(session)
+    with open(sys.argv[2], "rb") as stream:
+        for number, (columns, _) in enumerate(processor._read_chunks(stream, settings.BULK_LOAD_CHUNK_SIZE)):
+            processor._write_columns(columns)
+            if number == 2:
+                session.flush()
+                os._exit(1)
+            session.commit()
+"""
+
+def test_process_killed_mid_load(tmp_path):
+    """测试进程在导入中途退出后数据库完好，已提交分块保留，升级时重建索引"""
+    url = f"sqlite:///{tmp_path / 'crash.db'}"
+    completed = subprocess.run([sys.executable, "-c", CRASHING_IMPORT, url, SAMPLE_CSV])
+    assert completed.returncode == 1
+
+    engine = create_engine(url)
+    try:
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA integrity_check").scalar() == "ok"
+            assert conn.exec_driver_sql("SELECT count(*) FROM sales_records").scalar() == 8
+        assert not {index.name for index in suspendable_indexes()} & index_names(engine)
+
+        upgrade_database(engine)
+        assert {index.name for index in suspendable_indexes()} <= index_names(engine)
+    finally:
+        engine.dispose()
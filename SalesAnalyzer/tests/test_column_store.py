@@ -0,0 +1,102 @@
+"""
+内存列式存储测试用例
+"""
+import pandas as pd
+import pytest
+from sqlalchemy import event
+from app.core.config import settings
+from app.models.sales import SalesRecord
+from app.services.column_store import column_store
+from app.services.data_processor import DataProcessor, sales_totals, top_sales
+from tests.test_rollup import query_results, write_sales
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(settings, "COLUMN_STORE", True)
+    column_store.clear()
+    yield
+    column_store.clear()
+
+@pytest.fixture
+def loaded(db, tmp_path):
+    DataProcessor(db).process_csv_file(str(write_sales(tmp_path)), "sales.csv")
+    column_store.wait()
+    column_store.load(db.get_bind())
+
+def normalized(results):
+    """金额合计的浮点误差与求和顺序有关，比较时取近似值"""
+    if isinstance(results, dict):
+        return {key: normalized(value) for key, value in results.items()}
+    if isinstance(results, (list, tuple)):
+        return type(results)(normalized(value) for value in results)
+    return pytest.approx(results) if isinstance(results, float) else results
+
+def test_matches_sql(db, loaded, monkeypatch):
+    """测试热销排行、趋势、合计和统计信息与数据库查询结果一致，且不执行聚合SQL"""
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    from_store = query_results(db, monkeypatch, True)
+    assert statements and all("data_version" in statement for statement in statements)
+
+    monkeypatch.setattr(settings, "COLUMN_STORE", False)
+    from_detail = query_results(db, monkeypatch, False)
+    assert from_store["products"] and from_store["trend"]
+    assert from_store == normalized(from_detail)
+
+def test_top_limit_and_unexpressible_filters(db, loaded, monkeypatch):
+    """测试 argpartition 取前N条的顺序，以及无法在日粒度上表达的过滤条件回到数据库查询"""
+    top = column_store.top_sales(db, "product_name", ["total_sales", "order_count"], 3)
+    assert column_store.top_sales(db, "product_name", ["total_sales"], 0) == []
+    monkeypatch.setattr(settings, "COLUMN_STORE", False)
+    assert top == normalized([tuple(row) for row in top_sales(db, "product_name", ["total_sales", "order_count"], 3)])
+    monkeypatch.setattr(settings, "COLUMN_STORE", True)
+
+    assert column_store.sales_totals(db, start_date="2024-01-18 12:00:00") is None
+    assert sales_totals(db, start_date="2024-01-18 12:00:00").order_count == sales_totals(
+        db, start_date="2024-01-19"
+    ).order_count
+
+def test_insert_only_import_appends(db, loaded, tmp_path):
+    """测试只新增记录的导入提交后追加到已加载的数组，不重新加载"""
+    columns = column_store._columns
+    df = pd.read_csv(write_sales(tmp_path, "more.csv", copies=1))
+    df["order_id"] = df["order_id"] + "-more"
+    df.to_csv(tmp_path / "more.csv", index=False)
+
+    DataProcessor(db).process_csv_file(str(tmp_path / "more.csv"), "more.csv", streaming=True)
+    column_store.wait()
+
+    assert column_store._columns is columns
+    assert column_store.stats()["rows"] == 75
+    assert column_store.sales_totals(db).order_count == 75
+
+def test_stale_store_falls_back_and_reloads(db, loaded):
+    """测试数据修改后存储过期：查询回到数据库，后台全量重新加载后再由存储回答"""
+    columns = column_store._columns
+    record = db.query(SalesRecord).filter(SalesRecord.region == "北京").first()
+    record.region = "拉萨"
+    db.commit()
+
+    assert column_store.top_sales(db, "region", ["order_count"], None) is None
+    regions = {row.region: row.order_count for row in top_sales(db, "region", ["order_count"], None)}
+    assert regions["拉萨"] == 1
+    column_store.wait()
+
+    assert column_store._columns is not columns
+    from_store = column_store.top_sales(db, "region", ["order_count"], None)
+    assert {row.region: row.order_count for row in from_store} == regions
+
+def test_cold_and_over_budget(db, tmp_path, monkeypatch):
+    """测试尚未加载时回到数据库并在后台加载；超过容量上限时停用"""
+    DataProcessor(db).process_csv_file(str(write_sales(tmp_path)), "sales.csv")
+    column_store.clear()
+    assert column_store.stats()["state"] == "cold"
+    assert sales_totals(db).order_count == 60
+    column_store.wait()
+    assert column_store.stats()["state"] == "ready"
+
+    monkeypatch.setattr(settings, "COLUMN_STORE_MAX_MB", 0)
+    assert column_store.load(db.get_bind()) == 0
+    assert column_store.stats()["state"] == "over_budget"
+    assert column_store.sales_totals(db) is None
+    assert sales_totals(db).order_count == 60
@@ -0,0 +1,59 @@
+"""
+仪表盘接口测试用例
+"""
+from datetime import date
+import pytest
+from sqlalchemy import event
+from app.core.config import settings
+from app.services.dashboard import dashboard_summary
+from app.services.data_processor import DataProcessor, daily_sales, sales_totals, top_sales
+from app.services.response_cache import response_cache
+
+SAMPLE_CSV = "data/sample_sales_data.csv"
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+@pytest.mark.parametrize("use_rollup", [True, False])
+def test_summary_matches_separate_queries(db, monkeypatch, use_rollup):
+    """测试两次查询得到的合计、趋势和类别统计与分别查询的结果一致"""
+    monkeypatch.setattr(settings, "SALES_ROLLUP", use_rollup)
+    DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv")
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    summary = dashboard_summary(db, days=7, today=date(2024, 1, 25))
+
+    assert len(statements) == 2
+    totals = sales_totals(db)
+    assert summary["stats"]["total_sales"] == pytest.approx(totals.total_sales)
+    assert summary["stats"]["total_orders"] == totals.order_count == 15
+    assert summary["stats"]["total_quantity"] == totals.total_quantity
+    # 按日粒度包含开始当天和 today 当天（daily_sales 的结束日期不含当天）
+    assert [(point["date"], point["sales"], point["orders"]) for point in summary["trend"]] == [
+        (str(row.date), pytest.approx(row.total_sales), row.order_count)
+        for row in daily_sales(db, "2024-01-18", "2024-01-26")
+    ]
+    assert [(item["category"], item["total_orders"]) for item in summary["categories"]] == [
+        (row.category, row.order_count) for row in top_sales(db, "category", ["total_sales", "order_count"], None)
+    ]
+
+def test_dashboard_endpoint_cached_as_unit(client, db):
+    """测试接口一次返回四部分，重复请求命中缓存，最近记录按销售日期降序"""
+    DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv")
+
+    first = client.get("/api/v1/analytics/dashboard", params={"recent": 3})
+    hits = response_cache.stats()["hits"]
+    second = client.get("/api/v1/analytics/dashboard", params={"recent": 3})
+
+    assert first.status_code == 200
+    assert second.json() == first.json()
+    assert response_cache.stats()["hits"] == hits + 1
+    dashboard = first.json()
+    assert set(dashboard) == {"stats", "trend", "categories", "recent_sales"}
+    assert dashboard["stats"]["total_orders"] == 15
+    assert [record["order_id"] for record in dashboard["recent_sales"]] == ["ORD015", "ORD014", "ORD013"]
+    assert [item["category"] for item in dashboard["categories"]] == ["电子产品", "办公用品"]
@@ -0,0 +1,280 @@
+"""
+数据处理服务测试用例
+"""
+import pytest
+import pandas as pd
+from app.core.config import settings
+from app.models.sales import SalesRecord, DataImportLog
+from app.services.data_processor import DataProcessor
+
+SAMPLE_CSV = "data/sample_sales_data.csv"
+
+def test_process_csv_file(db):
+    """测试整文件导入"""
+    result = DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv")
+    assert result.success
+    assert result.records_imported == 15
+    assert db.query(SalesRecord).count() == 15
+
+def test_process_csv_file_streaming(db, monkeypatch):
+    """测试分块流式导入及分块进度"""
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 4)
+    monkeypatch.setattr(settings, "BATCH_SIZE", 3)
+
+    result = DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv", streaming=True)
+
+    assert result.success
+    assert result.records_imported == 15
+    assert result.chunks_processed == 4
+    assert db.query(SalesRecord).count() == 15
+
+    log = db.query(DataImportLog).one()
+    assert log.import_status == "success"
+    assert log.chunks_processed == 4
+    assert log.records_imported == 15
+
+def test_process_csv_file_streaming_keeps_committed_chunks(db, monkeypatch):
+    """测试第N块失败时保留已提交分块"""
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 4)
+    processor = DataProcessor(db)
+    convert = processor._convert_to_columns
+    calls = []
+
+    def failing_convert(df):
+        calls.append(len(df))
+        if len(calls) == 3:
+            raise ValueError("模拟写入失败")
+        return convert(df)
+
+    monkeypatch.setattr(processor, "_convert_to_columns", failing_convert)
+    result = processor.process_csv_file(SAMPLE_CSV, "sample.csv", streaming=True)
+
+    assert not result.success
+    assert result.records_imported == 8
+    assert result.chunks_processed == 2
+    assert db.query(SalesRecord).count() == 8
+
+    log = db.query(DataImportLog).one()
+    assert log.import_status == "partial"
+    assert log.chunks_processed == 2
+    assert "第 3 块" in log.error_message
+
+def test_process_csv_file_skips_invalid_rows(db, tmp_path):
+    """测试无效行被跳过并计数"""
+    df = pd.read_csv(SAMPLE_CSV, dtype=str)
+    df.loc[0, "sales_amount"] = "abc"
+    df.loc[1, "quantity"] = None
+    df.loc[2, "sales_date"] = "not-a-date"
+    df.loc[3, "unit_price"] = "inf"
+    csv_path = tmp_path / "dirty.csv"
+    df.to_csv(csv_path, index=False)
+
+    result = DataProcessor(db).process_csv_file(str(csv_path), "dirty.csv")
+
+    assert result.success
+    assert result.records_imported == 11
+    assert result.records_skipped == 4
+    record = db.query(SalesRecord).filter(SalesRecord.order_id == "ORD005").one()
+    assert record.quantity == 1
+    assert record.sales_amount == 3999.0
+    assert record.sales_date.year == 2024
+    assert record.created_at is not None
+
+def test_split_csv_shards_align_to_lines(tmp_path):
+    """测试分片边界对齐到行尾且覆盖全部数据"""
+    from app.services.parallel_import import read_csv_header, split_csv_shards
+
+    columns, data_start = read_csv_header(SAMPLE_CSV)
+    shards = split_csv_shards(SAMPLE_CSV, data_start, 200)
+
+    assert columns[0] == "order_id"
+    assert len(shards) > 1
+    with open(SAMPLE_CSV, "rb") as f:
+        content = f.read()
+    assert shards[0][0] == data_start
+    assert shards[-1][1] == len(content)
+    for (_, end), (next_start, _) in zip(shards, shards[1:]):
+        assert end == next_start
+        assert content[end - 1:end] == b"\n"
+
+def test_process_csv_parallel(db, monkeypatch):
+    """测试多进程并行导入"""
+    monkeypatch.setattr(settings, "PARALLEL_SHARD_SIZE", 400)
+
+    result = DataProcessor(db).process_csv_parallel(SAMPLE_CSV, "sample.csv", workers=2)
+
+    assert result.success
+    assert result.records_imported == 15
+    assert result.chunks_processed > 1
+    assert db.query(SalesRecord).count() == 15
+    log = db.query(DataImportLog).one()
+    assert log.bytes_processed == log.file_size
+
+def test_pack_sales_columns_round_trip():
+    """测试并行工作进程的打包列数据还原后与直接转换一致"""
+    from app.services.data_processor import clean_sales_data, to_sales_columns
+    from app.services.parallel_import import pack_sales_columns, unpack_sales_columns
+
+    df = clean_sales_data(pd.read_csv(SAMPLE_CSV))
+    df.loc[df.index[0], "customer_name"] = "含\x00分隔符"
+
+    packed = pack_sales_columns(df)
+
+    assert isinstance(packed["product_name"], str)
+    assert isinstance(packed["customer_name"], list)
+    assert unpack_sales_columns(packed) == to_sales_columns(df)
+
+def test_process_csv_parallel_falls_back_on_multiline_fields(db, tmp_path):
+    """测试含跨行引号字段的文件不按字节分片，而是退回流式导入"""
+    from app.services.parallel_import import has_multiline_quoted_fields
+
+    with open(SAMPLE_CSV, encoding="utf-8") as f:
+        header, first, *rest = f.read().splitlines()
+    fields = first.split(",")
+    fields[3] = '"多行\n客户"'
+    csv_path = tmp_path / "multiline.csv"
+    csv_path.write_text("\n".join([header, ",".join(fields), *rest]) + "\n", encoding="utf-8")
+
+    assert has_multiline_quoted_fields(str(csv_path))
+    assert not has_multiline_quoted_fields(SAMPLE_CSV)
+    result = DataProcessor(db).process_csv_parallel(str(csv_path), "multiline.csv", workers=2)
+
+    assert result.success
+    assert result.records_imported == 15
+    assert db.query(SalesRecord).filter(SalesRecord.customer_name == "多行\n客户").count() == 1
+
+def test_process_csv_file_skips_duplicate_content(db):
+    """测试内容相同的文件再次导入时直接返回，不解析也不写库"""
+    processor = DataProcessor(db)
+    first = processor.process_csv_file(SAMPLE_CSV, "sample.csv")
+    with open(SAMPLE_CSV, "rb") as f:
+        second = processor.process_csv_file(f, "sample_copy.csv", streaming=False)
+
+    assert second.success
+    assert second.records_imported == 0
+    assert second.duplicate_of == db.query(DataImportLog).one().id
+    assert first.duplicate_of is None
+    assert db.query(SalesRecord).count() == 15
+
+    forced = processor.process_csv_file(SAMPLE_CSV, "sample.csv", streaming=True, force=True)
+    assert forced.records_imported == 15
+    assert db.query(DataImportLog).count() == 2
+
+def test_process_csv_stream_records_hash_of_unseekable_stream(db):
+    """测试不可定位的流在读取过程中计算哈希，之后相同内容的上传被识别为重复"""
+    from app.utils.streams import SpooledPipe
+
+    with open(SAMPLE_CSV, "rb") as f:
+        content = f.read()
+    pipe = SpooledPipe(spool_threshold=1024 * 1024)
+    pipe.write(content)
+    pipe.close_writer()
+
+    processor = DataProcessor(db)
+    assert processor.process_csv_stream(pipe, "sample.csv").records_imported == 15
+
+    assert processor.process_csv_file(SAMPLE_CSV, "sample.csv").duplicate_of is not None
+    assert db.query(SalesRecord).count() == 15
+
+def test_process_csv_file_upsert_merges_by_order_id(db, tmp_path, monkeypatch):
+    """测试增量合并：已有订单按内容更新或保持不变，新订单插入，不产生重复行"""
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 4)
+    processor = DataProcessor(db)
+    processor.process_csv_file(SAMPLE_CSV, "sample.csv")
+
+    df = pd.read_csv(SAMPLE_CSV)
+    changed_order = df.loc[0, "order_id"]
+    df.loc[0, "quantity"] = 99
+    new_row = df.loc[1].copy()
+    new_row["order_id"] = "ORD_NEW"
+    # 同一订单在文件中出现两次时以后出现的为准
+    later_row = df.loc[0].copy()
+    later_row["quantity"] = 100
+    df = pd.concat([df, new_row.to_frame().T, later_row.to_frame().T], ignore_index=True)
+    csv_path = tmp_path / "extract.csv"
+    df.to_csv(csv_path, index=False)
+
+    result = processor.process_csv_file(str(csv_path), "extract.csv", streaming=True, upsert=True)
+
+    assert result.success
+    assert result.records_inserted == 1
+    assert result.records_updated == 2
+    assert result.records_unchanged == 14
+    assert db.query(SalesRecord).count() == 16
+    assert db.query(SalesRecord).filter(SalesRecord.order_id == changed_order).one().quantity == 100
+    log = db.query(DataImportLog).order_by(DataImportLog.id.desc()).first()
+    assert (log.records_updated, log.records_unchanged) == (2, 14)
+
+def test_process_excel_file_streams_chunks(db, tmp_path, monkeypatch):
+    """测试Excel工作簿逐行分块导入，与CSV走相同的清洗写入流程"""
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 4)
+    df = pd.read_csv(SAMPLE_CSV)
+    df["sales_date"] = pd.to_datetime(df["sales_date"])
+    xlsx_path = tmp_path / "sales.xlsx"
+    df.to_excel(xlsx_path, index=False)
+
+    result = DataProcessor(db).process_file(str(xlsx_path), "sales.xlsx")
+
+    assert result.success
+    assert result.records_imported == 15
+    assert result.chunks_processed == 4
+    record = db.query(SalesRecord).filter(SalesRecord.order_id == df.loc[0, "order_id"]).one()
+    assert record.sales_date == df.loc[0, "sales_date"].to_pydatetime()
+
+def test_process_gzip_csv(db, tmp_path, monkeypatch):
+    """测试 .csv.gz 边解压边分块导入"""
+    import gzip
+
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 4)
+    gz_path = tmp_path / "sales.csv.gz"
+    with open(SAMPLE_CSV, "rb") as src, gzip.open(gz_path, "wb") as dst:
+        dst.write(src.read())
+
+    processor = DataProcessor(db)
+    result = processor.process_file(str(gz_path), "sales.csv.gz")
+
+    assert result.success
+    assert result.records_imported == 15
+    assert result.chunks_processed == 4
+    log = db.query(DataImportLog).one()
+    assert log.bytes_processed == log.file_size == gz_path.stat().st_size
+    # 重复检查按压缩文件内容
+    assert processor.process_file(str(gz_path), "again.csv.gz").duplicate_of == log.id
+
+def test_process_zip_imports_each_member(db, tmp_path):
+    """测试zip中的每个CSV各自导入并记录日志，非CSV成员被忽略"""
+    import zipfile
+
+    df = pd.read_csv(SAMPLE_CSV)
+    other = df.copy()
+    other["order_id"] = "B" + other["order_id"]
+    zip_path = tmp_path / "sales.zip"
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("2024/a.csv", df.to_csv(index=False))
+        archive.writestr("2024/b.csv", other.to_csv(index=False))
+        archive.writestr("readme.txt", "说明")
+        archive.writestr("__MACOSX/2024/._a.csv", "")
+
+    result = DataProcessor(db).process_file(str(zip_path), "sales.zip")
+
+    assert result.success
+    assert result.records_imported == 30
+    assert [member.filename for member in result.member_results] == ["sales.zip/2024/a.csv", "sales.zip/2024/b.csv"]
+    assert db.query(SalesRecord).count() == 30
+    logs = db.query(DataImportLog).order_by(DataImportLog.filename).all()
+    assert [(log.filename, log.import_status) for log in logs] == [
+        ("sales.zip/2024/a.csv", "success"), ("sales.zip/2024/b.csv", "success")
+    ]
+
+def test_process_zip_without_csv_fails(db, tmp_path):
+    """测试压缩包中没有CSV文件时返回失败"""
+    import zipfile
+
+    zip_path = tmp_path / "empty.zip"
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        archive.writestr("readme.txt", "说明")
+
+    result = DataProcessor(db).process_file(str(zip_path), "empty.zip")
+
+    assert not result.success
+    assert "没有CSV文件" in result.message
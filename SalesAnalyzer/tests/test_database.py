@@ -0,0 +1,62 @@
+"""
+数据库结构升级测试用例
+"""
+import sqlite3
+from sqlalchemy import create_engine
+from app.core.database import index_names, upgrade_database
+from app.models.sales import DataImportLog, SalesRecord
+
+def test_upgrade_database_adds_missing_columns(tmp_path):
+    """测试旧版本数据库升级后补齐新增列并保留已有数据"""
+    db_path = tmp_path / "old.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE data_import_logs (id INTEGER PRIMARY KEY, filename VARCHAR(255), file_size INTEGER, "
+        "records_imported INTEGER, import_status VARCHAR(50), error_message TEXT, imported_at DATETIME)"
+    )
+    conn.execute("INSERT INTO data_import_logs (filename, import_status) VALUES ('old.csv', 'success')")
+    conn.commit()
+    conn.close()
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        changes = upgrade_database(engine)
+        assert any("records_skipped" in change for change in changes)
+        assert upgrade_database(engine) == []
+
+        with engine.connect() as conn:
+            row = conn.execute(DataImportLog.__table__.select()).mappings().one()
+        assert row["filename"] == "old.csv"
+        assert row["records_skipped"] == 0
+        assert row["finished_at"] is None
+    finally:
+        engine.dispose()
+
+def test_upgrade_database_replaces_retired_indexes(tmp_path):
+    """测试升级时删除模型不再声明的旧单列索引，创建组合覆盖索引"""
+    db_path = tmp_path / "old.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE sales_records (id INTEGER PRIMARY KEY, order_id VARCHAR(100), product_name VARCHAR(200), "
+        "region VARCHAR(100), sales_amount FLOAT, sales_date DATETIME)"
+    )
+    conn.execute("CREATE INDEX ix_sales_records_region ON sales_records (region)")
+    conn.execute("CREATE INDEX ix_sales_records_sales_date ON sales_records (sales_date)")
+    conn.execute("CREATE INDEX custom_region ON sales_records (region)")
+    conn.commit()
+    conn.close()
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        changes = upgrade_database(engine)
+        assert "DROP INDEX ix_sales_records_region" in changes
+        assert "DROP INDEX ix_sales_records_sales_date" in changes
+
+        with engine.connect() as conn:
+            existing = index_names(conn, "sales_records")
+        assert {index.name for index in SalesRecord.__table__.indexes} <= existing
+        # 非本项目命名的索引保留
+        assert "custom_region" in existing
+        assert upgrade_database(engine) == []
+    finally:
+        engine.dispose()
@@ -0,0 +1,46 @@
+"""
+数据库线程池测试用例
+"""
+import asyncio
+import threading
+import httpx
+from app.api.api_v1.endpoints import analytics
+from app.core.config import settings
+from app.core.database import db_executor
+from app.main import app
+
+def test_queries_run_in_db_pool(client, monkeypatch):
+    """测试接口中的同步查询在有上限的数据库线程池中执行"""
+    threads = []
+
+    def fake_top_sales(db, *args):
+        threads.append(threading.current_thread().name)
+        return []
+
+    monkeypatch.setattr(analytics, "top_sales", fake_top_sales)
+
+    assert client.get("/api/v1/analytics/top-products").json() == []
+    assert threads[0].startswith("db")
+    assert db_executor._max_workers == settings.DB_POOL_THREADS
+
+def test_slow_query_does_not_block_event_loop(client, monkeypatch):
+    """测试慢查询执行期间事件循环仍能处理其他请求"""
+    release = threading.Event()
+
+    def slow_daily_sales(db, start_date, end_date):
+        assert release.wait(timeout=5), "慢查询期间其他请求未能完成"
+        return []
+
+    monkeypatch.setattr(analytics, "daily_sales", slow_daily_sales)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            slow = asyncio.create_task(http.get("/api/v1/analytics/sales-trend"))
+            health = await http.get("/health")
+            release.set()
+            return health, await slow
+
+    health, slow = asyncio.run(run())
+
+    assert health.status_code == 200
+    assert slow.status_code == 200 and slow.json() == []
@@ -0,0 +1,79 @@
+"""
+维度表（星型模型）测试用例
+"""
+import pandas as pd
+import pytest
+from sqlalchemy import func
+from app.core.config import settings
+from app.models.sales import SalesRecord, DimProduct, DimRegion
+from app.services.data_processor import DataProcessor
+from app.services.dimensions import backfill_dimension_keys, dimension_filter, resolve_keys, top_by_dimension
+
+SAMPLE_CSV = "data/sample_sales_data.csv"
+
+@pytest.fixture
+def star_schema(monkeypatch):
+    monkeypatch.setattr(settings, "STAR_SCHEMA", True)
+
+def top_products(db):
+    return sorted(tuple(row) for row in top_by_dimension(db, "product_name", {
+        "total_sales": func.sum(SalesRecord.sales_amount),
+        "order_count": func.count(SalesRecord.id)
+    }, limit=None))
+
+def test_import_resolves_dimension_keys(db, star_schema):
+    """测试星型模型下导入写入维度键，按键分组的结果与按字符串分组一致"""
+    result = DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv", streaming=True)
+
+    assert result.success
+    df = pd.read_csv(SAMPLE_CSV)
+    assert db.query(DimProduct).count() == df["product_name"].nunique()
+    for record in db.query(SalesRecord):
+        assert db.get(DimProduct, record.product_id).name == record.product_name
+        assert db.get(DimRegion, record.region_id).name == record.region
+
+    star = top_products(db)
+    settings.STAR_SCHEMA = False
+    assert top_products(db) == star
+
+def test_dimension_filter_uses_keys(db, star_schema):
+    """测试按名称过滤时转换为维度键，未知名称不匹配任何记录"""
+    DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv")
+
+    beijing = db.query(SalesRecord).filter(dimension_filter(db, "region", "北京")).count()
+    assert beijing == db.query(SalesRecord).filter(SalesRecord.region == "北京").count() > 0
+    assert db.query(SalesRecord).filter(dimension_filter(db, "region", "不存在")).count() == 0
+
+def test_upsert_keeps_keys_in_sync(db, tmp_path, star_schema):
+    """测试增量合并更新维度列时同步更新维度键"""
+    processor = DataProcessor(db)
+    processor.process_csv_file(SAMPLE_CSV, "sample.csv")
+    df = pd.read_csv(SAMPLE_CSV)
+    df.loc[0, "region"] = "拉萨"
+    csv_path = tmp_path / "extract.csv"
+    df.to_csv(csv_path, index=False)
+
+    result = processor.process_csv_file(str(csv_path), "extract.csv", upsert=True)
+
+    assert result.records_updated == 1
+    record = db.query(SalesRecord).filter(SalesRecord.order_id == df.loc[0, "order_id"]).one()
+    assert db.get(DimRegion, record.region_id).name == "拉萨"
+
+def test_rolled_back_keys_are_not_cached(db, star_schema):
+    """测试回滚事务中新建的维度键不会进入共享缓存"""
+    resolve_keys(db, "region", ["拉萨"])
+    db.rollback()
+    assert db.query(DimRegion).count() == 0
+
+    key = resolve_keys(db, "region", ["拉萨"])[0]
+    db.commit()
+    assert db.get(DimRegion, key).name == "拉萨"
+
+def test_backfill_dimension_keys(db):
+    """测试切换星型模型时补齐已有记录的维度键"""
+    DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv")
+    assert db.query(SalesRecord).filter(SalesRecord.product_id.is_(None)).count() == 15
+
+    assert backfill_dimension_keys(db.get_bind()) == 15
+    db.expire_all()
+    assert db.query(SalesRecord).filter(SalesRecord.product_id.is_(None)).count() == 0
@@ -0,0 +1,91 @@
+"""
+销售数据流式导出测试用例
+"""
+import csv
+import gzip
+import io
+import sys
+import pandas as pd
+import pytest
+from app.core.config import settings
+from app.services.data_processor import DataProcessor
+
+SAMPLE_CSV = "data/sample_sales_data.csv"
+
+def read_export(response, compressed=False):
+    assert response.status_code == 200
+    content = gzip.decompress(response.content) if compressed else response.content
+    return list(csv.reader(io.StringIO(content.decode("utf-8"))))
+
+def test_export_all_records_in_batches(client, db, monkeypatch):
+    """测试分批导出全部记录，不受分页大小限制"""
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 4)
+    DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv")
+
+    response = client.get("/api/v1/sales/export")
+    rows = read_export(response)
+
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "sales_export.csv" in response.headers["content-disposition"]
+    assert rows[0][:3] == ["ID", "订单ID", "产品名称"]
+    assert [row[0] for row in rows[1:]] == [str(i) for i in range(1, 16)]
+    assert rows[1][1] == "ORD001" and rows[1][9] == "2024-01-15"
+
+def test_export_filters(client, db):
+    """测试按日期范围、区域和类别过滤导出（与其他接口相同，结束日期不含当天）"""
+    DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv")
+    records = client.get("/api/v1/sales/", params={"limit": 100}).json()
+    expected = [
+        str(record["id"]) for record in records
+        if record["region"] == "北京" and "2024-01-15" <= record["sales_date"][:10] < "2024-01-26"
+    ]
+
+    rows = read_export(client.get("/api/v1/sales/export", params={
+        "region": "北京", "start_date": "2024-01-15", "end_date": "2024-01-26"
+    }))
+    assert len(expected) == 2 and [row[0] for row in rows[1:]] == expected
+
+    rows = read_export(client.get("/api/v1/sales/export", params={"category": "不存在的类别"}))
+    assert len(rows) == 1
+
+def test_export_gzip(client, db):
+    """测试 gzip 压缩导出，解压后与未压缩的内容一致"""
+    DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv")
+
+    response = client.get("/api/v1/sales/export", params={"gzip": True})
+
+    assert response.headers["content-type"] == "application/gzip"
+    assert "sales_export.csv.gz" in response.headers["content-disposition"]
+    assert read_export(response, compressed=True) == read_export(client.get("/api/v1/sales/export"))
+
+@pytest.mark.parametrize("format", ["arrow", "parquet"])
+def test_export_columnar(client, db, monkeypatch, format):
+    """测试 Arrow IPC / Parquet 导出分批写入，读入 DataFrame 后类型正确"""
+    pa = pytest.importorskip("pyarrow")
+    monkeypatch.setattr(settings, "EXPORT_ARROW_BATCH_SIZE", 4)
+    DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv")
+
+    response = client.get("/api/v1/sales/export", params={"format": format, "region": "北京"})
+
+    assert response.status_code == 200
+    assert f"sales_export.{format}" in response.headers["content-disposition"]
+    if format == "arrow":
+        df = pa.ipc.open_stream(response.content).read_pandas()
+    else:
+        df = pd.read_parquet(io.BytesIO(response.content))
+    expected = pd.read_csv(SAMPLE_CSV).query("region == '北京'")
+    assert df["order_id"].tolist() == expected["order_id"].tolist()
+    assert df["sales_amount"].tolist() == expected["sales_amount"].tolist()
+    assert str(df["quantity"].dtype) == "int64"
+    assert str(df["sales_date"].dtype).startswith("datetime64")
+    assert df["sales_date"].iloc[0] == pd.Timestamp("2024-01-15")
+
+def test_export_format_unavailable(client, monkeypatch):
+    """测试未知格式，以及未安装 pyarrow 时导出 Parquet 返回400"""
+    assert client.get("/api/v1/sales/export", params={"format": "xml"}).status_code == 400
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    response = client.get("/api/v1/sales/export", params={"format": "parquet"})
+
+    assert response.status_code == 400
+    assert "pyarrow" in response.json()["detail"]
@@ -0,0 +1,54 @@
+"""
+销售记录列表序列化测试用例
+"""
+import json
+from datetime import datetime
+import pytest
+from app.schemas.sales import SalesRecord as SalesRecordSchema
+from app.services.data_processor import DataProcessor
+from app.utils import serialization
+
+SAMPLE_CSV = "data/sample_sales_data.csv"
+
+@pytest.fixture
+def loaded(db):
+    DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv")
+
+def ndjson_records(response):
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def test_json_matches_response_model(client, loaded):
+    """测试按列投影序列化的结果与响应模型的字段和格式一致"""
+    records = client.get("/api/v1/sales/", params={"skip": 2, "limit": 3}).json()
+
+    assert [record["id"] for record in records] == [3, 4, 5]
+    for record in records:
+        assert list(record) == list(SalesRecordSchema.model_fields)
+        assert SalesRecordSchema.model_validate(record).model_dump(mode="json") == record
+    assert records[0]["sales_date"] == "2024-01-17T00:00:00"
+
+@pytest.mark.parametrize("params", [{"skip": 4, "limit": 6}, {"cursor": "", "limit": 6, "sort": "sales_date"}])
+def test_ndjson_matches_json(client, loaded, params):
+    """测试 NDJSON 逐行返回的记录与 JSON 数组一致，分页信息在响应头中"""
+    as_json = client.get("/api/v1/sales/", params=params)
+    as_ndjson = client.get("/api/v1/sales/", params={**params, "format": "ndjson"})
+
+    assert ndjson_records(as_ndjson) == as_json.json()
+    assert as_ndjson.headers["X-Total-Count"] == "15"
+    assert as_ndjson.headers.get("X-Next-Cursor") == as_json.headers.get("X-Next-Cursor")
+
+def test_stdlib_fallback_matches_orjson(monkeypatch):
+    """测试未安装 orjson 时退回标准库 json，输出一致"""
+    content = [{"name": "笔记本电脑", "amount": 8999.0, "quantity": 1, "date": datetime(2024, 1, 15, 10, 30),
+                "precise": datetime(2024, 1, 15, 10, 30, 0, 1500), "missing": None}]
+    expected = serialization.dumps(content)
+
+    monkeypatch.setattr(serialization, "orjson", None)
+
+    assert serialization.dumps(content) == expected
+    assert b"\\u" not in expected and b'"2024-01-15T10:30:00"' in expected
+
+def test_invalid_format(client):
+    """测试不支持的格式返回422"""
+    assert client.get("/api/v1/sales/", params={"format": "xml"}).status_code == 422
@@ -0,0 +1,107 @@
+"""
+分片（断点续传）上传测试用例
+"""
+import asyncio
+import hashlib
+import os
+import pytest
+from app.core.config import settings
+from app.models.sales import SalesRecord
+from app.services.multipart_upload import create_upload, get_upload, write_part
+from tests.test_upload import SAMPLE_CSV, wait_for_job
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    """分片和拼接文件写入临时目录"""
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    os.makedirs(settings.UPLOAD_DIR)
+    return settings.UPLOAD_DIR
+
+def split_sample(parts: int):
+    with open(SAMPLE_CSV, "rb") as f:
+        content = f.read()
+    size = len(content) // parts + 1
+    return content, [content[i:i + size] for i in range(0, len(content), size)]
+
+def test_out_of_order_parts(client, db):
+    """测试乱序上传分片后按编号拼接导入"""
+    content, chunks = split_sample(3)
+    upload = client.post("/api/v1/upload/multipart", json={"filename": "big.csv", "total_size": len(content)})
+    assert upload.status_code == 201
+    upload_id = upload.json()["upload_id"]
+
+    for number in (3, 1, 2):
+        chunk = chunks[number - 1]
+        response = client.put(
+            f"/api/v1/upload/multipart/{upload_id}/parts/{number}", content=chunk,
+            headers={"X-Content-SHA256": hashlib.sha256(chunk).hexdigest()}
+        )
+        assert response.status_code == 200
+        assert response.json()["size"] == len(chunk)
+
+    status = client.get(f"/api/v1/upload/multipart/{upload_id}").json()
+    assert status["received_bytes"] == len(content)
+    assert sorted(map(int, status["parts"])) == [1, 2, 3]
+
+    response = client.post(f"/api/v1/upload/multipart/{upload_id}/complete", json={"parts": [1, 2, 3]})
+    assert response.status_code == 202
+    job = wait_for_job(client, response.json()["job_id"])
+    assert job["status"] == "success"
+    assert job["file_size"] == len(content)
+    assert db.query(SalesRecord).count() == 15
+    # 会话和拼接文件都已清理
+    assert client.get(f"/api/v1/upload/multipart/{upload_id}").status_code == 404
+    assert os.listdir(os.path.join(settings.UPLOAD_DIR, "multipart")) == []
+
+def test_dropped_part_is_resent(client, db, upload_dir):
+    """测试分片传输中断时不留下残缺分片，重传后可正常完成"""
+    content, chunks = split_sample(2)
+    upload_id = create_upload("big.csv", len(content))["upload_id"]
+    asyncio.run(write_part(upload_id, 1, _stream(chunks[0])))
+
+    async def dropped():
+        yield chunks[1][:10]
+        raise ConnectionResetError("客户端断开")
+
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(write_part(upload_id, 2, dropped()))
+    assert list(get_upload(upload_id)["parts"]) == [1]
+    assert sorted(os.listdir(os.path.join(upload_dir, "multipart", upload_id))) == ["00001.part", "manifest.json"]
+
+    # 缺少分片时不能完成，已收到的分片保留
+    response = client.post(f"/api/v1/upload/multipart/{upload_id}/complete")
+    assert response.status_code == 400
+    assert list(get_upload(upload_id)["parts"]) == [1]
+
+    assert client.put(f"/api/v1/upload/multipart/{upload_id}/parts/2", content=chunks[1]).status_code == 200
+    response = client.post(f"/api/v1/upload/multipart/{upload_id}/complete")
+    assert response.status_code == 202
+    assert wait_for_job(client, response.json()["job_id"])["status"] == "success"
+    assert db.query(SalesRecord).count() == 15
+
+def test_part_checksum_and_size_are_checked(client, monkeypatch):
+    """测试分片校验和不一致返回400、超过分片大小上限返回413"""
+    monkeypatch.setattr(settings, "MULTIPART_PART_SIZE", 16)
+    upload_id = client.post("/api/v1/upload/multipart", json={"filename": "big.csv"}).json()["upload_id"]
+
+    response = client.put(
+        f"/api/v1/upload/multipart/{upload_id}/parts/1", content=b"order_id\n",
+        headers={"X-Content-SHA256": "0" * 64}
+    )
+    assert response.status_code == 400
+    response = client.put(f"/api/v1/upload/multipart/{upload_id}/parts/1", content=b"x" * 17)
+    assert response.status_code == 413
+    assert get_upload(upload_id)["parts"] == {}
+
+def test_create_upload_rejects_oversized_and_unknown_files(client):
+    """测试声明大小超过上限或文件类型不支持时拒绝创建会话"""
+    response = client.post(
+        "/api/v1/upload/multipart",
+        json={"filename": "big.csv", "total_size": settings.MULTIPART_MAX_FILE_SIZE + 1}
+    )
+    assert response.status_code == 413
+    assert client.post("/api/v1/upload/multipart", json={"filename": "big.txt"}).status_code == 400
+    assert client.get("/api/v1/upload/multipart/..%2Fmanifest").status_code == 404
+
+async def _stream(data: bytes):
+    yield data
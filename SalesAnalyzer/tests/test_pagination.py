@@ -0,0 +1,89 @@
+"""
+销售记录游标分页测试用例
+"""
+import pandas as pd
+import pytest
+from app.services.data_processor import DataProcessor
+from app.services.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.services.response_cache import response_cache
+
+SAMPLE_CSV = "data/sample_sales_data.csv"
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+@pytest.fixture
+def loaded(db, tmp_path):
+    """导入多份示例数据，同一天有多条记录"""
+    df = pd.read_csv(SAMPLE_CSV)
+    frames = []
+    for copy in range(3):
+        frame = df.copy()
+        frame["order_id"] = frame["order_id"] + f"-{copy}"
+        frames.append(frame)
+    csv_path = tmp_path / "sales.csv"
+    pd.concat(frames).to_csv(csv_path, index=False)
+    assert DataProcessor(db).process_csv_file(str(csv_path), "sales.csv").success
+    return len(df) * 3
+
+def walk(client, **params):
+    """按游标逐页读取全部记录，返回 (记录id列表, 页数)"""
+    ids, pages, cursor = [], 0, ""
+    while cursor is not None:
+        response = client.get("/api/v1/sales/", params={**params, "cursor": cursor, "limit": 7})
+        assert response.status_code == 200
+        ids += [record["id"] for record in response.json()]
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+    return ids, pages
+
+@pytest.mark.parametrize("sort", ["id", "sales_date"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_walk_matches_full_ordering(client, loaded, sort, order):
+    """测试按游标翻页得到的记录与整体排序一致，不重复、不遗漏"""
+    records = client.get("/api/v1/sales/", params={"limit": 1000}).json()
+    expected = sorted(records, key=lambda r: (r["sales_date"][:10], r["id"]) if sort == "sales_date" else r["id"],
+                      reverse=order == "desc")
+
+    ids, pages = walk(client, sort=sort, order=order)
+
+    assert ids == [record["id"] for record in expected]
+    assert pages == -(-loaded // 7)
+
+def test_cursor_with_filters(client, loaded):
+    """测试过滤条件下的游标分页和总数"""
+    ids, _ = walk(client, region="北京", sort="sales_date")
+    response = client.get("/api/v1/sales/", params={"region": "北京", "limit": 1000})
+
+    assert sorted(ids) == sorted(record["id"] for record in response.json())
+    assert response.headers["X-Total-Count"] == str(len(ids))
+
+def test_offset_mode_unchanged(client, loaded):
+    """测试不传游标时仍按偏移分页，且返回总数"""
+    response = client.get("/api/v1/sales/", params={"skip": 5, "limit": 3})
+
+    assert [record["id"] for record in response.json()] == [6, 7, 8]
+    assert response.headers["X-Total-Count"] == str(loaded)
+    assert "X-Next-Cursor" not in response.headers
+
+def test_invalid_cursor(client, loaded):
+    """测试无法解析或与排序方式不一致的游标返回400"""
+    assert client.get("/api/v1/sales/", params={"cursor": "not-a-cursor"}).status_code == 400
+    cursor = encode_cursor("id", "asc", 5, 5)
+    response = client.get("/api/v1/sales/", params={"cursor": cursor, "order": "desc"})
+    assert response.status_code == 400
+    assert client.get("/api/v1/sales/", params={"cursor": "", "sort": "amount"}).status_code == 400
+
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor("id", "asc", 5, "5"), "id", "asc")
+    assert decode_cursor(encode_cursor("sales_date", "desc", "2024-01-15", 9), "sales_date", "desc") == ("2024-01-15", 9)
+
+def test_total_count_cached(client, loaded):
+    """测试总数读取汇总表并按数据版本缓存，翻页时不重复计算"""
+    client.get("/api/v1/sales/", params={"cursor": ""})
+    client.get("/api/v1/sales/", params={"cursor": "", "limit": 5})
+
+    assert response_cache.stats()["hits"] == 1
@@ -0,0 +1,36 @@
+"""
+查询计划检查工具测试用例
+"""
+from app.services.data_processor import DataProcessor
+from app.utils.query_advisor import INFO, WARNING, advise, plan_issues
+
+SAMPLE_CSV = "data/sample_sales_data.csv"
+
+def test_plan_issues_classification():
+    """测试执行计划中全表扫描、回表扫描和临时B树的分级"""
+    assert plan_issues("SELECT * FROM t", ["SCAN t"]) == [(WARNING, "全表扫描 t")]
+    assert plan_issues("SELECT * FROM t", ["SCAN t USING INDEX ix"])[0][0] == WARNING
+    assert plan_issues("SELECT * FROM t", ["SCAN t USING COVERING INDEX ix"])[0][0] == INFO
+    assert plan_issues("SELECT * FROM t", ["SEARCH t USING INDEX ix (a=?)"]) == []
+    assert plan_issues("SELECT * FROM t", ["SCAN sales_daily_rollup"])[0][0] == INFO
+    rollup = "SELECT region, sum(total_sales) FROM sales_daily_rollup GROUP BY region"
+    assert plan_issues(rollup, ["USE TEMP B-TREE FOR GROUP BY"]) == [(INFO, "汇总表临时B树排序（GROUP BY）")]
+    grouped = "SELECT a, sum(b) FROM t GROUP BY a ORDER BY sum(b) DESC"
+    assert plan_issues(grouped, ["USE TEMP B-TREE FOR ORDER BY"]) == [(INFO, "临时B树排序分组结果")]
+    assert plan_issues(grouped, ["USE TEMP B-TREE FOR GROUP BY"]) == [(WARNING, "临时B树排序（GROUP BY）")]
+
+def test_analytics_queries_use_covering_indexes(db):
+    """测试分析查询读取汇总表或覆盖索引，按条件过滤的列表查询不出现全表扫描，只有无条件分页列表需要全表扫描"""
+    DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv")
+
+    report = advise(db.get_bind())
+
+    assert {entry["query"] for entry in report} >= {
+        "GET /api/v1/analytics/top-products", "GET /api/v1/analytics/sales-trend", "GET /api/v1/sales/"
+    }
+    flagged = {entry["query"] for entry in report if any(level == WARNING for level, _ in entry["issues"])}
+    assert flagged == {"GET /api/v1/sales/"}
+    trend = [entry for entry in report if entry["query"].startswith("GET /api/v1/analytics/sales-trend?")]
+    assert any("sales_daily_rollup" in detail for detail in trend[0]["plan"])
+    detail_trend = [entry for entry in report if entry["query"] == "daily_sales(明细)"]
+    assert any("ix_sales_records_sales_day_cover" in detail for detail in detail_trend[0]["plan"])
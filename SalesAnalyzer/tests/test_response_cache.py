@@ -0,0 +1,74 @@
+"""
+分析接口响应缓存测试用例
+"""
+import pytest
+from app.models.sales import SalesRecord
+from app.services.response_cache import ResponseCache, data_version, response_cache
+
+SAMPLE_CSV = "data/sample_sales_data.csv"
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+def upload(client, content: bytes, filename="sales.csv"):
+    response = client.post("/api/v1/upload/csv", files={"file": (filename, content, "text/csv")})
+    assert response.status_code == 200 and response.json()["success"]
+
+def test_lru_eviction_and_versions():
+    """测试超过上限时淘汰最久未使用的条目，版本不同视为未命中"""
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", 1, "A")
+    cache.put("b", 1, "B")
+    assert cache.get("a", 1) == (True, "A")
+    cache.put("c", 1, "C")
+
+    assert cache.get("b", 1) == (False, None)
+    assert cache.get("a", 2) == (False, None)
+    assert cache.get("c", 1) == (True, "C")
+    assert cache.stats() == {"hits": 2, "misses": 2, "entries": 1, "max_entries": 2}
+
+def test_cached_until_import_commits(client, db):
+    """测试重复请求命中缓存，导入提交后数据版本变化、返回新结果"""
+    with open(SAMPLE_CSV, "rb") as f:
+        content = f.read()
+    upload(client, content)
+    version = data_version(db)
+    assert version > 0
+
+    first = client.get("/api/v1/analytics/top-products").json()
+    assert client.get("/api/v1/analytics/top-products", params={"limit": 10}).json() == first
+    assert client.get("/api/v1/analytics/cache-stats").json() == {
+        "hits": 1, "misses": 1, "entries": 1, "max_entries": response_cache.max_entries, "data_version": version,
+        "column_store": {"state": "disabled", "rows": 0, "data_version": None, "memory_mb": 0}
+    }
+
+    upload(client, content.replace(b"ORD0", b"NEW0"), "more.csv")
+
+    second = client.get("/api/v1/analytics/top-products").json()
+    assert second[0]["order_count"] == first[0]["order_count"] * 2
+    assert client.get("/api/v1/analytics/cache-stats").json()["misses"] == 2
+
+def test_orm_write_bumps_version(client, db):
+    """测试通过ORM写入销售记录同样使缓存失效"""
+    assert client.get("/api/v1/sales/statistics/summary").json()["total_orders"] == 0
+
+    db.add(SalesRecord(order_id="ORM001", product_name="键盘", category="电子产品", region="北京",
+                       sales_amount=100.0, quantity=1))
+    db.commit()
+
+    assert data_version(db) == 1
+    assert client.get("/api/v1/sales/statistics/summary").json()["total_orders"] == 1
+
+def test_cache_disabled(client, monkeypatch):
+    """测试 RESPONSE_CACHE_SIZE=0 时不缓存"""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_SIZE", 0)
+
+    client.get("/api/v1/analytics/top-regions")
+    client.get("/api/v1/analytics/top-regions")
+
+    assert response_cache.stats()["entries"] == 0
+    assert response_cache.stats()["hits"] == 0
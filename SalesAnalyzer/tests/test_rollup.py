@@ -0,0 +1,145 @@
+"""
+销售日汇总表测试用例
+"""
+from datetime import datetime
+import pandas as pd
+import pytest
+from app.core.config import settings
+from app.models.sales import SalesRecord, SalesDailyRollup
+from app.services.data_processor import DataProcessor, daily_sales, sales_totals, top_sales
+from app.services.rollup import backfill_sales_rollup, rebuild_sales_rollup, rollup_conditions
+
+SAMPLE_CSV = "data/sample_sales_data.csv"
+
+def write_sales(tmp_path, name="sales.csv", copies=4):
+    """由示例数据生成多天、每天多条记录的CSV"""
+    df = pd.read_csv(SAMPLE_CSV)
+    frames = []
+    for copy in range(copies):
+        frame = df.copy()
+        frame["order_id"] = frame["order_id"] + f"-{copy}"
+        frame["sales_date"] = (pd.to_datetime(frame["sales_date"]) + pd.to_timedelta(copy % 2 * 3, unit="D"))\
+            .dt.strftime("%Y-%m-%d")
+        frames.append(frame)
+    csv_path = tmp_path / name
+    pd.concat(frames).to_csv(csv_path, index=False)
+    return csv_path
+
+def rollup_rows(db):
+    return {
+        (row.day, row.region, row.category, row.product_name): (row.total_sales, row.total_quantity, row.order_count)
+        for row in db.query(SalesDailyRollup)
+    }
+
+def assert_rollup_consistent(db):
+    """汇总表与按明细全量重建的结果一致"""
+    maintained = rollup_rows(db)
+    db.commit()
+    rebuild_sales_rollup(db.get_bind())
+    rebuilt = rollup_rows(db)
+    assert maintained.keys() == rebuilt.keys()
+    for key, (total_sales, total_quantity, order_count) in rebuilt.items():
+        assert maintained[key] == (pytest.approx(total_sales), total_quantity, order_count)
+
+def query_results(db, monkeypatch, use_rollup):
+    """汇总表或明细表上的各类查询结果（排行中金额相同的先后顺序不固定，统一排序后比较）"""
+    monkeypatch.setattr(settings, "SALES_ROLLUP", use_rollup)
+    statistics = DataProcessor(db).get_sales_statistics({"start_date": "2024-01-18", "region": "上海"})
+    for key in ("top_products", "top_regions"):
+        statistics[key] = sorted(statistics[key], key=lambda item: sorted(item.items()))
+    return {
+        "products": sorted(tuple(row) for row in top_sales(
+            db, "product_name", ["total_sales", "total_quantity", "order_count"], None
+        )),
+        "regions": sorted(tuple(row) for row in top_sales(
+            db, "region", ["total_sales"], None, start_date="2024-01-17", category="电子产品"
+        )),
+        "trend": [tuple(row) for row in daily_sales(db, "2024-01-16", "2024-01-25")],
+        "totals": tuple(sales_totals(db, end_date="2024-01-20", region="北京")),
+        "statistics": statistics,
+    }
+
+def test_rollup_matches_detail_queries(db, tmp_path, monkeypatch):
+    """测试按导入批次维护的汇总表与明细查询结果一致（结束日期不含当天的语义相同）"""
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 16)
+    csv_path = write_sales(tmp_path)
+    result = DataProcessor(db).process_csv_file(str(csv_path), "sales.csv", streaming=True)
+    assert result.success and result.chunks_processed == 4
+
+    assert_rollup_consistent(db)
+    assert query_results(db, monkeypatch, True) == query_results(db, monkeypatch, False)
+
+def test_upsert_adjusts_rollup(db, tmp_path):
+    """测试增量合并扣除被更新订单的旧值，加上新值和新订单"""
+    processor = DataProcessor(db)
+    processor.process_csv_file(str(write_sales(tmp_path)), "sales.csv")
+    df = pd.read_csv(write_sales(tmp_path, "extract.csv", copies=2))
+    df.loc[0, "region"] = "拉萨"
+    df.loc[1, "sales_date"] = "2024-03-01"
+    df.loc[2, "sales_amount"] = 1.5
+    df.loc[3, "order_id"] = "NEW001"
+    csv_path = tmp_path / "changed.csv"
+    df.to_csv(csv_path, index=False)
+
+    result = processor.process_csv_file(str(csv_path), "changed.csv", upsert=True)
+
+    assert (result.records_inserted, result.records_updated) == (1, 3)
+    assert_rollup_consistent(db)
+    assert daily_sales(db, "2024-03-01", "2024-03-02")[0].order_count == 1
+
+def test_failed_chunk_rolls_back_rollup(db, tmp_path, monkeypatch):
+    """测试分块写入失败时该分块对汇总表的增量一同回滚"""
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 16)
+    insert = DataProcessor._insert_columns
+    calls = []
+
+    def failing_insert(self, columns):
+        calls.append(len(columns["order_id"]))
+        inserted = insert(self, columns)
+        if len(calls) == 3:
+            raise ValueError("模拟写入失败")
+        return inserted
+
+    monkeypatch.setattr(DataProcessor, "_insert_columns", failing_insert)
+    result = DataProcessor(db).process_csv_file(str(write_sales(tmp_path)), "sales.csv", streaming=True)
+
+    assert not result.success
+    assert sales_totals(db).order_count == db.query(SalesRecord).count() == 32
+    assert_rollup_consistent(db)
+
+def test_orm_writes_maintain_rollup(db):
+    """测试通过ORM新增、修改和删除单条记录时同步维护汇总表"""
+    record = SalesRecord(
+        order_id="ORM001", product_name="键盘", category="电子产品", region="北京",
+        sales_amount=100.0, quantity=2, sales_date=datetime(2024, 2, 1, 10, 30)
+    )
+    db.add(record)
+    db.commit()
+    assert rollup_rows(db) == {("2024-02-01", "北京", "电子产品", "键盘"): (100.0, 2, 1)}
+
+    record.region = "上海"
+    record.sales_amount = 80.0
+    db.commit()
+    assert rollup_rows(db) == {("2024-02-01", "上海", "电子产品", "键盘"): (80.0, 2, 1)}
+
+    db.delete(record)
+    db.commit()
+    assert rollup_rows(db) == {}
+
+def test_rollup_conditions_fallback():
+    """测试带时间的日期和未知维度无法在汇总粒度上表达"""
+    assert rollup_conditions() == []
+    assert len(rollup_conditions(start_date="2024-01-01", end_date="2024-02-01", region="北京", category=None)) == 3
+    assert rollup_conditions(start_date=datetime(2024, 1, 1)) is None
+    assert rollup_conditions(end_date="2024-01-01 12:00:00") is None
+    assert rollup_conditions(sales_person="李销售") is None
+
+def test_backfill_sales_rollup(db):
+    """测试汇总表为空时按已有记录补齐（旧数据库升级），非空时不重复处理"""
+    DataProcessor(db).process_csv_file(SAMPLE_CSV, "sample.csv")
+    db.query(SalesDailyRollup).delete()
+    db.commit()
+
+    assert backfill_sales_rollup(db.get_bind()) == 15
+    assert backfill_sales_rollup(db.get_bind()) == 0
+    assert sales_totals(db).order_count == 15
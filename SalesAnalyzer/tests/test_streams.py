@@ -0,0 +1,96 @@
+"""
+流式数据管道测试用例
+"""
+import threading
+import time
+from app.core.config import settings
+from app.models.sales import SalesRecord, DataImportLog
+from app.services.data_processor import DataProcessor
+from app.utils.streams import SpooledPipe
+
+SAMPLE_CSV = "data/sample_sales_data.csv"
+
+def test_spooled_pipe_keeps_order_across_spill():
+    """测试溢出到临时文件后读取顺序不变"""
+    pipe = SpooledPipe(spool_threshold=8)
+    pipe.write(b"abcde")
+    assert not pipe.spilled
+    pipe.write(b"fghij")
+    assert pipe.spilled
+    assert pipe.read(3) == b"abc"
+    pipe.write(b"klm")
+    pipe.close_writer()
+
+    assert pipe.read() == b"defghijklm"
+    assert pipe.tell() == 13
+
+def test_spooled_pipe_stays_in_memory_below_threshold():
+    """测试积压数据未超过阈值时不产生临时文件"""
+    pipe = SpooledPipe(spool_threshold=8)
+    for _ in range(10):
+        pipe.write(b"12345")
+        assert pipe.read(5) == b"12345"
+    pipe.close_writer()
+
+    assert pipe.read() == b""
+    assert not pipe.spilled
+
+def test_spooled_pipe_propagates_writer_error():
+    """测试写入端中断时读取方收到异常"""
+    pipe = SpooledPipe(spool_threshold=8)
+    pipe.close_writer(error=ConnectionError("客户端断开"))
+    try:
+        pipe.read(1)
+    except IOError as e:
+        assert "客户端断开" in str(e)
+    else:
+        raise AssertionError("应抛出IOError")
+
+def test_stream_import_commits_while_upload_arrives(session_factory, monkeypatch):
+    """测试上传尚未结束时已有分块提交入库"""
+    monkeypatch.setattr(settings, "CHUNK_SIZE", 500)
+    with open(SAMPLE_CSV, "rb") as f:
+        header, *rows = f.read().splitlines(keepends=False)
+    # pandas 每次按256KB读取缓冲，先发送的数据需远超缓冲区才能在流关闭前产出分块
+    copies = 3000
+    # 分块内按订单号去重，每份副本改写订单号保证唯一
+    body = b"".join(
+        b"ORD%d-%s\n" % (i, row) for i in range(copies) for row in rows
+    )
+    half = body.index(b"\n", len(body) // 2) + 1
+
+    pipe = SpooledPipe(spool_threshold=1024 * 1024)
+    results = []
+    worker_db = session_factory()
+    worker = threading.Thread(
+        target=lambda: results.append(DataProcessor(worker_db).process_csv_stream(pipe, "sample.csv")),
+        daemon=True
+    )
+    worker.start()
+
+    db = session_factory()
+    try:
+        # 先发送前一半数据，确认在写入端关闭前已有分块提交
+        pipe.write(header + b"\n" + body[:half])
+        deadline = time.time() + 30
+        committed = 0
+        while time.time() < deadline and not committed:
+            time.sleep(0.05)
+            db.expire_all()
+            committed = db.query(SalesRecord).count()
+        assert committed >= 500
+
+        pipe.write(body[half:])
+        pipe.close_writer()
+        worker.join(timeout=60)
+
+        assert results[0].success
+        assert results[0].records_imported == len(rows) * copies
+        db.expire_all()
+        assert db.query(DataImportLog).one().import_status == "success"
+    finally:
+        # 断言失败时也要关闭写入端，避免导入线程阻塞在读取上
+        pipe.close_writer()
+        worker.join(timeout=60)
+        db.close()
+        worker_db.close()
@@ -0,0 +1,226 @@
+"""
+文件上传API测试用例
+"""
+import os
+import time
+from app.core.config import settings
+from app.models.sales import SalesRecord, DataImportLog
+from app.services import import_jobs
+
+SAMPLE_CSV = "data/sample_sales_data.csv"
+
+def wait_for_job(client, job_id, timeout=10.0):
+    """轮询导入任务直到结束"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/v1/upload/jobs/{job_id}").json()
+        if job["status"] not in ("queued", "processing"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"导入任务 {job_id} 超时未结束")
+
+def test_upload_csv(client, db):
+    """测试同步上传"""
+    with open(SAMPLE_CSV, "rb") as f:
+        response = client.post("/api/v1/upload/csv", files={"file": ("sales.csv", f, "text/csv")})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"]
+    assert data["records_imported"] == 15
+    assert db.query(SalesRecord).count() == 15
+
+def test_upload_csv_background(client, db):
+    """测试后台导入返回任务ID并可查询进度"""
+    with open(SAMPLE_CSV, "rb") as f:
+        response = client.post(
+            "/api/v1/upload/csv?background=true",
+            files={"file": ("sales.csv", f, "text/csv")}
+        )
+
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert job_id is not None
+
+    job = wait_for_job(client, job_id)
+    assert job["status"] == "success"
+    assert job["records_imported"] == 15
+    assert job["rows_processed"] == 15
+    assert job["progress"] == 100.0
+    assert job["bytes_processed"] == job["file_size"]
+    assert job["rows_per_second"] is not None
+    assert db.query(SalesRecord).count() == 15
+
+def test_get_import_job_not_found(client):
+    """测试查询不存在的任务"""
+    response = client.get("/api/v1/upload/jobs/9999")
+    assert response.status_code == 404
+
+def test_upload_rejects_non_csv(client):
+    """测试拒绝非CSV文件"""
+    response = client.post("/api/v1/upload/csv", files={"file": ("test.txt", b"invalid", "text/plain")})
+    assert response.status_code == 400
+
+def test_upload_csv_streaming_without_temp_file(client, db):
+    """测试同步流式上传直接读取上传内容，不在上传目录落盘"""
+    before = set(os.listdir(settings.UPLOAD_DIR))
+    with open(SAMPLE_CSV, "rb") as f:
+        response = client.post(
+            "/api/v1/upload/csv?streaming=true",
+            files={"file": ("sales.csv", f, "text/csv")}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["records_imported"] == 15
+    assert set(os.listdir(settings.UPLOAD_DIR)) == before
+
+def test_upload_csv_raw_stream(client, db):
+    """测试以原始请求体流式上传"""
+    with open(SAMPLE_CSV, "rb") as f:
+        content = f.read()
+
+    response = client.post("/api/v1/upload/stream?filename=sales.csv", content=content)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"]
+    assert data["records_imported"] == 15
+    assert db.query(SalesRecord).count() == 15
+    log = db.query(DataImportLog).one()
+    assert log.bytes_processed == len(content)
+
+def test_upload_csv_raw_stream_rejects_non_csv(client):
+    """测试原始流上传校验文件名"""
+    response = client.post("/api/v1/upload/stream?filename=sales.txt", content=b"abc")
+    assert response.status_code == 400
+
+def test_upload_empty_csv_streaming_records_failure(client, db):
+    """测试空文件流式上传返回失败结果并记录失败日志，而不是500"""
+    response = client.post(
+        "/api/v1/upload/csv?streaming=true",
+        files={"file": ("empty.csv", b"", "text/csv")}
+    )
+
+    assert response.status_code == 200
+    assert not response.json()["success"]
+    assert db.query(DataImportLog).one().import_status == "failed"
+
+def test_upload_background_submit_failure_removes_file(client, monkeypatch):
+    """测试后台任务提交失败时清理已保存的上传文件"""
+    def broken_submit(*args, **kwargs):
+        raise RuntimeError("数据库不可用")
+
+    monkeypatch.setattr("app.api.api_v1.endpoints.upload.submit_import_job", broken_submit)
+    before = set(os.listdir(settings.UPLOAD_DIR))
+    with open(SAMPLE_CSV, "rb") as f:
+        response = client.post(
+            "/api/v1/upload/csv?background=true",
+            files={"file": ("sales.csv", f, "text/csv")}
+        )
+
+    assert response.status_code == 500
+    assert set(os.listdir(settings.UPLOAD_DIR)) == before
+
+def test_fail_orphaned_jobs(db):
+    """测试启动时将遗留的排队中/处理中任务标记为结束"""
+    db.add_all([
+        DataImportLog(filename="a.csv", import_status="queued"),
+        DataImportLog(filename="b.csv", import_status="processing", chunks_processed=2),
+        DataImportLog(filename="c.csv", import_status="success"),
+    ])
+    db.commit()
+
+    assert import_jobs.fail_orphaned_jobs(db) == 2
+    statuses = {log.filename: log.import_status for log in db.query(DataImportLog)}
+    assert statuses == {"a.csv": "failed", "b.csv": "partial", "c.csv": "success"}
+
+def test_upload_csv_raw_stream_enforces_size_limit(client, db, monkeypatch):
+    """测试原始流上传按实际接收字节数限制大小"""
+    monkeypatch.setattr(settings, "MAX_FILE_SIZE", 100)
+
+    def body():
+        # 生成器请求体不带 content-length，只能在接收过程中计数
+        with open(SAMPLE_CSV, "rb") as f:
+            yield f.read()
+
+    response = client.post("/api/v1/upload/stream?filename=sales.csv", content=body())
+
+    assert response.status_code == 413
+    assert db.query(SalesRecord).count() == 0
+
+def test_upload_duplicate_background_returns_existing_job(client, db):
+    """测试重复上传时不提交后台任务，直接返回已有导入任务"""
+    with open(SAMPLE_CSV, "rb") as f:
+        content = f.read()
+    first = client.post("/api/v1/upload/csv?background=true", files={"file": ("a.csv", content, "text/csv")})
+    wait_for_job(client, first.json()["job_id"])
+
+    second = client.post("/api/v1/upload/csv?background=true", files={"file": ("b.csv", content, "text/csv")})
+
+    assert second.status_code == 200
+    assert second.json()["duplicate_of"] == first.json()["job_id"]
+    assert db.query(DataImportLog).count() == 1
+
+    forced = client.post(
+        "/api/v1/upload/csv?background=true&force=true",
+        files={"file": ("b.csv", content, "text/csv")}
+    )
+    assert forced.status_code == 202
+    assert wait_for_job(client, forced.json()["job_id"])["status"] == "success"
+    assert db.query(SalesRecord).count() == 30
+
+def test_upload_xlsx(client, db, tmp_path):
+    """测试上传Excel工作簿"""
+    import pandas as pd
+
+    xlsx_path = tmp_path / "sales.xlsx"
+    pd.read_csv(SAMPLE_CSV).to_excel(xlsx_path, index=False)
+    with open(xlsx_path, "rb") as f:
+        response = client.post("/api/v1/upload/csv", files={"file": ("sales.xlsx", f, "application/octet-stream")})
+
+    assert response.status_code == 200
+    assert response.json()["records_imported"] == 15
+    assert db.query(SalesRecord).count() == 15
+
+def test_upload_csv_gz(client, db):
+    """测试上传gzip压缩的CSV"""
+    import gzip
+
+    with open(SAMPLE_CSV, "rb") as f:
+        content = gzip.compress(f.read())
+    response = client.post("/api/v1/upload/csv", files={"file": ("sales.csv.gz", content, "application/gzip")})
+
+    assert response.status_code == 200
+    assert response.json()["records_imported"] == 15
+    assert db.query(SalesRecord).count() == 15
+
+def test_upload_zst_without_zstandard(client, monkeypatch):
+    """测试未安装 zstandard 时 .zst 上传返回400"""
+    import sys
+
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+    response = client.post("/api/v1/upload/csv", files={"file": ("sales.csv.zst", b"\x28\xb5\x2f\xfd", "application/zstd")})
+
+    assert response.status_code == 400
+    assert "zstandard" in response.json()["detail"]
+
+def test_upload_zip_background(client, db):
+    """测试后台导入zip时任务日志汇总各成员结果"""
+    import io
+    import zipfile
+
+    with open(SAMPLE_CSV, "rb") as f:
+        content = f.read()
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("a.csv", content)
+        archive.writestr("b.csv", content.replace(b"\nORD", b"\nB_ORD"))
+    response = client.post(
+        "/api/v1/upload/csv?background=true", files={"file": ("sales.zip", buffer.getvalue(), "application/zip")}
+    )
+
+    assert response.status_code == 202
+    job = wait_for_job(client, response.json()["job_id"])
+    assert job["status"] == "success"
+    assert job["records_imported"] == 30
+    assert db.query(SalesRecord).count() == 30
@@ -44,17 +44,49 @@ export const salesAPI = {
   // 获取分类统计数据
   getCategoryStats: () => api.get('/sales/category-stats'),
   
-  // 上传CSV文件
-  uploadCSV: (file) => {
+  // 获取仪表盘数据（统计、趋势、分类和最近销售记录，一次请求）
+  getDashboard: (params) => api.get('/sales/dashboard', { params }),
+  
+  // 上传CSV文件（后台导入，返回任务ID）
+  uploadCSV: (file, onUploadProgress) => {
     const formData = new FormData()
     formData.append('file', file)
     return api.post('/sales/upload', formData, {
+      params: { background: true },
+      timeout: 0,
+      onUploadProgress,
       headers: {
         'Content-Type': 'multipart/form-data'
       }
     })
   },
   
+  // 分片上传：创建会话
+  createMultipartUpload: (filename, totalSize) => api.post('/sales/upload/multipart', {
+    filename,
+    total_size: totalSize
+  }),
+  
+  // 分片上传：查询已收到的分片（断点续传）
+  getMultipartUpload: (uploadId) => api.get(`/sales/upload/multipart/${uploadId}`),
+  
+  // 分片上传：上传一个分片（编号从1开始）
+  uploadPart: (uploadId, partNumber, blob, onUploadProgress) => api.put(
+    `/sales/upload/multipart/${uploadId}/parts/${partNumber}`, blob, {
+      timeout: 0,
+      onUploadProgress,
+      headers: {
+        'Content-Type': 'application/octet-stream'
+      }
+    }
+  ),
+  
+  // 分片上传：拼接分片并开始后台导入，返回任务ID
+  completeMultipartUpload: (uploadId) => api.post(`/sales/upload/multipart/${uploadId}/complete`, {}),
+  
+  // 获取导入任务状态
+  getImportJob: (jobId) => api.get(`/sales/upload/jobs/${jobId}`),
+  
   // 查询销售记录（统一使用这个接口）
   querySales: (params) => api.get('/sales/query', { params }),
   